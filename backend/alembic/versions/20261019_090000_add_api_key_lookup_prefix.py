@@ -0,0 +1,28 @@
+"""Add lookup prefix to API keys
+
+Revision ID: 7b2e4c9a1d35
+Revises: 610ffe6e81fe
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c9a1d35'
+down_revision: Union[str, None] = '610ffe6e81fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing keys keep a NULL prefix and are verified through the legacy path
+    op.add_column('api_keys', sa.Column('key_prefix', sa.String(length=16), nullable=True))
+    op.create_index(op.f('ix_api_keys_key_prefix'), 'api_keys', ['key_prefix'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_api_keys_key_prefix'), table_name='api_keys')
+    op.drop_column('api_keys', 'key_prefix')
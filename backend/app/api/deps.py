@@ -9,9 +9,11 @@ from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.security import verify_token_with_blacklist, TokenData, verify_api_key
+from app.core.security import verify_token_with_blacklist, TokenData
+from app.core.api_key_auth import authenticate_api_key
+from app.core.user_cache import UserSnapshot, load_user_snapshot
 from app.db.session import get_db
-from app.models.user import UserDB, UserRole, UserStatus, APIKeyDB
+from app.models.user import UserDB, UserRole, UserStatus
 
 # OAuth2 scheme for JWT authentication
 oauth2_scheme = OAuth2PasswordBearer(
@@ -30,44 +32,38 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: Optional[str] = Depends(oauth2_scheme),
     api_key: Optional[str] = Depends(api_key_header)
-) -> Optional[UserDB]:
+) -> Optional[UserSnapshot]:
     """
     Get current authenticated user from JWT token or API key.
     Returns None if no authentication provided.
     Checks token blacklist for revoked tokens.
+    The user is returned as a cached snapshot (see app.core.user_cache);
+    use get_current_active_user_db when the full row is needed.
     """
     # Try JWT token first
     if token:
         # Verify token and check blacklist
         token_data = await verify_token_with_blacklist(token, token_type="access")
         if token_data:
-            result = await db.execute(select(UserDB).where(UserDB.id == token_data.user_id))
-            user = result.scalar_one_or_none()
+            user = await load_user_snapshot(db, token_data.user_id)
             if user and user.status == UserStatus.ACTIVE:
                 return user
 
     # Try API key
     if api_key:
-        # Find active API keys in database
-        result = await db.execute(select(APIKeyDB).where(APIKeyDB.is_active == 1))
-        api_key_records = result.scalars().all()
-        for record in api_key_records:
-            if verify_api_key(api_key, record.key_hash):
-                # Update last used
-                record.last_used = datetime.utcnow()
-                await db.commit()
-                # Get associated user
-                user_result = await db.execute(select(UserDB).where(UserDB.id == record.user_id))
-                user = user_result.scalar_one_or_none()
-                if user and user.status == UserStatus.ACTIVE:
-                    return user
+        # Indexed prefix lookup + cached verification; last_used is flushed in batches
+        user_id = await authenticate_api_key(db, api_key)
+        if user_id:
+            user = await load_user_snapshot(db, user_id)
+            if user and user.status == UserStatus.ACTIVE:
+                return user
 
     return None
 
 
 async def get_current_user_required(
-    current_user: Optional[UserDB] = Depends(get_current_user)
-) -> UserDB:
+    current_user: Optional[UserSnapshot] = Depends(get_current_user)
+) -> UserSnapshot:
     """
     Require authenticated user. Raises 401 if not authenticated.
     """
@@ -81,8 +77,8 @@ async def get_current_user_required(
 
 
 async def get_current_active_user(
-    current_user: UserDB = Depends(get_current_user_required)
-) -> UserDB:
+    current_user: UserSnapshot = Depends(get_current_user_required)
+) -> UserSnapshot:
     """
     Get current active user. Raises 403 if user is inactive/suspended.
     """
@@ -102,18 +98,37 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_active_user_db(
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+) -> UserDB:
+    """
+    Get the current active user's database row.
+    For endpoints that read or modify fields outside the cached snapshot.
+    """
+    result = await db.execute(select(UserDB).where(UserDB.id == current_user.id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
 def require_roles(allowed_roles: List[UserRole]):
     """
     Dependency factory to require specific roles.
 
     Usage:
         @router.get("/admin")
-        async def admin_endpoint(user: UserDB = Depends(require_roles([UserRole.ADMIN]))):
+        async def admin_endpoint(user: UserSnapshot = Depends(require_roles([UserRole.ADMIN]))):
             ...
     """
     async def role_checker(
-        current_user: UserDB = Depends(get_current_active_user)
-    ) -> UserDB:
+        current_user: UserSnapshot = Depends(get_current_active_user)
+    ) -> UserSnapshot:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -139,8 +154,8 @@ class OptionalAuth:
 
     async def __call__(
         self,
-        current_user: Optional[UserDB] = Depends(get_current_user)
-    ) -> Optional[UserDB]:
+        current_user: Optional[UserSnapshot] = Depends(get_current_user)
+    ) -> Optional[UserSnapshot]:
         return current_user
 
 
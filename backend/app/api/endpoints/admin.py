@@ -0,0 +1,133 @@
+# backend/app/api/endpoints/admin.py
+"""
+Admin runtime diagnostics: on-demand sampling profiler.
+
+Profiles cover the worker that serves the request; with several workers,
+repeat the call (or arm a request capture) until the right worker answers.
+"""
+import logging
+import os
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import require_admin
+from app.core.config import settings
+from app.core.profiler import (
+    ProfilerBusyError,
+    arm_request_capture,
+    cancel_request_capture,
+    get_request_capture,
+    profile_for,
+)
+from app.core.user_cache import UserSnapshot
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _ensure_enabled():
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler disabled")
+
+
+def _busy(exc: ProfilerBusyError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(5, gt=0, description="Sampling duration (capped by PROFILER_MAX_SECONDS)"),
+    interval_ms: Optional[int] = Query(None, ge=1, description="Sampling interval"),
+    format: Literal["collapsed", "json"] = "collapsed",
+    include_idle: bool = False,
+    top: int = Query(30, ge=1, le=200),
+    current_user: UserSnapshot = Depends(require_admin)
+):
+    """
+    Sample the worker's event loop for `seconds` (admin only).
+
+    `collapsed` returns one `frame;frame;frame count` line per stack, ready for
+    flamegraph.pl or speedscope; `json` adds the hottest functions and overhead.
+    """
+    _ensure_enabled()
+    logger.info(f"Admin {current_user.username} started a {seconds}s profile")
+
+    try:
+        profile = await profile_for(seconds, interval_ms=interval_ms, include_idle=include_idle)
+    except ProfilerBusyError as e:
+        raise _busy(e)
+
+    if format == "collapsed":
+        return PlainTextResponse(profile.to_collapsed(), headers={"X-Profile-Worker": str(os.getpid())})
+    return {"worker_pid": os.getpid(), **profile.to_dict(top)}
+
+
+@router.post("/profile/requests", status_code=status.HTTP_202_ACCEPTED)
+async def arm_request_profile(
+    route: str = Query(..., description="Path template, e.g. /api/tickets/{ticket_id} or /api/chat/*"),
+    count: int = Query(10, ge=1, description="Requests to profile (capped by PROFILER_MAX_REQUESTS)"),
+    method: Optional[str] = None,
+    timeout: Optional[int] = Query(None, ge=1, description="Seconds before the capture expires"),
+    interval_ms: Optional[int] = Query(None, ge=1),
+    current_user: UserSnapshot = Depends(require_admin)
+):
+    """
+    Profile the next `count` requests matching `route` in this worker (admin only).
+    Fetch the result with GET /profile/requests.
+    """
+    _ensure_enabled()
+
+    try:
+        capture = arm_request_capture(route, count, method=method, timeout=timeout, interval_ms=interval_ms)
+    except ProfilerBusyError as e:
+        raise _busy(e)
+
+    logger.info(f"Admin {current_user.username} armed a profile of {capture.count} requests on {route}")
+    return {
+        "worker_pid": os.getpid(),
+        "route": capture.route,
+        "method": capture.method,
+        "requested": capture.count,
+        "timeout_s": capture.timeout,
+        "status": capture.status
+    }
+
+
+@router.get("/profile/requests")
+async def get_request_profile(
+    format: Literal["collapsed", "json"] = "json",
+    top: int = Query(30, ge=1, le=200),
+    current_user: UserSnapshot = Depends(require_admin)
+):
+    """
+    Status and profile of the last request capture of this worker (admin only).
+    """
+    _ensure_enabled()
+
+    capture = get_request_capture()
+    if capture is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No request capture in this worker")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            capture.profile.to_collapsed(),
+            headers={"X-Profile-Worker": str(os.getpid()), "X-Profile-Status": capture.status}
+        )
+    return {"worker_pid": os.getpid(), **capture.to_dict(top)}
+
+
+@router.delete("/profile/requests")
+async def cancel_request_profile(
+    current_user: UserSnapshot = Depends(require_admin)
+):
+    """
+    Stop the running request capture of this worker (admin only).
+    """
+    _ensure_enabled()
+
+    capture = cancel_request_capture()
+    if capture is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No request capture in this worker")
+    return {"worker_pid": os.getpid(), "status": capture.status, "completed": capture.completed}
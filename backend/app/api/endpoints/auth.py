@@ -23,9 +23,12 @@ from app.core.security import (
     Token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     generate_api_key,
+    get_api_key_prefix,
     hash_api_key,
     blacklist_token
 )
+from app.core.api_key_auth import invalidate_api_key
+from app.core.user_cache import UserSnapshot, invalidate_user
 from app.models.user import (
     UserDB,
     UserCreate,
@@ -39,7 +42,7 @@ from app.models.user import (
     APIKeyCreate,
     APIKeyResponse
 )
-from app.api.deps import get_current_active_user, require_admin
+from app.api.deps import get_current_active_user, get_current_active_user_db, require_admin
 from app.core.rate_limit import limiter, RateLimits
 
 logger = logging.getLogger(__name__)
@@ -163,6 +166,7 @@ async def login(
         if user.failed_login_attempts >= MAX_LOGIN_ATTEMPTS:
             user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
             await db.commit()
+            await invalidate_user(user.id)
             logger.warning(f"Account locked due to failed attempts: {user.username}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -185,10 +189,13 @@ async def login(
         )
 
     # Reset failed attempts and update last login
+    was_locked = user.locked_until is not None
     user.failed_login_attempts = 0
     user.locked_until = None
     user.last_login = datetime.utcnow()
     await db.commit()
+    if was_locked:
+        await invalidate_user(user.id)
 
     # Generate tokens
     access_token = create_access_token(
@@ -264,7 +271,7 @@ async def refresh_token(
 
 @router.post("/logout", response_model=MessageResponse)
 async def logout(
-    current_user: UserDB = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     token: Optional[str] = Depends(oauth2_scheme)
 ):
     """
@@ -288,7 +295,7 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: UserDB = Depends(get_current_active_user)
+    current_user: UserDB = Depends(get_current_active_user_db)
 ):
     """
     Get current authenticated user information.
@@ -299,7 +306,7 @@ async def get_current_user_info(
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_data: UserUpdate,
-    current_user: UserDB = Depends(get_current_active_user),
+    current_user: UserDB = Depends(get_current_active_user_db),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -327,6 +334,7 @@ async def update_current_user(
     current_user.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(current_user)
+    await invalidate_user(current_user.id)
 
     logger.info(f"User updated profile: {current_user.username}")
 
@@ -338,7 +346,7 @@ async def update_current_user(
 async def change_password(
     request: Request,
     password_data: PasswordChange,
-    current_user: UserDB = Depends(get_current_active_user),
+    current_user: UserDB = Depends(get_current_active_user_db),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -356,6 +364,7 @@ async def change_password(
     current_user.hashed_password = get_password_hash(password_data.new_password)
     current_user.updated_at = datetime.utcnow()
     await db.commit()
+    await invalidate_user(current_user.id)
 
     logger.info(f"User changed password: {current_user.username}")
 
@@ -369,7 +378,7 @@ async def change_password(
 async def create_api_key(
     request: Request,
     key_data: APIKeyCreate,
-    current_user: UserDB = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -380,11 +389,13 @@ async def create_api_key(
     # Generate API key
     api_key = generate_api_key()
     key_hash = hash_api_key(api_key)
+    key_prefix = get_api_key_prefix(api_key)
 
     # Create record
     api_key_record = APIKeyDB(
         id=str(uuid.uuid4()),
         name=key_data.name,
+        key_prefix=key_prefix,
         key_hash=key_hash,
         user_id=current_user.id,
         scopes=",".join(key_data.scopes),
@@ -411,7 +422,7 @@ async def create_api_key(
 async def revoke_api_key(
     request: Request,
     key_id: str,
-    current_user: UserDB = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -434,6 +445,7 @@ async def revoke_api_key(
 
     api_key.is_active = 0
     await db.commit()
+    invalidate_api_key(api_key.id)
 
     logger.info(f"API key revoked: {api_key.name}")
 
@@ -446,7 +458,7 @@ async def revoke_api_key(
 async def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: UserDB = Depends(require_admin),
+    current_user: UserSnapshot = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -461,7 +473,7 @@ async def list_users(
 async def update_user_status(
     user_id: str,
     new_status: UserStatus,
-    current_user: UserDB = Depends(require_admin),
+    current_user: UserSnapshot = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -479,6 +491,7 @@ async def update_user_status(
     user.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(user)
+    await invalidate_user(user.id)
 
     logger.info(f"Admin {current_user.username} changed user {user.username} status to {new_status.value}")
 
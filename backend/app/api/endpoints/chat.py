@@ -15,7 +15,7 @@ from app.services.chatbot import MeubledeFranceChatbot
 from app.core.config import settings
 from app.core.rate_limit import limiter, RateLimits
 from app.api.deps import get_current_user, OptionalAuth
-from app.models.user import UserDB
+from app.core.user_cache import UserSnapshot
 from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -164,7 +164,7 @@ def extract_order_number(message: str) -> Optional[str]:
 async def chat(
     request: Request,
     chat_request: ChatRequest,
-    current_user: Optional[UserDB] = Depends(OptionalAuth()),
+    current_user: Optional[UserSnapshot] = Depends(OptionalAuth()),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -269,7 +269,7 @@ async def chat(
 async def clear_session(
     request: Request,
     session_id: str,
-    current_user: Optional[UserDB] = Depends(OptionalAuth())
+    current_user: Optional[UserSnapshot] = Depends(OptionalAuth())
 ):
     """
     Clear a chat session.
@@ -322,7 +322,7 @@ async def validate_ticket(
     request: Request,
     ticket_id: str,
     language: str = "fr",
-    current_user: Optional[UserDB] = Depends(OptionalAuth()),
+    current_user: Optional[UserSnapshot] = Depends(OptionalAuth()),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -414,7 +414,7 @@ async def cancel_ticket(
     request: Request,
     ticket_id: str,
     language: str = "fr",
-    current_user: Optional[UserDB] = Depends(OptionalAuth())
+    current_user: Optional[UserSnapshot] = Depends(OptionalAuth())
 ):
     """
     Cancel a ticket that is pending validation.
@@ -3,18 +3,28 @@
 Endpoints API pour le système SAV automatisé
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
+import csv
+import hashlib
+import io
+import json
 
 from app.services.sav_workflow_engine import sav_workflow_engine, SAVTicket
 from app.services.evidence_collector import evidence_collector, EvidenceType
 from app.services.warranty_service import warranty_service
 from app.models.warranty import Warranty, WarrantyType
 from app.db.session import get_db
-from app.repositories.ticket_repository import ticket_repository
+from app.repositories.ticket_repository import ticket_repository, DOSSIER_CACHE_PREFIX
+from app.core.cache_decorators import get_cached, set_cached
+from app.core.config import settings
+from app.services.bulk_claim_ingestion import BulkClaimIngestor, DEFAULT_BATCH_SIZE
+from app.api.deps import require_agent
+from app.core.rate_limit import limiter, RateLimits
+from app.core.user_cache import UserSnapshot
 
 import logging
 
@@ -395,108 +405,118 @@ async def get_all_tickets(request: Request, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
 
-@router.get("/ticket/{ticket_id}/dossier")
-async def generate_client_dossier(ticket_id: str, db: AsyncSession = Depends(get_db)):
+@router.post("/bulk-claims")
+@limiter.limit(RateLimits.UPLOAD_BULK)
+async def bulk_create_claims(
+    request: Request,
+    file: UploadFile = File(...),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=1000),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(require_agent)
+):
     """
-    NOUVEAU: Génère le dossier client complet au format structuré (depuis la base de données)
+    Import en masse de réclamations depuis un fichier CSV (agents/admins)
+
+    Colonnes obligatoires: customer_id, order_number, product_sku, product_name,
+    problem_description, purchase_date, delivery_date. Colonnes optionnelles:
+    customer_tier, product_value, customer_name, source.
+
+    La taille de requête reste limitée par MAX_REQUEST_SIZE; pour les gros
+    fichiers, utiliser le script ingest_claims.py.
 
     Returns:
-        Dossier client avec toutes les informations de la réclamation
+        Rapport d'import (lignes insérées, erreurs par ligne, débit)
     """
 
+    if getattr(request.app.state, "db_available", False) is False:
+        raise HTTPException(status_code=503, detail="Database temporarily unavailable. Please try again later.")
+
+    ingestor = BulkClaimIngestor(batch_size=batch_size, dry_run=dry_run)
+
     try:
-        logger.info(f"Génération du dossier client pour: {ticket_id}")
+        # UploadFile.read() lit le fichier temporaire (sur disque au-delà du spool) dans un thread:
+        # le CSV est ensuite parcouru en mémoire sans E/S bloquante dans la boucle d'événements
+        content = await file.read()
+        report = await ingestor.ingest_csv(db, io.StringIO(content.decode("utf-8-sig"), newline=""))
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Fichier CSV invalide: {str(e)}")
+    except Exception as e:
+        logger.error(f"Erreur import en masse: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'import: {str(e)}")
 
-        # Récupérer depuis la base de données
-        db_ticket = await ticket_repository.get_by_id(db, ticket_id)
+    logger.info(
+        f"Import en masse par {current_user.email}: "
+        f"{report.inserted}/{report.total_rows} tickets"
+    )
 
-        if not db_ticket:
-            raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} non trouvé")
+    return {
+        "success": True,
+        "report": report.to_dict()
+    }
 
-        # Générer le dossier client complet depuis les données de la base
-        dossier = {
-            # INFORMATIONS TICKET
-            "ticket": {
-                "ticket_id": db_ticket.ticket_id,
-                "created_at": db_ticket.created_at.isoformat() if db_ticket.created_at else None,
-                "updated_at": db_ticket.updated_at.isoformat() if db_ticket.updated_at else None,
-                "status": db_ticket.status,
-                "priority": db_ticket.priority,
-                "priority_score": db_ticket.priority_score,
-                "priority_factors": db_ticket.priority_factors,
-                "source": db_ticket.source or "chat"
-            },
 
-            # INFORMATIONS CLIENT
-            "client": {
-                "customer_id": db_ticket.customer_id,
-                "customer_name": db_ticket.customer_name or 'Client',
-                "order_number": db_ticket.order_number
-            },
+@router.get("/ticket/{ticket_id}/dossier")
+async def generate_client_dossier(ticket_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    NOUVEAU: Génère le dossier client complet au format structuré (depuis la base de données)
 
-            # INFORMATIONS PRODUIT
-            "produit": {
-                "product_sku": db_ticket.product_sku,
-                "product_name": db_ticket.product_name
-            },
+    Le dossier sérialisé est mis en cache par (ticket_id, updated_at): seule la
+    date de mise à jour est lue en base tant que le ticket ne change pas.
+    La réponse porte un ETag et If-None-Match est servi en 304.
 
-            # PROBLÈME
-            "probleme": {
-                "description": db_ticket.problem_description,
-                "category": db_ticket.problem_category,
-                "severity": db_ticket.problem_severity,
-                "confidence": db_ticket.problem_confidence
-            },
+    Returns:
+        Dossier client avec toutes les informations de la réclamation
+    """
 
-            # ANALYSE TON
-            "analyse_ton": {
-                "tone": db_ticket.tone_category,
-                "emotion_score": db_ticket.tone_score,
-                "detected_keywords": db_ticket.tone_keywords or []
-            },
+    try:
+        # Version courante du ticket (requête légère sur la clé primaire)
+        version = await ticket_repository.get_version(db, ticket_id)
 
-            # GARANTIE
-            "garantie": {
-                "warranty_id": db_ticket.warranty_id,
-                "warranty_status": db_ticket.warranty_status
-            },
+        if version is None:
+            raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} non trouvé")
 
-            # PREUVES
-            "preuves": db_ticket.evidence or [],
+        etag = _dossier_etag(ticket_id, version)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-            # PIÈCES JOINTES
-            "attachments": db_ticket.attachments or [],
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
 
-            # SLA
-            "sla": {
-                "response_deadline": db_ticket.sla_response_deadline.isoformat() if db_ticket.sla_response_deadline else None,
-                "intervention_deadline": db_ticket.sla_intervention_deadline.isoformat() if db_ticket.sla_intervention_deadline else None
-            },
+        cached = await get_cached(DOSSIER_CACHE_PREFIX, ticket_id)
+        if isinstance(cached, dict) and cached.get("version") == version:
+            logger.debug(f"Dossier servi depuis le cache: {ticket_id}")
+            return Response(content=cached["body"], media_type="application/json", headers=headers)
 
-            # RÉSOLUTION
-            "resolution": {
-                "auto_resolved": db_ticket.auto_resolved,
-                "resolution_type": db_ticket.resolution_type,
-                "resolution_description": db_ticket.resolution_description,
-                "resolved_at": db_ticket.resolved_at.isoformat() if db_ticket.resolved_at else None
-            },
+        logger.info(f"Génération du dossier client pour: {ticket_id}")
 
-            # RÉCAPITULATIF CLIENT
-            "recapitulatif": db_ticket.client_summary or {},
+        # Récupérer depuis la base de données
+        db_ticket = await ticket_repository.get_by_id(db, ticket_id)
 
-            # HISTORIQUE
-            "historique": db_ticket.actions or [],
+        if not db_ticket:
+            raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} non trouvé")
 
-            # NOTES
-            "notes": db_ticket.notes or []
-        }
+        body = json.dumps(
+            {"success": True, "dossier": _build_client_dossier(db_ticket)},
+            default=str
+        )
+
+        # Le ticket a pu changer entre les deux lectures: ne cacher que la version lue
+        current_version = db_ticket.updated_at.isoformat() if db_ticket.updated_at else ""
+        if current_version != version:
+            version = current_version
+            etag = _dossier_etag(ticket_id, version)
+            headers["ETag"] = etag
+
+        await set_cached(
+            DOSSIER_CACHE_PREFIX,
+            ticket_id,
+            {"version": version, "body": body},
+            ttl=settings.DOSSIER_CACHE_TTL
+        )
 
         logger.info(f"Dossier généré depuis la base de données: {ticket_id}")
 
-        return {
-            "success": True,
-            "dossier": dossier
-        }
+        return Response(content=body, media_type="application/json", headers=headers)
 
     except HTTPException:
         raise
@@ -507,6 +527,100 @@ async def generate_client_dossier(ticket_id: str, db: AsyncSession = Depends(get
 
 # ============ FONCTIONS UTILITAIRES ============
 
+def _dossier_etag(ticket_id: str, version: str) -> str:
+    """ETag d'un dossier, dérivé de (ticket_id, updated_at)"""
+    digest = hashlib.sha1(f"{ticket_id}:{version}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vérifie un en-tête If-None-Match (liste, W/ et * acceptés)"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _build_client_dossier(db_ticket) -> dict:
+    """Construit le dossier client structuré depuis une ligne TicketDB"""
+    return {
+        # INFORMATIONS TICKET
+        "ticket": {
+            "ticket_id": db_ticket.ticket_id,
+            "created_at": db_ticket.created_at.isoformat() if db_ticket.created_at else None,
+            "updated_at": db_ticket.updated_at.isoformat() if db_ticket.updated_at else None,
+            "status": db_ticket.status,
+            "priority": db_ticket.priority,
+            "priority_score": db_ticket.priority_score,
+            "priority_factors": db_ticket.priority_factors,
+            "source": db_ticket.source or "chat"
+        },
+
+        # INFORMATIONS CLIENT
+        "client": {
+            "customer_id": db_ticket.customer_id,
+            "customer_name": db_ticket.customer_name or 'Client',
+            "order_number": db_ticket.order_number
+        },
+
+        # INFORMATIONS PRODUIT
+        "produit": {
+            "product_sku": db_ticket.product_sku,
+            "product_name": db_ticket.product_name
+        },
+
+        # PROBLÈME
+        "probleme": {
+            "description": db_ticket.problem_description,
+            "category": db_ticket.problem_category,
+            "severity": db_ticket.problem_severity,
+            "confidence": db_ticket.problem_confidence
+        },
+
+        # ANALYSE TON
+        "analyse_ton": {
+            "tone": db_ticket.tone_category,
+            "emotion_score": db_ticket.tone_score,
+            "detected_keywords": db_ticket.tone_keywords or []
+        },
+
+        # GARANTIE
+        "garantie": {
+            "warranty_id": db_ticket.warranty_id,
+            "warranty_status": db_ticket.warranty_status
+        },
+
+        # PREUVES
+        "preuves": db_ticket.evidence or [],
+
+        # PIÈCES JOINTES
+        "attachments": db_ticket.attachments or [],
+
+        # SLA
+        "sla": {
+            "response_deadline": db_ticket.sla_response_deadline.isoformat() if db_ticket.sla_response_deadline else None,
+            "intervention_deadline": db_ticket.sla_intervention_deadline.isoformat() if db_ticket.sla_intervention_deadline else None
+        },
+
+        # RÉSOLUTION
+        "resolution": {
+            "auto_resolved": db_ticket.auto_resolved,
+            "resolution_type": db_ticket.resolution_type,
+            "resolution_description": db_ticket.resolution_description,
+            "resolved_at": db_ticket.resolved_at.isoformat() if db_ticket.resolved_at else None
+        },
+
+        # RÉCAPITULATIF CLIENT
+        "recapitulatif": db_ticket.client_summary or {},
+
+        # HISTORIQUE
+        "historique": db_ticket.actions or [],
+
+        # NOTES
+        "notes": db_ticket.notes or []
+    }
+
+
 def _generate_next_steps(ticket: SAVTicket) -> List[str]:
     """Génère les prochaines étapes selon l'état du ticket"""
 
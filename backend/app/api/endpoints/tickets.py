@@ -1,12 +1,41 @@
 # backend/app/api/endpoints/tickets.py
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Request, Query, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator, Dict
+from datetime import datetime, date, timezone
+import asyncio
+import csv
+import io
+import json
 import logging
 
+from app.api.deps import require_agent
+from app.core.pubsub import get_pubsub
+from app.core.rate_limit import limiter, RateLimits
+from app.db.session import AsyncSessionLocal
+from app.models.ticket import TicketDB
+from app.core.user_cache import UserSnapshot
+from app.repositories.ticket_repository import ticket_repository
+from app.services.ticket_events import TICKET_EVENTS_CHANNEL
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Export configuration
+EXPORT_COLUMNS = [column.name for column in TicketDB.__table__.columns]
+DEFAULT_EXPORT_COLUMNS = [
+    "ticket_id", "created_at", "status", "priority", "priority_score",
+    "customer_id", "order_number", "product_sku", "product_name",
+    "problem_category", "problem_severity", "warranty_status",
+    "auto_resolved", "resolution_type", "resolved_at", "source"
+]
+EXPORT_BATCH_SIZE = 500  # Rows fetched per cursor round trip
+EXPORT_CHUNK_ROWS = 100  # Rows encoded per chunk sent to the client
+
+# Keep-alive interval of the live ticket feeds (proxies / load balancers)
+TICKET_STREAM_KEEPALIVE_SECONDS = 15
+
 # Mock tickets storage (in production, use database)
 mock_tickets = []
 
@@ -53,6 +82,215 @@ async def list_tickets(limit: int = 10):
         "total": len(mock_tickets)
     }
 
+def _export_value(value):
+    """Convert a column value to something JSON/CSV friendly"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(row: Dict) -> str:
+    """Encode one export row as a NDJSON line"""
+    return json.dumps({k: _export_value(v) for k, v in row.items()}, ensure_ascii=False, default=str) + "\n"
+
+
+def _encode_csv(row: Dict, columns: List[str]) -> str:
+    """Encode one export row as a CSV line (JSON columns are serialized)"""
+    buffer = io.StringIO()
+    values = []
+    for column in columns:
+        value = _export_value(row.get(column))
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        values.append("" if value is None else value)
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def _parse_export_date(value: Optional[str], field: str) -> Optional[datetime]:
+    """Parse an ISO date or datetime query parameter (offsets are converted to naive UTC)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format de date invalide pour {field}: {value} (ISO 8601 attendu)"
+        )
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+async def _stream_export(
+    export_format: str,
+    columns: List[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    statuses: Optional[List[str]]
+) -> AsyncIterator[str]:
+    """
+    Encode tickets chunk by chunk while reading them from a server-side cursor.
+    Uses its own session so the connection lives as long as the response stream.
+    """
+    exported = 0
+    chunk: List[str] = []
+
+    if export_format == "csv":
+        chunk.append(_encode_csv({c: c for c in columns}, columns))
+
+    async with AsyncSessionLocal() as db:
+        async for row in ticket_repository.stream_for_export(
+            db,
+            columns=columns,
+            created_from=created_from,
+            created_to=created_to,
+            statuses=statuses,
+            batch_size=EXPORT_BATCH_SIZE
+        ):
+            if export_format == "csv":
+                chunk.append(_encode_csv(row, columns))
+            else:
+                chunk.append(_encode_ndjson(row))
+            exported += 1
+
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield "".join(chunk)
+                chunk = []
+
+    if chunk:
+        yield "".join(chunk)
+
+    logger.info(f"Ticket export completed: {exported} rows ({export_format})")
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+@limiter.limit(RateLimits.ADMIN_READ)
+async def export_tickets(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated list of columns"),
+    created_from: Optional[str] = Query(None, description="ISO date/datetime (inclusive)"),
+    created_to: Optional[str] = Query(None, description="ISO date/datetime (exclusive)"),
+    status_filter: Optional[List[str]] = Query(None, alias="status"),
+    current_user: UserSnapshot = Depends(require_agent)
+):
+    """
+    Stream every ticket matching the filters as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory usage does not depend on the size of the export.
+    """
+    if getattr(request.app.state, "db_available", False) is False:
+        raise HTTPException(status_code=503, detail="Database temporarily unavailable. Please try again later.")
+
+    if columns:
+        selected_columns = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in selected_columns if c not in EXPORT_COLUMNS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Colonnes inconnues: {', '.join(unknown)}"
+            )
+    else:
+        selected_columns = DEFAULT_EXPORT_COLUMNS
+
+    start = _parse_export_date(created_from, "created_from")
+    end = _parse_export_date(created_to, "created_to")
+
+    logger.info(
+        f"Ticket export requested by {current_user.username}: format={export_format}, "
+        f"columns={len(selected_columns)}, from={start}, to={end}, status={status_filter}"
+    )
+
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    filename = f"tickets_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+
+    return StreamingResponse(
+        _stream_export(export_format, selected_columns, start, end, status_filter),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# Live feeds are declared before /{ticket_id}, which would otherwise match them
+@router.websocket("/ws")
+async def tickets_websocket(websocket: WebSocket):
+    """
+    Live ticket changes for the dashboard (WebSocket).
+
+    Each message is a JSON delta: {"type": "ticket.created", "ticket_id": ..., "status": ...}.
+    The dashboard loads /api/sav/tickets once, then applies the deltas.
+    """
+    broker = get_pubsub()
+    await websocket.accept()
+
+    if broker is None:
+        await websocket.send_json({"type": "error", "error": "Flux temps réel indisponible"})
+        await websocket.close(code=1011)
+        return
+
+    subscription = await broker.subscribe(TICKET_EVENTS_CHANNEL)
+    logger.info("Dashboard connected to the ticket feed (WebSocket)")
+
+    async def forward_events():
+        while True:
+            event = await subscription.get(timeout=TICKET_STREAM_KEEPALIVE_SECONDS)
+            await websocket.send_json(event if event is not None else {"type": "ping"})
+
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward_events()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await subscription.close()
+        logger.info("Dashboard disconnected from the ticket feed (WebSocket)")
+
+
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def tickets_event_stream(request: Request):
+    """
+    Live ticket changes for the dashboard (Server-Sent Events).
+
+    Same content as /ws, for clients using EventSource.
+    """
+    broker = get_pubsub()
+    if broker is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Flux temps réel indisponible")
+
+    subscription = await broker.subscribe(TICKET_EVENTS_CHANNEL)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.get(timeout=TICKET_STREAM_KEEPALIVE_SECONDS)
+                if event is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            await subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{ticket_id}", status_code=status.HTTP_200_OK)
 async def get_ticket(ticket_id: str):
     """Get ticket details"""
@@ -14,7 +14,7 @@ from app.core.rate_limit import limiter, RateLimits
 from app.services.cloudinary_storage import CloudinaryService
 from app.services.storage import get_storage
 from app.api.deps import optional_auth
-from app.models.user import UserDB
+from app.core.user_cache import UserSnapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -32,7 +32,7 @@ def is_allowed_file(filename: str) -> bool:
 async def upload_files(
     request: Request,
     files: List[UploadFile] = File(...),
-    current_user: UserDB = Depends(optional_auth)
+    current_user: UserSnapshot = Depends(optional_auth)
 ):
     """
     Upload photos or videos with rate limiting and security controls.
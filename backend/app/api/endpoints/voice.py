@@ -18,6 +18,8 @@ import httpx
 from app.core.config import settings
 from app.core.chatbot_config import config as chatbot_config
 from app.core.circuit_breaker import CircuitBreakerManager, CircuitBreakerError
+from app.core.timing import span
+from app.core.metrics import track_openai
 from app.services.sav_workflow_engine import sav_workflow_engine
 from app.services.warranty_service import warranty_service
 from app.models.warranty import WarrantyType
@@ -218,7 +220,7 @@ async def transcribe_audio(
             # Get circuit breaker for OpenAI Whisper
             whisper_breaker = CircuitBreakerManager.get_breaker(
                 name="openai-whisper",
-                failure_threshold=5,
+                minimum_calls=5,
                 recovery_timeout=60,
                 timeout=30
             )
@@ -233,7 +235,8 @@ async def transcribe_audio(
                     )
 
             try:
-                transcript = await whisper_breaker.call(call_whisper)
+                with span("voice.whisper"), track_openai("transcription"):
+                    transcript = await whisper_breaker.call(call_whisper)
                 logger.info(f"✅ Transcription: {transcript.text}")
 
                 return VoiceTranscriptionResponse(
@@ -408,7 +411,7 @@ Après avoir demandé "Puis-je faire autre chose pour vous ?", ÉCOUTER:
         # Get circuit breaker for OpenAI chat
         gpt_breaker = CircuitBreakerManager.get_breaker(
             name="openai-chat",
-            failure_threshold=5,
+            minimum_calls=5,
             recovery_timeout=60,
             timeout=30
         )
@@ -424,7 +427,9 @@ Après avoir demandé "Puis-je faire autre chose pour vous ?", ÉCOUTER:
             )
 
         try:
-            completion = await gpt_breaker.call(call_gpt)
+            with span("voice.openai"), track_openai("voice_chat") as openai_call:
+                completion = await gpt_breaker.call(call_gpt)
+                openai_call.record_usage(completion)
             response_text = completion.choices[0].message.content
             logger.info(f"✅ Réponse: {response_text}")
 
@@ -437,10 +442,11 @@ Après avoir demandé "Puis-je faire autre chose pour vous ?", ÉCOUTER:
 
         # Analyze emotion from the user's message
         emotion_detector = get_voice_emotion_detector()
-        emotion_analysis = await emotion_detector.analyze_emotion(
-            transcript=request.message,
-            conversation_history=request.conversation_history
-        )
+        with span("voice.emotion"):
+            emotion_analysis = await emotion_detector.analyze_emotion(
+                transcript=request.message,
+                conversation_history=request.conversation_history
+            )
         logger.info(f"Emotion analysis: {emotion_analysis['emotion']} (confidence: {emotion_analysis['confidence']:.2f})")
 
         # Détecter l'action et extraire les données du ticket
@@ -497,7 +503,7 @@ async def text_to_speech(
         # Générer l'audio avec TTS with circuit breaker protection
         tts_breaker = CircuitBreakerManager.get_breaker(
             name="openai-tts",
-            failure_threshold=5,
+            minimum_calls=5,
             recovery_timeout=60,
             timeout=30
         )
@@ -512,7 +518,8 @@ async def text_to_speech(
             )
 
         try:
-            response = await tts_breaker.call(call_tts)
+            with span("voice.tts"), track_openai("speech"):
+                response = await tts_breaker.call(call_tts)
             logger.info("✅ Audio généré")
 
             # Streamer l'audio directement
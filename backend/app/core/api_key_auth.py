@@ -0,0 +1,235 @@
+# backend/app/core/api_key_auth.py
+"""
+API key authentication.
+
+- Keys carry a public lookup prefix (see security.generate_api_key), so a
+  request costs one indexed fetch and one constant-time digest comparison
+  instead of verifying the key against every active row.
+- Successful verifications are cached in-process for a short TTL.
+- api_keys.last_used is recorded in memory and flushed periodically in a
+  single batched UPDATE instead of a commit per request.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import api_key_digest, get_api_key_prefix, verify_api_key
+from app.models.user import APIKeyDB
+
+logger = logging.getLogger(__name__)
+
+
+class APIKeyVerificationCache:
+    """
+    Short-TTL cache of successful API key verifications.
+
+    Entries are keyed by the SHA-256 digest of the presented key (the raw key
+    is never kept) and map to (api_key_id, user_id). Only positive results are
+    cached, so a revoked key stays usable for at most `ttl` seconds on other
+    workers; revocations on this worker are applied immediately.
+    """
+
+    def __init__(self, ttl: int = 30, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, api_key: str) -> Optional[Tuple[str, str]]:
+        """Return (api_key_id, user_id) for a recently verified key"""
+        if self.ttl <= 0:
+            return None
+        digest = api_key_digest(api_key)
+        entry = self._entries.get(digest)
+        if entry is None or entry[2] < time.monotonic():
+            if entry is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, api_key: str, api_key_id: str, user_id: str) -> None:
+        """Remember a successful verification"""
+        if self.ttl <= 0:
+            return
+        digest = api_key_digest(api_key)
+        self._entries[digest] = (api_key_id, user_id, time.monotonic() + self.ttl)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_key(self, api_key_id: str) -> None:
+        """Drop cached verifications of a (revoked) key"""
+        for digest in [d for d, entry in self._entries.items() if entry[0] == api_key_id]:
+            del self._entries[digest]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl
+        }
+
+
+class APIKeyUsageTracker:
+    """
+    Batches api_keys.last_used updates.
+
+    `touch` only records the timestamp in memory; `flush` writes all pending
+    timestamps in one transaction. A background task flushes every
+    `flush_interval` seconds and once more on shutdown.
+    """
+
+    def __init__(self, flush_interval: int = 60):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+
+    def touch(self, api_key_id: str, when: Optional[datetime] = None) -> None:
+        """Record that a key was used"""
+        self._pending[api_key_id] = when or datetime.utcnow()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def flush(self, session_factory=None) -> int:
+        """
+        Write pending last_used timestamps.
+
+        Returns:
+            Number of keys updated
+        """
+        if not self._pending:
+            return 0
+
+        if session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+
+        pending, self._pending = self._pending, {}
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    update(APIKeyDB),
+                    [{"id": key_id, "last_used": used_at} for key_id, used_at in pending.items()]
+                )
+                await db.commit()
+        except Exception as e:
+            # Keep the timestamps for the next attempt (newer touches win)
+            for key_id, used_at in pending.items():
+                self._pending.setdefault(key_id, used_at)
+            logger.warning(f"Failed to flush API key usage ({len(pending)} keys): {e}")
+            return 0
+
+        self.flushed += len(pending)
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and write what is pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global instances
+_verification_cache: Optional[APIKeyVerificationCache] = None
+_usage_tracker: Optional[APIKeyUsageTracker] = None
+
+
+def get_verification_cache() -> APIKeyVerificationCache:
+    """Get or create the API key verification cache"""
+    global _verification_cache
+    if _verification_cache is None:
+        _verification_cache = APIKeyVerificationCache(
+            ttl=settings.API_KEY_CACHE_TTL,
+            max_entries=settings.API_KEY_CACHE_MAX_ENTRIES
+        )
+    return _verification_cache
+
+
+def get_usage_tracker() -> APIKeyUsageTracker:
+    """Get or create the API key usage tracker"""
+    global _usage_tracker
+    if _usage_tracker is None:
+        _usage_tracker = APIKeyUsageTracker(flush_interval=settings.API_KEY_LAST_USED_FLUSH_SECONDS)
+    return _usage_tracker
+
+
+async def _find_api_key(db: AsyncSession, api_key: str) -> Optional[APIKeyDB]:
+    prefix = get_api_key_prefix(api_key)
+    if prefix:
+        result = await db.execute(
+            select(APIKeyDB).where(APIKeyDB.key_prefix == prefix, APIKeyDB.is_active == 1)
+        )
+        record = result.scalar_one_or_none()
+        if record is None:
+            # Unknown prefix: never fall back to the bcrypt scan of legacy keys
+            return None
+        return record if verify_api_key(api_key, record.key_hash) else None
+
+    # Legacy keys issued before lookup prefixes
+    result = await db.execute(
+        select(APIKeyDB).where(APIKeyDB.key_prefix.is_(None), APIKeyDB.is_active == 1)
+    )
+    for record in result.scalars().all():
+        if verify_api_key(api_key, record.key_hash):
+            return record
+    return None
+
+
+async def authenticate_api_key(db: AsyncSession, api_key: str) -> Optional[str]:
+    """
+    Verify an API key.
+
+    Returns:
+        The owning user id, or None if the key is unknown or inactive
+    """
+    cache = get_verification_cache()
+    cached = cache.get(api_key)
+    if cached:
+        api_key_id, user_id = cached
+    else:
+        record = await _find_api_key(db, api_key)
+        if record is None:
+            return None
+        api_key_id, user_id = record.id, record.user_id
+        cache.put(api_key, api_key_id, user_id)
+
+    get_usage_tracker().touch(api_key_id)
+    return user_id
+
+
+def invalidate_api_key(api_key_id: str) -> None:
+    """Forget cached verifications of a revoked key"""
+    get_verification_cache().invalidate_key(api_key_id)
@@ -0,0 +1,61 @@
+# backend/app/core/bloom_filter.py
+"""
+Bloom filter for set-membership pre-checks.
+No false negatives; false positives at about `error_rate` once `capacity`
+items have been added. Items cannot be removed - rebuild to forget them.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Bit positions are derived from one 128-bit BLAKE2b digest with double
+    hashing (h1 + i * h2), so each add/lookup costs a single hash.
+    """
+
+    __slots__ = ("capacity", "error_rate", "size", "hash_count", "_bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize filter.
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false-positive rate at capacity (0 < e < 1)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def saturated(self) -> bool:
+        """True once more than `capacity` items were added (error rate no longer holds)"""
+        return self.count > self.capacity
@@ -1,16 +1,236 @@
 # backend/app/core/cache_decorators.py
 """
 Cache decorators for frequently accessed data
+
+@cached reads through the shared cache (L2: Redis, or the in-memory cache).
+With `local_ttl`, hot values are also kept in an in-process LRU (L1) for a
+few seconds, which skips the round trip and the JSON decoding. L1 copies
+are evicted on every worker by invalidate_cache / delete_cached through
+pub/sub.
 """
+import asyncio
+import fnmatch
 import functools
 import logging
 import json
 import hashlib
-from typing import Optional, Callable, Any
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Callable, Any, Awaitable, Dict, Iterable, Tuple
+from app.core import codec
+from app.core.config import settings
 from app.core.redis import get_cache
+from app.core.metrics import WORKER_ID, cache_requests, registry
+from app.core.pubsub import get_pubsub, Subscription
 
 logger = logging.getLogger(__name__)
 
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+# Marks values stored with their freshness (stale_ttl / early_expiration)
+ENVELOPE_KEY = "__cached__"
+# How often workers waiting on another worker's lock look for its result
+LOCK_POLL_INTERVAL = 0.05
+
+cache_loads = registry.counter(
+    "cache_loads", "@cached function calls by prefix and trigger (miss, early, refresh)", ("prefix", "trigger")
+)
+cache_coalesced = registry.counter(
+    "cache_coalesced", "@cached misses that waited for a load already in progress", ("prefix", "scope")
+)
+
+
+class LocalCache:
+    """
+    In-process TTL + LRU tier (L1) of one @cached prefix, keyed by full key.
+
+    Values are the decoded results shared by every caller: they must not be
+    mutated. `generation` increases on every invalidation; a value read
+    before an invalidation is not stored, so it cannot outlive it.
+    """
+
+    def __init__(self, prefix: str, max_entries: int = 1000):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Any, ttl: int, generation: Optional[int] = None) -> None:
+        """Store a value (skipped if an invalidation happened since `generation`)"""
+        if ttl <= 0 or (generation is not None and generation != self.generation):
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        self.generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+        for pattern in patterns:
+            for key in [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+class CachedEntry:
+    """
+    A value read from the shared cache. Decorators using stale_ttl or
+    early_expiration store it in an envelope with the time it stops being
+    fresh (epoch seconds) and how long the function took to compute it.
+    """
+
+    __slots__ = ("value", "fresh_until", "delta")
+
+    def __init__(self, value: Any, fresh_until: Optional[float] = None, delta: float = 0.0):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.delta = delta
+
+    def remaining(self) -> Optional[float]:
+        """Seconds of freshness left (None when not tracked)"""
+        return None if self.fresh_until is None else self.fresh_until - time.time()
+
+    @staticmethod
+    def wrap(data: Any, ttl: int, delta: float) -> dict:
+        return {ENVELOPE_KEY: [round(time.time() + ttl, 3), round(delta, 4)], "v": data}
+
+    @classmethod
+    def decode(cls, raw: str) -> "CachedEntry":
+        data = codec.loads(raw)
+        if isinstance(data, dict) and ENVELOPE_KEY in data and "v" in data:
+            fresh_until, delta = data[ENVELOPE_KEY]
+            return cls(data["v"], fresh_until, delta)
+        return cls(data)
+
+
+# Loads of @cached keys in progress in this worker (single flight)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _flight_done(key: str, task: asyncio.Future) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Retrieved, so a failure nobody awaited is not reported as lost
+
+
+async def _logged(key: str, coro: Awaitable) -> Any:
+    try:
+        return await coro
+    except Exception as e:
+        logger.error(f"Background refresh of {key} failed: {e}")
+
+
+# L1 tiers by prefix (created when a decorator opts in, so every worker has the same ones)
+_local_caches: Dict[str, LocalCache] = {}
+_listener: Optional[asyncio.Task] = None
+_subscription: Optional[Subscription] = None
+
+
+def _local_cache(prefix: str) -> Optional[LocalCache]:
+    if settings.CACHE_L1_MAX_ENTRIES <= 0:
+        return None
+    local = _local_caches.get(prefix)
+    if local is None:
+        local = _local_caches[prefix] = LocalCache(prefix, settings.CACHE_L1_MAX_ENTRIES)
+    return local
+
+
+async def _evict_local(prefix: str, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+    """Drop L1 copies of `keys` / `patterns` (full keys) on this worker and broadcast to the others"""
+    local = _local_caches.get(prefix)
+    if local is None:
+        return
+    keys, patterns = list(keys), list(patterns)
+    local.invalidate(keys, patterns)
+
+    broker = get_pubsub()
+    if broker is None:
+        return
+    try:
+        await broker.publish(CACHE_INVALIDATION_CHANNEL, {
+            "prefix": prefix, "keys": keys, "patterns": patterns, "worker": WORKER_ID
+        })
+    except Exception as e:
+        logger.warning(f"Failed to broadcast cache invalidation for {prefix}: {e}")
+
+
+async def _listen(subscription: Subscription) -> None:
+    dropped = subscription.dropped
+    async for message in subscription:
+        if subscription.dropped != dropped:
+            # Some invalidations were lost while the queue was full
+            dropped = subscription.dropped
+            for local in _local_caches.values():
+                local.clear()
+        if not isinstance(message, dict):
+            continue
+        if message.get("worker") == WORKER_ID:
+            continue  # Already applied before publishing
+        local = _local_caches.get(message.get("prefix"))
+        if local is not None:
+            local.invalidate(message.get("keys") or (), message.get("patterns") or ())
+
+
+async def start_cache_invalidation_listener() -> None:
+    """Apply L1 invalidations published by other workers (call at startup)"""
+    global _listener, _subscription
+    broker = get_pubsub()
+    if broker is None or _listener is not None:
+        return
+    _subscription = await broker.subscribe(CACHE_INVALIDATION_CHANNEL)
+    _listener = asyncio.create_task(_listen(_subscription))
+
+
+async def stop_cache_invalidation_listener() -> None:
+    """Stop the L1 invalidation listener (call at shutdown)"""
+    global _listener, _subscription
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+    if _subscription is not None:
+        await _subscription.close()
+        _subscription = None
+
+
+def get_cache_stats() -> dict:
+    """Lookups and hit ratio of each @cached prefix, per tier"""
+    stats: Dict[str, dict] = {}
+    for labels, count in cache_requests.snapshot()["samples"].items():
+        prefix, tier, result = json.loads(labels)
+        tier_stats = stats.setdefault(prefix, {}).setdefault(tier, {"hit": 0, "miss": 0, "error": 0})
+        tier_stats[result] = tier_stats.get(result, 0) + int(count)
+    for prefix, tiers in stats.items():
+        for tier_stats in tiers.values():
+            # Stale values served while refreshing count as hits
+            hits = tier_stats["hit"] + tier_stats.get("stale", 0)
+            lookups = hits + tier_stats["miss"]
+            tier_stats["hit_ratio"] = round(hits / lookups, 4) if lookups else None
+        local = _local_caches.get(prefix)
+        if local is not None and "l1" in tiers:
+            tiers["l1"]["entries"] = len(local._entries)
+    return stats
+
 
 def cache_key(*args, **kwargs) -> str:
     """
@@ -46,7 +266,12 @@ def cache_key(*args, **kwargs) -> str:
 def cached(
     prefix: str,
     ttl: int = 300,  # 5 minutes default
-    key_builder: Optional[Callable] = None
+    key_builder: Optional[Callable] = None,
+    local_ttl: Optional[int] = None,
+    single_flight: bool = True,
+    lock_timeout: int = 0,
+    stale_ttl: int = 0,
+    early_expiration: float = 0.0
 ):
     """
     Decorator to cache async function results.
@@ -55,39 +280,62 @@ def cached(
         prefix: Cache key prefix (e.g., "user", "ticket")
         ttl: Time-to-live in seconds
         key_builder: Optional custom key builder function
+        local_ttl: Also keep results in this worker's memory (L1) for this
+            many seconds. Use for hot, rarely changing values; callers share
+            the returned object and must not mutate it.
+        single_flight: Concurrent misses of a key in this worker wait for a
+            single call of the function
+        lock_timeout: Seconds of a shared lock taken on a miss, so only one
+            worker calls the function while the others wait for its result
+            (0 = no lock)
+        stale_ttl: Keep values this many seconds past `ttl` and serve them
+            while one background call refreshes them. The refresh reuses the
+            caller's arguments: only for functions that do not depend on
+            request-scoped objects (e.g. that open their own DB session).
+        early_expiration: Recompute a value before it expires with a
+            probability growing as expiry nears, weighted by how long the
+            function takes (XFetch beta; 1.0 is a good start, 0 = off)
 
     Usage:
         @cached(prefix="user", ttl=600)
         async def get_user_by_id(db: AsyncSession, user_id: str):
             ...
-    """
-    def decorator(func: Callable):
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Build cache key
-            if key_builder:
-                key_suffix = key_builder(*args, **kwargs)
-            else:
-                key_suffix = cache_key(*args[1:], **kwargs)  # Skip first arg (usually db session)
 
-            full_key = f"cache:{prefix}:{key_suffix}"
+        @cached(prefix="catalog", ttl=3600, local_ttl=10)
+        async def get_catalog_fragment(db: AsyncSession, category: str):
+            ...
+    """
+    local = _local_cache(prefix) if local_ttl else None
+    l1_ttl = min(local_ttl, ttl) if local_ttl else 0
+    # Freshness (and compute time) must be stored with the value for these modes
+    envelope = bool(stale_ttl or early_expiration)
 
-            # Try to get from cache
+    def decorator(func: Callable):
+        async def read(full_key: str, record: bool = True) -> Optional[CachedEntry]:
             try:
                 cache = get_cache()
                 cached_value = await cache.get(full_key)
 
                 if cached_value:
-                    logger.debug(f"Cache HIT: {full_key}")
                     try:
-                        return json.loads(cached_value)
-                    except json.JSONDecodeError:
+                        entry = CachedEntry.decode(cached_value)
+                        logger.debug(f"Cache HIT: {full_key}")
+                        return entry
+                    except codec.CodecError:
                         logger.warning(f"Failed to deserialize cached value for {full_key}")
+                if record:
+                    cache_requests.inc(prefix=prefix, tier="l2", result="miss")
             except Exception as e:
                 logger.error(f"Cache GET error: {e}")
+                if record:
+                    cache_requests.inc(prefix=prefix, tier="l2", result="error")
+            return None
 
+        async def load(full_key: str, trigger: str, generation: Optional[int], args, kwargs) -> Any:
             # Cache miss - call the function
-            logger.debug(f"Cache MISS: {full_key}")
+            logger.debug(f"Cache {trigger.upper()}: {full_key}")
+            cache_loads.inc(prefix=prefix, trigger=trigger)
+            start = time.perf_counter()
             result = await func(*args, **kwargs)
 
             # Store in cache
@@ -97,17 +345,117 @@ def cached(
                     # Serialize result
                     if hasattr(result, '__dict__'):
                         # SQLAlchemy model or dataclass
-                        cache_value = json.dumps(result.__dict__, default=str)
+                        data = result.__dict__
                     else:
-                        cache_value = json.dumps(result, default=str)
+                        data = result
+                    if envelope:
+                        data = CachedEntry.wrap(data, ttl, time.perf_counter() - start)
+                    cache_value = codec.dumps(data)
 
-                    await cache.set(full_key, cache_value, expire=ttl)
+                    await cache.set(full_key, cache_value, expire=ttl + stale_ttl)
                     logger.debug(f"Cached: {full_key} (TTL: {ttl}s)")
+                    if local is not None:
+                        # Same shape as an L2 hit would return
+                        local.put(full_key, CachedEntry.decode(cache_value).value, l1_ttl, generation)
                 except Exception as e:
                     logger.error(f"Cache SET error: {e}")
 
             return result
 
+        async def load_locked(full_key: str, trigger: str, generation: Optional[int], args, kwargs,
+                              current: Optional[CachedEntry] = None) -> Any:
+            if not lock_timeout:
+                return await load(full_key, trigger, generation, args, kwargs)
+
+            cache = get_cache()
+            lock_key = f"lock:{full_key}"
+            token = uuid.uuid4().hex
+            if await cache.setnx(lock_key, token, lock_timeout):
+                try:
+                    return await load(full_key, trigger, generation, args, kwargs)
+                finally:
+                    try:
+                        # Only our own lock: it may have expired and been taken by another worker
+                        await cache.delete_if_equals(lock_key, token)
+                    except Exception as e:
+                        logger.error(f"Cache unlock error: {e}")
+
+            # Another worker is computing it
+            cache_coalesced.inc(prefix=prefix, scope="lock")
+            if current is not None:
+                return current.value
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                entry = await read(full_key, record=False)
+                if entry is not None:
+                    return entry.value
+            return await load(full_key, trigger, generation, args, kwargs)
+
+        def in_flight(full_key: str, factory: Callable[[], Awaitable]) -> Tuple[asyncio.Future, bool]:
+            """The running load of `full_key`, started by `factory` if there is none"""
+            task = _inflight.get(full_key)
+            if task is not None:
+                return task, False
+            task = asyncio.ensure_future(factory())
+            _inflight[full_key] = task
+            task.add_done_callback(functools.partial(_flight_done, full_key))
+            return task, True
+
+        async def coalesce(full_key: str, factory: Callable[[], Awaitable]) -> Any:
+            if not single_flight:
+                return await factory()
+            task, started = in_flight(full_key, factory)
+            if not started:
+                cache_coalesced.inc(prefix=prefix, scope="process")
+            # A cancelled caller must not cancel the load the others wait for
+            return await asyncio.shield(task)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Build cache key
+            if key_builder:
+                key_suffix = key_builder(*args, **kwargs)
+            else:
+                key_suffix = cache_key(*args[1:], **kwargs)  # Skip first arg (usually db session)
+
+            full_key = f"cache:{prefix}:{key_suffix}"
+
+            generation = None
+            if local is not None:
+                value = local.get(full_key)
+                if value is not None:
+                    cache_requests.inc(prefix=prefix, tier="l1", result="hit")
+                    return value
+                cache_requests.inc(prefix=prefix, tier="l1", result="miss")
+                generation = local.generation
+
+            # Try to get from cache
+            entry = await read(full_key)
+            if entry is not None:
+                remaining = entry.remaining()
+                if remaining is not None and remaining <= 0:
+                    # Stale: serve it, refresh it once in the background
+                    cache_requests.inc(prefix=prefix, tier="l2", result="stale")
+                    in_flight(full_key, lambda: _logged(
+                        full_key, load_locked(full_key, "refresh", generation, args, kwargs, entry)
+                    ))
+                    return entry.value
+
+                cache_requests.inc(prefix=prefix, tier="l2", result="hit")
+                if early_expiration and remaining is not None and full_key not in _inflight and \
+                        entry.delta * early_expiration * -math.log(1.0 - random.random()) >= remaining:
+                    # Recompute ahead of expiry; the others keep getting the current value
+                    return await coalesce(full_key, lambda: load_locked(
+                        full_key, "early", generation, args, kwargs, entry
+                    ))
+
+                if local is not None:
+                    local.put(full_key, entry.value, l1_ttl, generation)
+                return entry.value
+
+            return await coalesce(full_key, lambda: load_locked(full_key, "miss", generation, args, kwargs))
+
         return wrapper
     return decorator
 
@@ -134,19 +482,24 @@ def invalidate_cache(prefix: str, *keys):
             # Invalidate cache entries
             try:
                 cache = get_cache()
+                stale = []
+                patterns = []
 
                 for pattern in keys:
                     # If pattern contains wildcard, get all matching keys
                     if '*' in pattern:
-                        matching_keys = await cache.keys(f"cache:{prefix}:{pattern}")
-                        for key in matching_keys:
-                            await cache.delete(key)
-                            logger.debug(f"Invalidated cache: {key}")
+                        patterns.append(f"cache:{prefix}:{pattern}")
+                        stale.extend(await cache.keys(patterns[-1]))
                     else:
                         # Direct key deletion
-                        full_key = f"cache:{prefix}:{pattern}"
-                        await cache.delete(full_key)
-                        logger.debug(f"Invalidated cache: {full_key}")
+                        stale.append(f"cache:{prefix}:{pattern}")
+
+                if stale:
+                    await cache.delete_many(stale)
+                    logger.debug(f"Invalidated cache: {', '.join(stale)}")
+
+                # L1 copies may outlive their shared entry: evict by pattern too
+                await _evict_local(prefix, stale, patterns)
 
             except Exception as e:
                 logger.error(f"Cache invalidation error: {e}")
@@ -177,8 +530,8 @@ async def get_cached(prefix: str, key: str) -> Optional[Any]:
 
         if value:
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                return CachedEntry.decode(value).value
+            except codec.CodecError:
                 return value
         return None
     except Exception as e:
@@ -204,11 +557,13 @@ async def set_cached(prefix: str, key: str, value: Any, ttl: int = 300) -> bool:
         full_key = f"cache:{prefix}:{key}"
 
         if hasattr(value, '__dict__'):
-            cache_value = json.dumps(value.__dict__, default=str)
+            cache_value = codec.dumps(value.__dict__)
         else:
-            cache_value = json.dumps(value, default=str)
+            cache_value = codec.dumps(value)
 
-        return await cache.set(full_key, cache_value, expire=ttl)
+        stored = await cache.set(full_key, cache_value, expire=ttl)
+        await _evict_local(prefix, [full_key])
+        return stored
     except Exception as e:
         logger.error(f"set_cached error: {e}")
         return False
@@ -228,7 +583,9 @@ async def delete_cached(prefix: str, key: str) -> bool:
     try:
         cache = get_cache()
         full_key = f"cache:{prefix}:{key}"
-        return await cache.delete(full_key)
+        deleted = await cache.delete(full_key)
+        await _evict_local(prefix, [full_key])
+        return deleted
     except Exception as e:
         logger.error(f"delete_cached error: {e}")
         return False
@@ -2,17 +2,30 @@
 """
 Circuit breaker pattern for external API calls.
 Prevents cascading failures and provides graceful degradation.
+
+Breakers trip on the failure rate over a sliding time window (once a
+minimum number of calls has been seen), let a bounded number of probe
+calls through when half-open, and can share open/closed transitions across
+workers through pub/sub so the whole fleet sheds load together.
 """
 import asyncio
 import functools
 import logging
 import time
 from enum import Enum
-from typing import Callable, Optional, Any, Dict
-from datetime import datetime, timedelta
+from typing import Callable, Optional, Any, Dict, List, Set
+from datetime import datetime
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+CIRCUIT_CHANNEL = "circuit:breakers"
+CIRCUIT_KEY_PREFIX = "circuit:state:"
+
+# Buckets per sliding window
+WINDOW_BUCKETS = 10
+
 
 class CircuitState(Enum):
     """Circuit breaker states"""
@@ -26,140 +39,222 @@ class CircuitBreakerError(Exception):
     pass
 
 
+class SlidingWindow:
+    """
+    Call and failure counts over the last `window_seconds`,
+    kept in WINDOW_BUCKETS time buckets (ring buffer).
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = WINDOW_BUCKETS):
+        self.bucket_width = window_seconds / buckets
+        self.buckets = buckets
+        # [bucket index, calls, failures] per slot
+        self._slots: List[List[int]] = [[-1, 0, 0] for _ in range(buckets)]
+
+    def record(self, failed: bool, now: float) -> None:
+        index = int(now / self.bucket_width)
+        slot = self._slots[index % self.buckets]
+        if slot[0] != index:
+            slot[0], slot[1], slot[2] = index, 0, 0
+        slot[1] += 1
+        if failed:
+            slot[2] += 1
+
+    def totals(self, now: float) -> tuple:
+        """(calls, failures) in the window ending at `now`"""
+        oldest = int(now / self.bucket_width) - self.buckets + 1
+        calls = failures = 0
+        for index, slot_calls, slot_failures in self._slots:
+            if index >= oldest:
+                calls += slot_calls
+                failures += slot_failures
+        return calls, failures
+
+    def reset(self) -> None:
+        for slot in self._slots:
+            slot[0], slot[1], slot[2] = -1, 0, 0
+
+
 class CircuitBreaker:
     """
     Circuit breaker for external API calls.
 
     States:
     - CLOSED: Normal operation, calls pass through
-    - OPEN: Too many failures, calls fail immediately
-    - HALF_OPEN: Testing recovery, limited calls allowed
+    - OPEN: Failure rate too high, calls fail immediately
+    - HALF_OPEN: Testing recovery, at most half_open_max_calls concurrent probes
 
     Transitions:
-    - CLOSED -> OPEN: After failure_threshold consecutive failures
+    - CLOSED -> OPEN: failure rate >= failure_rate_threshold over the window,
+      with at least minimum_calls calls in the window
     - OPEN -> HALF_OPEN: After recovery_timeout seconds
-    - HALF_OPEN -> CLOSED: After success_threshold consecutive successes
-    - HALF_OPEN -> OPEN: After any failure
+    - HALF_OPEN -> CLOSED: After success_threshold successful probes
+    - HALF_OPEN -> OPEN: After any failed probe
+
+    With `shared`, OPEN and CLOSED transitions are broadcast to the other
+    workers, which adopt them (see start_circuit_sync).
     """
 
     def __init__(
         self,
         name: str,
-        failure_threshold: int = 5,
+        failure_rate_threshold: Optional[float] = None,
+        minimum_calls: Optional[int] = None,
+        window_seconds: Optional[int] = None,
         recovery_timeout: int = 60,
         success_threshold: int = 2,
-        timeout: int = 30
+        half_open_max_calls: Optional[int] = None,
+        timeout: int = 30,
+        shared: Optional[bool] = None,
+        clock: Callable[[], float] = time.monotonic
     ):
         """
         Initialize circuit breaker.
 
         Args:
             name: Name of the circuit (e.g., "openai", "cloudinary")
-            failure_threshold: Number of failures before opening circuit
+            failure_rate_threshold: Failure rate (0-1) over the window that opens the circuit
+            minimum_calls: Calls in the window before the failure rate is evaluated
+            window_seconds: Length of the sliding window
             recovery_timeout: Seconds to wait before testing recovery
-            success_threshold: Number of successes to close circuit from half-open
+            success_threshold: Successful probes to close circuit from half-open
+            half_open_max_calls: Concurrent probe calls allowed when half-open
             timeout: Timeout for individual calls in seconds
+            shared: Share open/closed transitions across workers
+            clock: Monotonic time source (tests)
         """
         self.name = name
-        self.failure_threshold = failure_threshold
+        self.failure_rate_threshold = (
+            failure_rate_threshold if failure_rate_threshold is not None
+            else settings.CIRCUIT_BREAKER_FAILURE_RATE
+        )
+        self.minimum_calls = minimum_calls or settings.CIRCUIT_BREAKER_MINIMUM_CALLS
+        self.window_seconds = window_seconds or settings.CIRCUIT_BREAKER_WINDOW_SECONDS
         self.recovery_timeout = recovery_timeout
         self.success_threshold = success_threshold
+        self.half_open_max_calls = half_open_max_calls or settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
         self.timeout = timeout
+        self.shared = settings.CIRCUIT_BREAKER_SHARED if shared is None else shared
+        self._clock = clock
 
         self.state = CircuitState.CLOSED
-        self.failure_count = 0
+        self.window = SlidingWindow(self.window_seconds)
         self.success_count = 0
-        self.last_failure_time: Optional[datetime] = None
-        self.last_state_change: datetime = datetime.now()
+        self.half_open_in_flight = 0
+        self.open_until = 0.0
+        self.last_failure_time: Optional[float] = None  # Wall clock, for display
+        self.last_state_change: float = time.time()
+        self._state_changed_at = clock()
+        self._synced = False
 
         # Statistics
         self.total_calls = 0
         self.total_failures = 0
         self.total_successes = 0
         self.total_timeouts = 0
+        self.total_rejected = 0
 
         logger.info(
             f"Circuit breaker '{name}' initialized: "
-            f"failure_threshold={failure_threshold}, "
+            f"failure_rate={self.failure_rate_threshold:.0%} over {self.window_seconds}s "
+            f"(min {self.minimum_calls} calls), "
             f"recovery_timeout={recovery_timeout}s, "
-            f"timeout={timeout}s"
+            f"half_open_probes={self.half_open_max_calls}, "
+            f"timeout={timeout}s, shared={self.shared}"
         )
 
-    def _can_attempt_call(self) -> bool:
-        """Check if a call can be attempted based on current state."""
-        if self.state == CircuitState.CLOSED:
-            return True
-
-        if self.state == CircuitState.HALF_OPEN:
-            return True
+    @property
+    def failure_count(self) -> int:
+        """Failures in the current window"""
+        return self.window.totals(self._clock())[1]
 
+    def _acquire(self) -> bool:
+        """Check if a call can be attempted; takes a probe slot when half-open."""
         if self.state == CircuitState.OPEN:
-            # Check if recovery timeout has passed
-            if self.last_failure_time:
-                time_since_failure = (datetime.now() - self.last_failure_time).total_seconds()
-                if time_since_failure >= self.recovery_timeout:
-                    logger.info(f"Circuit '{self.name}' moving to HALF_OPEN (testing recovery)")
-                    self._change_state(CircuitState.HALF_OPEN)
-                    self.success_count = 0
-                    return True
+            if self._clock() < self.open_until:
+                return False
+            logger.info(f"Circuit '{self.name}' moving to HALF_OPEN (testing recovery)")
+            self._change_state(CircuitState.HALF_OPEN)
+            self.success_count = 0
+            self.half_open_in_flight = 0
 
-            return False
+        if self.state == CircuitState.HALF_OPEN:
+            if self.half_open_in_flight >= self.half_open_max_calls:
+                return False
+            self.half_open_in_flight += 1
 
-        return False
+        return True
 
-    def _change_state(self, new_state: CircuitState):
+    def _change_state(self, new_state: CircuitState, broadcast: bool = True):
         """Change circuit state and log transition."""
         old_state = self.state
         self.state = new_state
-        self.last_state_change = datetime.now()
+        self.last_state_change = time.time()
+        self._state_changed_at = self._clock()
 
+        calls, failures = self.window.totals(self._state_changed_at)
         logger.warning(
             f"Circuit '{self.name}' state change: {old_state.value} -> {new_state.value} "
-            f"(failures: {self.failure_count}, successes: {self.success_count})"
+            f"(window: {failures}/{calls} failed, probes ok: {self.success_count})"
         )
 
-    def _on_success(self):
-        """Handle successful call."""
-        self.total_calls += 1
-        self.total_successes += 1
+        if broadcast and self.shared and new_state != CircuitState.HALF_OPEN:
+            _schedule(_broadcast(self))
 
-        if self.state == CircuitState.HALF_OPEN:
-            self.success_count += 1
-            if self.success_count >= self.success_threshold:
-                logger.info(
-                    f"Circuit '{self.name}' recovered after {self.success_count} successes"
-                )
-                self._change_state(CircuitState.CLOSED)
-                self.failure_count = 0
-                self.success_count = 0
+    def _open(self, broadcast: bool = True):
+        self.open_until = self._clock() + self.recovery_timeout
+        self.success_count = 0
+        self.half_open_in_flight = 0
+        self._change_state(CircuitState.OPEN, broadcast)
 
-        elif self.state == CircuitState.CLOSED:
-            # Reset failure count on success
-            self.failure_count = 0
+    def _close(self, broadcast: bool = True):
+        self.window.reset()
+        self.success_count = 0
+        self.half_open_in_flight = 0
+        self._change_state(CircuitState.CLOSED, broadcast)
 
-    def _on_failure(self, error: Exception):
+    def _on_success(self, probe: bool):
+        """Handle successful call."""
+        self.total_calls += 1
+        self.total_successes += 1
+        self.window.record(False, self._clock())
+
+        if probe:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            if self.state == CircuitState.HALF_OPEN:
+                self.success_count += 1
+                if self.success_count >= self.success_threshold:
+                    logger.info(
+                        f"Circuit '{self.name}' recovered after {self.success_count} successful probes"
+                    )
+                    self._close()
+
+    def _on_failure(self, error: Exception, probe: bool):
         """Handle failed call."""
+        now = self._clock()
         self.total_calls += 1
         self.total_failures += 1
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
+        self.last_failure_time = time.time()
+        self.window.record(True, now)
 
-        logger.error(
-            f"Circuit '{self.name}' failure #{self.failure_count}: {type(error).__name__}: {str(error)}"
-        )
+        logger.error(f"Circuit '{self.name}' failure: {type(error).__name__}: {str(error)}")
 
-        if self.state == CircuitState.HALF_OPEN:
-            # Any failure in half-open state reopens the circuit
-            logger.warning(f"Circuit '{self.name}' failed during recovery test, reopening")
-            self._change_state(CircuitState.OPEN)
-            self.success_count = 0
+        if probe:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            if self.state == CircuitState.HALF_OPEN:
+                # Any failure in half-open state reopens the circuit
+                logger.warning(f"Circuit '{self.name}' failed during recovery test, reopening")
+                self._open()
+            return
 
-        elif self.state == CircuitState.CLOSED:
-            if self.failure_count >= self.failure_threshold:
+        if self.state == CircuitState.CLOSED:
+            calls, failures = self.window.totals(now)
+            if calls >= self.minimum_calls and failures / calls >= self.failure_rate_threshold:
                 logger.error(
-                    f"Circuit '{self.name}' OPENED after {self.failure_count} consecutive failures"
+                    f"Circuit '{self.name}' OPENED: {failures}/{calls} calls failed "
+                    f"in the last {self.window_seconds}s"
                 )
-                self._change_state(CircuitState.OPEN)
+                self._open()
 
     def _on_timeout(self):
         """Handle timeout."""
@@ -179,68 +274,220 @@ class CircuitBreaker:
             Function result
 
         Raises:
-            CircuitBreakerError: If circuit is open
+            CircuitBreakerError: If circuit is open (or all half-open probes are in flight)
             Exception: Original exception if call fails
         """
-        if not self._can_attempt_call():
+        if self.shared and not self._synced:
+            self._synced = True
+            await _load_shared_state(self)
+
+        if not self._acquire():
+            self.total_rejected += 1
+            last_failure = datetime.fromtimestamp(self.last_failure_time) if self.last_failure_time else None
             raise CircuitBreakerError(
-                f"Circuit breaker '{self.name}' is OPEN. "
-                f"Service unavailable (last failure: {self.last_failure_time}). "
+                f"Circuit breaker '{self.name}' is {self.state.value.upper()}. "
+                f"Service unavailable (last failure: {last_failure}). "
                 f"Will retry after {self.recovery_timeout}s."
             )
 
+        probe = self.state == CircuitState.HALF_OPEN
         try:
             # Execute with timeout
             result = await asyncio.wait_for(
                 func(*args, **kwargs),
                 timeout=self.timeout
             )
-            self._on_success()
-            return result
-
         except asyncio.TimeoutError:
             self._on_timeout()
-            self._on_failure(Exception(f"Timeout after {self.timeout}s"))
+            self._on_failure(Exception(f"Timeout after {self.timeout}s"), probe)
             raise
-
-        except Exception as e:
-            self._on_failure(e)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self._on_failure(e, probe)
+            elif probe:
+                # Cancelled probe: give its slot back
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
             raise
 
+        self._on_success(probe)
+        return result
+
     def get_stats(self) -> Dict[str, Any]:
         """Get circuit breaker statistics."""
-        uptime = (datetime.now() - self.last_state_change).total_seconds()
+        now = self._clock()
+        calls, failures = self.window.totals(now)
 
         return {
             "name": self.name,
             "state": self.state.value,
-            "failure_count": self.failure_count,
+            "failure_count": failures,
             "success_count": self.success_count,
             "total_calls": self.total_calls,
             "total_successes": self.total_successes,
             "total_failures": self.total_failures,
             "total_timeouts": self.total_timeouts,
+            "total_rejected": self.total_rejected,
             "success_rate": (
                 round(self.total_successes / self.total_calls * 100, 2)
                 if self.total_calls > 0 else 0
             ),
-            "last_failure": self.last_failure_time.isoformat() if self.last_failure_time else None,
-            "last_state_change": self.last_state_change.isoformat(),
-            "state_uptime_seconds": round(uptime, 2),
+            "window": {
+                "calls": calls,
+                "failures": failures,
+                "failure_rate": round(failures / calls, 3) if calls else 0
+            },
+            "half_open_in_flight": self.half_open_in_flight,
+            "retry_in_seconds": (
+                round(max(0.0, self.open_until - now), 1) if self.state == CircuitState.OPEN else None
+            ),
+            "last_failure": (
+                datetime.fromtimestamp(self.last_failure_time).isoformat() if self.last_failure_time else None
+            ),
+            "last_state_change": datetime.fromtimestamp(self.last_state_change).isoformat(),
+            "state_uptime_seconds": round(now - self._state_changed_at, 2),
             "config": {
-                "failure_threshold": self.failure_threshold,
+                "failure_rate_threshold": self.failure_rate_threshold,
+                "minimum_calls": self.minimum_calls,
+                "window_seconds": self.window_seconds,
                 "recovery_timeout": self.recovery_timeout,
                 "success_threshold": self.success_threshold,
-                "timeout": self.timeout
+                "half_open_max_calls": self.half_open_max_calls,
+                "timeout": self.timeout,
+                "shared": self.shared
             }
         }
 
     def reset(self):
         """Manually reset circuit to closed state."""
         logger.info(f"Circuit '{self.name}' manually reset to CLOSED")
-        self._change_state(CircuitState.CLOSED)
-        self.failure_count = 0
-        self.success_count = 0
+        self._close()
+
+    # ---- shared state ----
+
+    def apply_remote(self, state: str, until: Optional[float]) -> None:
+        """Adopt a transition published by another worker (`until` is a wall-clock time)."""
+        if state == CircuitState.OPEN.value and until:
+            remaining = until - time.time()
+            if remaining <= 0:
+                return
+            if self.state != CircuitState.OPEN or self._clock() + remaining > self.open_until:
+                logger.warning(f"Circuit '{self.name}' opened by another worker")
+                self._open(broadcast=False)
+                self.open_until = self._clock() + remaining
+        elif state == CircuitState.CLOSED.value and self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed by another worker")
+            self._close(broadcast=False)
+
+
+# ===================
+# Cross-worker sharing
+# ===================
+
+_background: Set[asyncio.Task] = set()
+_sync_task: Optional[asyncio.Task] = None
+# Transitions received for breakers this worker has not created yet
+_remote_states: Dict[str, dict] = {}
+
+
+def _schedule(coro) -> None:
+    """Run a coroutine in the background (dropped when no loop is running)."""
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _worker_id() -> str:
+    from app.core.metrics import WORKER_ID
+    return WORKER_ID
+
+
+async def _broadcast(breaker: CircuitBreaker) -> None:
+    from app.core.pubsub import get_pubsub
+    from app.core.redis import get_cache, cache_set_json
+
+    state = breaker.state.value
+    until = None
+    if breaker.state == CircuitState.OPEN:
+        until = time.time() + max(0.0, breaker.open_until - breaker._clock())
+
+    try:
+        key = f"{CIRCUIT_KEY_PREFIX}{breaker.name}"
+        if until is not None:
+            await cache_set_json(key, {"state": state, "until": until}, expire=max(1, int(until - time.time())))
+        else:
+            await get_cache().delete(key)
+
+        broker = get_pubsub()
+        if broker is not None:
+            await broker.publish(CIRCUIT_CHANNEL, {
+                "name": breaker.name,
+                "state": state,
+                "until": until,
+                "worker": _worker_id()
+            })
+    except Exception as e:
+        logger.warning(f"Could not share circuit '{breaker.name}' state: {e}")
+
+
+async def _load_shared_state(breaker: CircuitBreaker) -> None:
+    """Adopt an open state published before this breaker existed."""
+    from app.core.redis import cache_get_json
+
+    try:
+        shared = await cache_get_json(f"{CIRCUIT_KEY_PREFIX}{breaker.name}")
+    except Exception as e:
+        logger.debug(f"Could not read circuit '{breaker.name}' shared state: {e}")
+        return
+    if shared:
+        breaker.apply_remote(shared.get("state"), shared.get("until"))
+
+
+async def _listen(subscription) -> None:
+    own_id = _worker_id()
+    async for message in subscription:
+        if not isinstance(message, dict) or message.get("worker") == own_id:
+            continue
+        name = message.get("name")
+        breaker = CircuitBreakerManager._breakers.get(name)
+        if breaker is None:
+            _remote_states[name] = message
+        elif breaker.shared:
+            breaker.apply_remote(message.get("state"), message.get("until"))
+
+
+async def start_circuit_sync() -> None:
+    """Apply circuit transitions published by other workers (call at startup, after pub/sub)"""
+    global _sync_task
+    from app.core.pubsub import get_pubsub
+
+    broker = get_pubsub()
+    if broker is None or _sync_task is not None or not settings.CIRCUIT_BREAKER_SHARED:
+        return
+    subscription = await broker.subscribe(CIRCUIT_CHANNEL)
+
+    async def run():
+        try:
+            await _listen(subscription)
+        finally:
+            await subscription.close()
+
+    _sync_task = asyncio.create_task(run())
+
+
+async def stop_circuit_sync() -> None:
+    """Stop applying remote transitions (call at shutdown)"""
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
 
 
 class CircuitBreakerManager:
@@ -260,20 +507,24 @@ class CircuitBreakerManager:
     def get_breaker(
         cls,
         name: str,
-        failure_threshold: int = 5,
+        failure_rate_threshold: Optional[float] = None,
+        minimum_calls: Optional[int] = None,
         recovery_timeout: int = 60,
         success_threshold: int = 2,
-        timeout: int = 30
+        timeout: int = 30,
+        **options
     ) -> CircuitBreaker:
         """
         Get or create a circuit breaker.
 
         Args:
             name: Circuit breaker name
-            failure_threshold: Failures before opening
+            failure_rate_threshold: Failure rate over the window that opens the circuit
+            minimum_calls: Calls in the window before the rate is evaluated
             recovery_timeout: Seconds before testing recovery
-            success_threshold: Successes to close circuit
+            success_threshold: Successful probes to close circuit
             timeout: Call timeout in seconds
+            **options: Other CircuitBreaker arguments (window_seconds, half_open_max_calls, shared)
 
         Returns:
             CircuitBreaker instance
@@ -281,13 +532,18 @@ class CircuitBreakerManager:
         instance = cls()
 
         if name not in instance._breakers:
-            instance._breakers[name] = CircuitBreaker(
+            breaker = instance._breakers[name] = CircuitBreaker(
                 name=name,
-                failure_threshold=failure_threshold,
+                failure_rate_threshold=failure_rate_threshold,
+                minimum_calls=minimum_calls,
                 recovery_timeout=recovery_timeout,
                 success_threshold=success_threshold,
-                timeout=timeout
+                timeout=timeout,
+                **options
             )
+            remote = _remote_states.pop(name, None)
+            if remote is not None and breaker.shared:
+                breaker.apply_remote(remote.get("state"), remote.get("until"))
 
         return instance._breakers[name]
 
@@ -310,7 +566,8 @@ class CircuitBreakerManager:
 
 def circuit_breaker(
     name: str,
-    failure_threshold: int = 5,
+    failure_rate_threshold: Optional[float] = None,
+    minimum_calls: Optional[int] = None,
     recovery_timeout: int = 60,
     success_threshold: int = 2,
     timeout: int = 30,
@@ -321,9 +578,10 @@ def circuit_breaker(
 
     Args:
         name: Circuit breaker name
-        failure_threshold: Failures before opening circuit
+        failure_rate_threshold: Failure rate over the window that opens the circuit
+        minimum_calls: Calls in the window before the rate is evaluated
         recovery_timeout: Seconds before testing recovery
-        success_threshold: Successes to close circuit
+        success_threshold: Successful probes to close circuit
         timeout: Call timeout in seconds
         fallback: Optional fallback function when circuit is open
 
@@ -338,7 +596,8 @@ def circuit_breaker(
         async def wrapper(*args, **kwargs):
             breaker = CircuitBreakerManager.get_breaker(
                 name=name,
-                failure_threshold=failure_threshold,
+                failure_rate_threshold=failure_rate_threshold,
+                minimum_calls=minimum_calls,
                 recovery_timeout=recovery_timeout,
                 success_threshold=success_threshold,
                 timeout=timeout
@@ -0,0 +1,78 @@
+# backend/app/core/codec.py
+"""
+Serialization of cached values (cache_*_json helpers, @cached, sessions).
+
+Values are JSON, encoded with orjson, and compressed with zlib above
+CACHE_COMPRESS_THRESHOLD bytes (CACHE_CODEC=orjson only). The first character
+of a payload names its format, so workers read every format whatever
+CACHE_CODEC they write with:
+
+- no marker: plain JSON (stdlib json, and entries written before this codec)
+- "\\x01": orjson JSON
+- "\\x02": zlib-compressed JSON, base64-encoded (the cache client stores text)
+
+CACHE_CODEC=json writes plain JSON only, which workers predating this codec
+can read. Roll out a new format by deploying readers first (CACHE_CODEC=json),
+then switching CACHE_CODEC.
+"""
+import base64
+import json
+import zlib
+from typing import Any
+
+import orjson
+
+from app.core.config import settings
+
+JSON_MARKER = "\x01"
+ZLIB_MARKER = "\x02"
+
+# Same output as json.dumps(default=str): datetimes and dataclasses go through str()
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class CodecError(ValueError):
+    """A payload that cannot be decoded"""
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """JSON encoding of `value` (non-JSON types are converted with str())"""
+    if settings.CACHE_CODEC == "json":
+        return json.dumps(value, default=str).encode()
+    return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS)
+
+
+def dumps(value: Any) -> str:
+    """Encode `value` for the cache"""
+    data = dumps_bytes(value)
+    if settings.CACHE_CODEC == "json":
+        return data.decode()
+    threshold = settings.CACHE_COMPRESS_THRESHOLD
+    if threshold and len(data) >= threshold:
+        compressed = zlib.compress(data, settings.CACHE_COMPRESS_LEVEL)
+        # Base64 costs 33%: keep the plain payload when compression does not pay for it
+        if len(compressed) * 4 // 3 < len(data):
+            return ZLIB_MARKER + base64.b64encode(compressed).decode("ascii")
+    return JSON_MARKER + data.decode()
+
+
+def loads(payload: str) -> Any:
+    """
+    Decode a cache payload in any supported format.
+
+    Raises:
+        CodecError: If the payload is corrupt or not JSON
+    """
+    marker = payload[:1]
+    try:
+        if marker == ZLIB_MARKER:
+            return orjson.loads(zlib.decompress(base64.b64decode(payload[1:])))
+        if marker == JSON_MARKER:
+            return orjson.loads(payload[1:])
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            # Plain JSON may hold NaN/Infinity (json.dumps), which orjson rejects
+            return json.loads(payload)
+    except (ValueError, zlib.error) as e:
+        raise CodecError(f"Undecodable cache payload: {e}") from e
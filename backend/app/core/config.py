@@ -54,6 +54,23 @@ class Settings:
         self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
         self.REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+        # API key authentication
+        # Successful verifications are cached briefly (revocations take effect within the TTL)
+        self.API_KEY_CACHE_TTL = int(os.getenv("API_KEY_CACHE_TTL", "30"))  # seconds
+        self.API_KEY_CACHE_MAX_ENTRIES = int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", "1024"))
+        # api_keys.last_used is batched in memory and written periodically
+        self.API_KEY_LAST_USED_FLUSH_SECONDS = int(os.getenv("API_KEY_LAST_USED_FLUSH_SECONDS", "60"))
+
+        # Authenticated-user snapshots (id, role, status) cached per user id
+        # Invalidated on every worker via pub/sub when status/role/password changes
+        self.USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))  # seconds, 0 disables
+        self.USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+        # Local Bloom filter of revoked JWT ids (mirrors the cache blacklist via pub/sub)
+        self.REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000"))
+        self.REVOCATION_FILTER_ERROR_RATE = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001"))
+        self.REVOCATION_FILTER_RESYNC_SECONDS = int(os.getenv("REVOCATION_FILTER_RESYNC_SECONDS", "300"))
+
         # HTTPS Enforcement
         # In production (DEBUG=False), HTTPS is enforced by default
         # Set ENFORCE_HTTPS=false to disable (not recommended)
@@ -109,16 +126,77 @@ class Settings:
 
         self.DATABASE_URL = database_url
 
-        # Validate: SQLite not allowed in production
-        if not self.DEBUG and self.DATABASE_URL.startswith("sqlite"):
+        # SQLite profile: "development" (single shared connection) or "production"
+        # (WAL, tuned pragmas, reader pool + single writer) for kiosk deployments
+        self.SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "development").lower()
+        self.SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+        self.SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+        self.SQLITE_CACHE_SIZE_MB = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+        # Validate: SQLite only allowed in production with the production profile
+        if (not self.DEBUG and self.DATABASE_URL.startswith("sqlite")
+                and self.SQLITE_PROFILE != "production"):
             raise ValueError(
                 "SQLite is not supported in production! "
-                "Please configure a PostgreSQL DATABASE_URL."
+                "Please configure a PostgreSQL DATABASE_URL "
+                "(or set SQLITE_PROFILE=production for single-host deployments)."
             )
 
+        # Connection Pool (PostgreSQL)
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+        self.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # seconds, -1 = never
+        # Warn when waiting for a pooled connection takes longer than this (0 = disabled)
+        self.POOL_WAIT_WARNING_MS = int(os.getenv("POOL_WAIT_WARNING_MS", "0"))
+
         # Slow Query Logging (Performance Monitoring)
         # Log queries that take longer than this threshold (in milliseconds)
         self.SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "1000"))  # 1 second
+        # Allow /query-stats?explain=true to EXPLAIN the slowest statement (PostgreSQL only)
+        self.QUERY_EXPLAIN_ENABLED = os.getenv("QUERY_EXPLAIN_ENABLED", "false").lower() == "true"
+
+        # Per-stage request timing (Server-Timing headers + /timing-stats histograms)
+        self.SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+        # Share of requests traced (0.0 - 1.0)
+        self.SERVER_TIMING_SAMPLE_RATE = float(
+            os.getenv("SERVER_TIMING_SAMPLE_RATE", "1.0" if self.DEBUG else "0.05")
+        )
+
+        # Prometheus metrics (/metrics, OpenMetrics format)
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        # How often each worker publishes its metrics for cross-worker scrapes (seconds)
+        self.METRICS_PUBLISH_INTERVAL = int(os.getenv("METRICS_PUBLISH_INTERVAL", "15"))
+        # Optional bearer token required to scrape /metrics
+        self.METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+        # On-demand sampling profiler (admin endpoints under /api/admin/profile)
+        self.PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() == "true"
+        self.PROFILER_INTERVAL_MS = int(os.getenv("PROFILER_INTERVAL_MS", "10"))
+        # Longest worker-wide profile (also bounded by REQUEST_TIMEOUT)
+        self.PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "25"))
+        # Request captures: max requests profiled and how long a capture stays armed (seconds)
+        self.PROFILER_MAX_REQUESTS = int(os.getenv("PROFILER_MAX_REQUESTS", "100"))
+        self.PROFILER_CAPTURE_TIMEOUT = int(os.getenv("PROFILER_CAPTURE_TIMEOUT", "300"))
+        # Sampling slows down when it costs more than this share of the sampled interval
+        self.PROFILER_MAX_OVERHEAD = float(os.getenv("PROFILER_MAX_OVERHEAD", "0.02"))
+
+        # Circuit breakers (external APIs): open on the failure rate over a sliding window
+        self.CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+        # Calls needed in the window before the failure rate is evaluated
+        self.CIRCUIT_BREAKER_MINIMUM_CALLS = int(os.getenv("CIRCUIT_BREAKER_MINIMUM_CALLS", "10"))
+        self.CIRCUIT_BREAKER_WINDOW_SECONDS = int(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "60"))
+        # Concurrent probe calls per worker while half-open
+        self.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+        # Share open/closed transitions across workers (pub/sub)
+        self.CIRCUIT_BREAKER_SHARED = os.getenv("CIRCUIT_BREAKER_SHARED", "true").lower() == "true"
+
+        # Event loop lag monitor (/loop-stats, event_loop_lag_* metrics)
+        self.LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+        self.LOOP_MONITOR_INTERVAL_MS = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+        # Capture the blocking stack when the loop stalls longer than this
+        self.LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "200"))
 
         # Memory Usage Alerting Thresholds
         # Memory usage thresholds in MB for alerting
@@ -128,6 +206,17 @@ class Settings:
         self.MEMORY_WARNING_PERCENT = int(os.getenv("MEMORY_WARNING_PERCENT", "70"))  # 70%
         self.MEMORY_CRITICAL_PERCENT = int(os.getenv("MEMORY_CRITICAL_PERCENT", "85"))  # 85%
 
+        # Continuous memory profiling (store sizes and tracemalloc diffs on /memory/usage)
+        self.MEMORY_PROFILER_ENABLED = os.getenv("MEMORY_PROFILER_ENABLED", "true").lower() == "true"
+        self.MEMORY_PROFILER_INTERVAL = int(os.getenv("MEMORY_PROFILER_INTERVAL", "60"))  # seconds
+        # tracemalloc slows allocations down: on by default in development only
+        self.MEMORY_TRACEMALLOC = os.getenv(
+            "MEMORY_TRACEMALLOC", "true" if self.DEBUG else "false"
+        ).lower() == "true"
+        self.MEMORY_TRACEMALLOC_FRAMES = int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "1"))
+        # Alert when a store grows on this many consecutive samples (0 = disabled)
+        self.MEMORY_GROWTH_ALERT_SAMPLES = int(os.getenv("MEMORY_GROWTH_ALERT_SAMPLES", "6"))
+
         # ===================
         # Redis Settings
         # ===================
@@ -146,6 +235,24 @@ class Settings:
 
         self.REDIS_URL = redis_url
 
+        # In-memory cache (memory://): LRU bounds (0 = unbounded) and expiry sweep period
+        self.MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "100000"))
+        self.MEMORY_CACHE_MAX_MB = int(os.getenv("MEMORY_CACHE_MAX_MB", "256"))
+        self.MEMORY_CACHE_SWEEP_INTERVAL = float(os.getenv("MEMORY_CACHE_SWEEP_INTERVAL", "1.0"))
+
+        # Cached values and sessions: "orjson" (default) or "json" (plain JSON, readable by
+        # workers predating the codec, never compressed); orjson payloads are zlib-compressed
+        # above the threshold in bytes (0 = never)
+        self.CACHE_CODEC = os.getenv("CACHE_CODEC", "orjson").lower()
+        self.CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "4096"))
+        self.CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "1"))
+
+        # In-process L1 tier of @cached(local_ttl=...): entries per prefix (0 disables it)
+        self.CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+
+        # Serialized client dossiers (keyed by ticket_id + updated_at)
+        self.DOSSIER_CACHE_TTL = int(os.getenv("DOSSIER_CACHE_TTL", "3600"))  # 1 hour
+
         # ===================
         # API Keys
         # ===================
@@ -330,8 +330,10 @@ def validate_environment() -> Dict[str, Any]:
     if database_url:
         # Validate database URL format
         if database_url.startswith("sqlite"):
-            # SQLite is OK for development
-            if not validator.validate_boolean("DEBUG", "Debug mode", default=False):
+            # SQLite is OK for development, or with the production profile
+            sqlite_profile = os.getenv("SQLITE_PROFILE", "development").lower()
+            if (not validator.validate_boolean("DEBUG", "Debug mode", default=False)
+                    and sqlite_profile != "production"):
                 validator.errors.append(
                     "DATABASE_URL: SQLite is not recommended for production. "
                     "Please use PostgreSQL."
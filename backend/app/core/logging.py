@@ -1,12 +1,18 @@
 # backend/app/core/logging.py
 """
-Secure logging configuration with sensitive data filtering
+Secure logging configuration with sensitive data filtering.
+
+The root logger only enqueues records (QueueHandler); a QueueListener thread
+redacts, formats and writes them, so log I/O does not block the event loop.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import re
 from pathlib import Path
-from typing import Dict, List, Pattern
+from typing import Dict, List, Optional, Pattern
 
 
 class SensitiveDataFilter(logging.Filter):
@@ -67,14 +73,50 @@ class SensitiveDataFilter(logging.Filter):
             "pattern": re.compile(r'\b(?:\d[ -]*?){13,16}\b'),
             "replacement": "***CARD_REDACTED***"
         },
-        # Authorization Headers
+        # Authorization Headers (the scheme is kept, e.g. "Bearer ***REDACTED***")
         {
             "name": "Authorization Header",
-            "pattern": re.compile(r'(authorization["\']?\s*[:=]\s*["\']?)([^"\'}\s,]+)', re.IGNORECASE),
+            "pattern": re.compile(r'(authorization["\']?\s*[:=]\s*["\']?(?:(?:Bearer|Basic|Token)\s+)?)([^"\'}\s,]+)', re.IGNORECASE),
             "replacement": r'\1***REDACTED***'
         },
     ]
 
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self._combined, self._templates = self._combine(self.SENSITIVE_PATTERNS)
+
+    @staticmethod
+    def _combine(patterns: List[Dict]) -> tuple:
+        """
+        Join all patterns into one alternation, so a message is scanned once.
+
+        Each pattern becomes a named group; its replacement template is
+        rewritten to the group numbers it gets inside the combined pattern.
+        Where two patterns match at the same position, the earlier one wins.
+        """
+        parts = []
+        templates = {}
+        offset = 0
+        for index, pattern_info in enumerate(patterns):
+            pattern = pattern_info["pattern"]
+            name = f"p{index}"
+            body = pattern.pattern
+            if pattern.flags & re.IGNORECASE:
+                body = f"(?i:{body})"
+            parts.append(f"(?P<{name}>{body})")
+            # Groups of this pattern start after its own named group
+            first = offset + 2
+            templates[name] = re.sub(
+                r"\\(\d+)",
+                lambda m, first=first: f"\\g<{first + int(m.group(1)) - 1}>",
+                pattern_info["replacement"]
+            )
+            offset += 1 + pattern.groups
+        return re.compile("|".join(parts)), templates
+
+    def _replace(self, match: re.Match) -> str:
+        return match.expand(self._templates[match.lastgroup])
+
     def filter(self, record: logging.LogRecord) -> bool:
         """
         Filter log record to redact sensitive information.
@@ -117,15 +159,49 @@ class SensitiveDataFilter(logging.Filter):
         if not text:
             return text
 
-        redacted_text = text
+        return self._combined.sub(self._replace, text)
 
-        # Apply all patterns
-        for pattern_info in self.SENSITIVE_PATTERNS:
-            pattern = pattern_info["pattern"]
-            replacement = pattern_info["replacement"]
-            redacted_text = pattern.sub(replacement, redacted_text)
 
-        return redacted_text
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() runs the formatter on the calling thread; here only
+    the message arguments are merged (they may be mutated after the call).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RedactingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that redacts each record once, before its handlers"""
+
+    def __init__(self, log_queue, *handlers, redactor: SensitiveDataFilter):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.redactor = redactor
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        self.redactor.filter(record)
+        return record
+
+
+# Listener of the current logging setup
+_queue_listener: Optional[RedactingQueueListener] = None
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+# Drain the queue at interpreter exit (runs before logging's own shutdown)
+atexit.register(stop_logging)
 
 
 def setup_logging():
@@ -139,13 +215,14 @@ def setup_logging():
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
 
+    global _queue_listener
+
     # Create sensitive data filter
     sensitive_filter = SensitiveDataFilter()
 
     # Create file handler
     file_handler = logging.FileHandler(log_dir / "app.log")
     file_handler.setLevel(logging.INFO)
-    file_handler.addFilter(sensitive_filter)
     file_handler.setFormatter(
         logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     )
@@ -153,7 +230,6 @@ def setup_logging():
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.addFilter(sensitive_filter)
     console_handler.setFormatter(
         logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     )
@@ -163,11 +239,20 @@ def setup_logging():
     root_logger.setLevel(logging.INFO)
 
     # Remove existing handlers to avoid duplicates
+    stop_logging()
     root_logger.handlers.clear()
 
-    # Add our secure handlers
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    # Records below INFO are dropped before they are queued or redacted
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    root_logger.addHandler(queue_handler)
+
+    # Redaction, formatting and I/O run on the listener thread
+    _queue_listener = RedactingQueueListener(
+        log_queue, file_handler, console_handler, redactor=sensitive_filter
+    )
+    _queue_listener.start()
 
     # Set specific log levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
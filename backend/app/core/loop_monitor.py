@@ -0,0 +1,262 @@
+# backend/app/core/loop_monitor.py
+"""
+Event loop lag monitor.
+
+A task on the loop sleeps LOOP_MONITOR_INTERVAL_MS at a time and measures
+how late it wakes up: that delay is the scheduling lag every request on
+the worker suffers. Lags feed the event_loop_lag_seconds histogram and
+rolling percentiles.
+
+A watchdog thread notices when the task has not run for
+LOOP_LAG_THRESHOLD_MS and captures the loop thread's stack while it is
+still blocked, so the blocking call (sync I/O, password hashing, sync
+OpenAI client...) is named. Captures are aggregated per blocking site (the
+innermost application frame) and logged.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiler import collapse_stack
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.9, 0.99)
+# Lags kept for the rolling percentiles
+WINDOW_SIZE = 600
+# Distinct blocking sites tracked (the rest are grouped)
+MAX_SITES = 50
+OTHER_SITE = "other"
+APP_PREFIX = "app/"
+# Each blocking site is logged at most once per this many seconds
+LOG_INTERVAL = 60
+
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "Event loop scheduling lag", buckets=LAG_BUCKETS
+)
+event_loop_lag_quantile = registry.gauge(
+    "event_loop_lag_quantile_seconds", "Event loop lag percentiles over the recent window",
+    ("quantile",), aggregate="max"
+)
+event_loop_blocked = registry.counter(
+    "event_loop_blocked", "Loop stalls over the threshold, by blocking site", ("site",)
+)
+
+
+def blocking_site(stack: str) -> str:
+    """Innermost application frame of a collapsed stack (or its leaf)"""
+    frames = stack.split(";")
+    for frame in reversed(frames):
+        if frame.startswith(APP_PREFIX):
+            return frame
+    return frames[-1]
+
+
+class BlockingSite:
+    """Stalls attributed to one site"""
+
+    __slots__ = ("site", "count", "total_lag", "max_lag", "stacks", "last_logged")
+
+    def __init__(self, site: str):
+        self.site = site
+        self.last_logged = 0.0
+        self.count = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stacks: Counter = Counter()
+
+    def to_dict(self) -> dict:
+        return {
+            "site": self.site,
+            "count": self.count,
+            "total_lag_ms": round(self.total_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stack": self.stacks.most_common(1)[0][0] if self.stacks else None
+        }
+
+
+class LoopMonitor:
+    """
+    Lag measurements and blocking-site captures of one event loop.
+
+    Args:
+        interval: Seconds between lag measurements
+        threshold: Lag (seconds) at which the loop thread's stack is captured
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: Deque[float] = deque(maxlen=WINDOW_SIZE)
+        self.sites: Dict[str, BlockingSite] = {}
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._captured: Optional[str] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    # ---- loop side ----
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.record_lag(max(0.0, loop.time() - expected))
+
+    def record_lag(self, lag: float) -> None:
+        self.lags.append(lag)
+        event_loop_lag.observe(lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+        stack, self._captured = self._captured, None
+        if stack is not None and lag >= self.threshold:
+            self._record_stall(stack, lag)
+
+    def _record_stall(self, stack: str, lag: float) -> None:
+        site = blocking_site(stack)
+        with self._lock:
+            entry = self.sites.get(site)
+            if entry is None:
+                if len(self.sites) >= MAX_SITES:
+                    site = OTHER_SITE
+                    entry = self.sites.get(site)
+                if entry is None:
+                    entry = self.sites[site] = BlockingSite(site)
+            entry.count += 1
+            entry.total_lag += lag
+            entry.max_lag = max(entry.max_lag, lag)
+            if len(entry.stacks) < 10 or stack in entry.stacks:
+                entry.stacks[stack] += 1
+            self.stalls += 1
+            now = time.monotonic()
+            log = now - entry.last_logged >= LOG_INTERVAL
+            if log:
+                entry.last_logged = now
+        event_loop_blocked.inc(site=site)
+        if log:
+            logger.warning(
+                f"Event loop blocked for {lag * 1000:.0f}ms in {site} "
+                f"({entry.count} stall(s) so far)\n  stack: {stack}"
+            )
+
+    # ---- watchdog side ----
+
+    def _watch(self) -> None:
+        stalled_since = None
+        while not self._stop.wait(self.threshold / 2):
+            silent = time.monotonic() - self._beat
+            if silent < self.interval + self.threshold:
+                stalled_since = None
+                continue
+            if stalled_since == self._beat:
+                continue  # Already captured this stall
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._captured = collapse_stack(frame)
+                stalled_since = self._beat
+            del frame
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        """Start measuring (call from the event loop)"""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- reporting ----
+
+    def percentiles(self) -> Dict[float, float]:
+        lags = sorted(self.lags)
+        if not lags:
+            return {}
+        return {q: lags[min(len(lags) - 1, int(q * len(lags)))] for q in QUANTILES}
+
+    def get_stats(self, top_n: int = 20) -> dict:
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda s: s.total_lag, reverse=True)
+            top_sites = [site.to_dict() for site in sites[:top_n]]
+        return {
+            "interval_ms": round(self.interval * 1000),
+            "threshold_ms": round(self.threshold * 1000),
+            "lag_ms": {
+                f"p{int(q * 100)}": round(value * 1000, 2) for q, value in self.percentiles().items()
+            },
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stalls,
+            "blocking_sites": top_sites
+        }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    return _monitor
+
+
+def get_loop_stats(top_n: int = 20) -> dict:
+    """Lag percentiles and the sites that blocked the loop the longest"""
+    if _monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **_monitor.get_stats(top_n)}
+
+
+def _collect_lag_quantiles() -> None:
+    if _monitor is not None:
+        for q, value in _monitor.percentiles().items():
+            event_loop_lag_quantile.set(value, quantile=str(q))
+
+
+registry.add_collector(_collect_lag_quantiles)
+
+
+def start_loop_monitor() -> None:
+    """Start the lag monitor and its watchdog thread (call at startup)"""
+    global _monitor
+    if _monitor is not None:
+        return
+    _monitor = LoopMonitor(
+        interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+        threshold=settings.LOOP_LAG_THRESHOLD_MS / 1000
+    )
+    _monitor.start()
+    logger.info(
+        f"Event loop monitor started (every {settings.LOOP_MONITOR_INTERVAL_MS}ms, "
+        f"stack capture over {settings.LOOP_LAG_THRESHOLD_MS}ms)"
+    )
+
+
+async def stop_loop_monitor() -> None:
+    """Stop the lag monitor (call at shutdown)"""
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
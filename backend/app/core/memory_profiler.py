@@ -0,0 +1,349 @@
+# backend/app/core/memory_profiler.py
+"""
+Continuous memory profiling.
+
+A background task samples, every MEMORY_PROFILER_INTERVAL seconds:
+
+- the approximate size of the named in-memory stores (chat sessions, SAV
+  tickets, in-memory cache), measured by walking a bounded sample of their
+  entries and extrapolating;
+- with MEMORY_TRACEMALLOC, a tracemalloc snapshot grouped by source line,
+  diffed against the previous sample and the first one, so growth is
+  attributed to code locations (e.g. the upload endpoint reading files).
+
+A store (or the process RSS) growing on MEMORY_GROWTH_ALERT_SAMPLES
+consecutive samples is flagged and logged once per streak. Results are
+served by /memory/usage and the memory_store_* metrics.
+"""
+import asyncio
+import logging
+import random
+import sys
+import time
+import tracemalloc
+import types
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiler import short_path
+
+logger = logging.getLogger(__name__)
+
+# Entries measured per store (the rest is extrapolated)
+SAMPLE_ENTRIES = 50
+# Objects visited per store measurement
+MAX_OBJECTS = 20_000
+# Code locations reported per diff
+TOP_LOCATIONS = 15
+
+_NOT_TRAVERSED = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType, asyncio.AbstractEventLoop
+)
+_LEAVES = (str, bytes, bytearray, int, float, bool, complex, type(None))
+
+memory_store_bytes = registry.gauge("memory_store_bytes", "Approximate size of in-memory stores", ("store",))
+memory_store_items = registry.gauge("memory_store_items", "Entries in in-memory stores", ("store",))
+
+
+def deep_sizeof(obj, seen: set, budget: int = MAX_OBJECTS) -> Tuple[int, int]:
+    """
+    Approximate recursive size of `obj` (containers, instance __dict__/__slots__).
+    Classes, modules and functions are not followed; objects in `seen` are not
+    counted twice.
+
+    Returns:
+        (bytes, objects visited)
+    """
+    size = 0
+    visited = 0
+    stack = [obj]
+    while stack and visited < budget:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_TRAVERSED):
+            continue
+        seen.add(id(obj))
+        visited += 1
+        try:
+            size += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if isinstance(obj, _LEAVES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(obj), "__slots__", ()):
+                value = getattr(obj, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return size, visited
+
+
+def measure_store(store: dict) -> dict:
+    """Approximate size of a dict store from a sample of its entries"""
+    items = len(store)
+    keys = list(store)
+    sample = keys if items <= SAMPLE_ENTRIES else random.sample(keys, SAMPLE_ENTRIES)
+
+    seen: set = set()
+    sampled_bytes = 0
+    visited = 0
+    measured = 0
+    for key in sample:
+        if visited >= MAX_OBJECTS:
+            break
+        for obj in (key, store.get(key)):
+            size, count = deep_sizeof(obj, seen, MAX_OBJECTS - visited)
+            sampled_bytes += size
+            visited += count
+        measured += 1
+
+    approx_bytes = sys.getsizeof(store)
+    if measured:
+        approx_bytes += int(sampled_bytes * items / measured)
+    return {
+        "items": items,
+        "approx_bytes": approx_bytes,
+        "extrapolated": measured < items
+    }
+
+
+# ============== Stores ==============
+
+_stores: Dict[str, Callable[[], Optional[dict]]] = {}
+
+
+def register_store(name: str, getter: Callable[[], Optional[dict]]) -> None:
+    """Track an in-memory dict; `getter` returns it (or None when unavailable)"""
+    _stores[name] = getter
+
+
+def _chat_sessions() -> dict:
+    from app.api.endpoints.chat import chatbot_instances
+    return chatbot_instances
+
+
+def _sav_tickets() -> dict:
+    from app.services.sav_workflow_engine import sav_workflow_engine
+    return sav_workflow_engine.active_tickets
+
+
+def _active_memory_cache():
+    """The configured MemoryCache, or None (Redis backend or not initialized)"""
+    from app.core.redis import CacheManager, MemoryCache
+    # Set on the singleton instance: the CacheManager._cache class attribute stays None
+    cache = CacheManager()._cache
+    return cache if isinstance(cache, MemoryCache) else None
+
+
+def _memory_cache() -> Optional[dict]:
+    cache = _active_memory_cache()
+    return cache._data if cache else None
+
+
+def _memory_cache_stats() -> Optional[dict]:
+    cache = _active_memory_cache()
+    return cache.get_stats() if cache else None
+
+
+register_store("chatbot_instances", _chat_sessions)
+register_store("active_tickets", _sav_tickets)
+register_store("memory_cache", _memory_cache)
+
+
+# ============== Sampler ==============
+
+class GrowthTracker:
+    """Recent values of one series, flagged when they only go up"""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.window = window
+        self.values: Deque[int] = deque(maxlen=max(window, 2))
+        self.growing = False
+
+    def add(self, value: int) -> bool:
+        """Record a value; True when a monotonic growth streak starts"""
+        self.values.append(value)
+        was_growing = self.growing
+        self.growing = (
+            self.window > 1
+            and len(self.values) >= self.window
+            and all(b > a for a, b in zip(self.values, list(self.values)[1:]))
+        )
+        return self.growing and not was_growing
+
+
+def _location_stats(snapshot: tracemalloc.Snapshot) -> Dict[str, Tuple[int, int]]:
+    """{"path.py:line": (bytes, blocks)} of a snapshot"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    stats = {}
+    for stat in snapshot.statistics("lineno"):
+        frame = stat.traceback[0]
+        stats[f"{short_path(frame.filename)}:{frame.lineno}"] = (stat.size, stat.count)
+    return stats
+
+
+def _diff(current: Dict[str, Tuple[int, int]], previous: Dict[str, Tuple[int, int]]) -> List[dict]:
+    growth = []
+    for location, (size, count) in current.items():
+        before_size, before_count = previous.get(location, (0, 0))
+        if size > before_size:
+            growth.append((size - before_size, count - before_count, size, location))
+    growth.sort(reverse=True)
+    return [
+        {
+            "location": location,
+            "size_diff_kb": round(size_diff / 1024, 1),
+            "count_diff": count_diff,
+            "size_kb": round(size / 1024, 1)
+        }
+        for size_diff, count_diff, size, location in growth[:TOP_LOCATIONS]
+    ]
+
+
+class MemoryProfiler:
+    """Periodic store measurements and tracemalloc diffs of this worker"""
+
+    def __init__(self):
+        self.window = settings.MEMORY_GROWTH_ALERT_SAMPLES
+        self.trackers: Dict[str, GrowthTracker] = {}
+        self.stores: Dict[str, dict] = {}
+        self.samples = 0
+        self.last_sample: Optional[float] = None
+        self._baseline: Optional[Dict[str, Tuple[int, int]]] = None
+        self._previous: Optional[Dict[str, Tuple[int, int]]] = None
+        self.growth_since_last: List[dict] = []
+        self.growth_since_start: List[dict] = []
+
+    def _track(self, name: str, value: int) -> bool:
+        tracker = self.trackers.get(name)
+        if tracker is None:
+            tracker = self.trackers[name] = GrowthTracker(name, self.window)
+        if tracker.add(value):
+            logger.warning(
+                f"MEMORY GROWTH: {name} grew on {self.window} consecutive samples "
+                f"(now {value / 1024:.0f}KB)"
+            )
+        return tracker.growing
+
+    def measure_stores(self) -> Dict[str, dict]:
+        stores = {}
+        for name, getter in _stores.items():
+            try:
+                store = getter()
+            except Exception as e:
+                logger.debug(f"Memory store {name} unavailable: {e}")
+                continue
+            if store is None:
+                continue
+            stores[name] = measure_store(store)
+        return stores
+
+    async def sample(self) -> None:
+        """Take one sample (stores, RSS and, if enabled, a tracemalloc diff)"""
+        from app.core.memory_monitor import get_memory_monitor
+
+        stores = self.measure_stores()
+        for name, stats in stores.items():
+            stats["growing"] = self._track(name, stats["approx_bytes"])
+            memory_store_bytes.set(stats["approx_bytes"], store=name)
+            memory_store_items.set(stats["items"], store=name)
+        self.stores = stores
+        self._track("process_rss", get_memory_monitor().process.memory_info().rss)
+
+        if tracemalloc.is_tracing():
+            current = await asyncio.to_thread(lambda: _location_stats(tracemalloc.take_snapshot()))
+            if self._baseline is None:
+                self._baseline = current
+            else:
+                self.growth_since_last = _diff(current, self._previous)
+                self.growth_since_start = _diff(current, self._baseline)
+            self._previous = current
+
+        self.samples += 1
+        self.last_sample = time.time()
+
+    def report(self) -> dict:
+        stores = self.stores or self.measure_stores()
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "samples": self.samples,
+            "last_sample": self.last_sample,
+            "interval_s": settings.MEMORY_PROFILER_INTERVAL,
+            "stores": stores,
+            "memory_cache": _memory_cache_stats(),
+            "growing": sorted(name for name, tracker in self.trackers.items() if tracker.growing),
+            "tracemalloc": {
+                "enabled": tracemalloc.is_tracing(),
+                "traced_mb": round(traced / 1024 / 1024, 2),
+                "peak_mb": round(peak / 1024 / 1024, 2),
+                "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 1024 / 1024, 2),
+                "growth_since_last": self.growth_since_last,
+                "growth_since_start": self.growth_since_start
+            }
+        }
+
+
+_memory_profiler: Optional[MemoryProfiler] = None
+_sampler: Optional[asyncio.Task] = None
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    global _memory_profiler
+    if _memory_profiler is None:
+        _memory_profiler = MemoryProfiler()
+    return _memory_profiler
+
+
+def get_memory_profile() -> dict:
+    """Latest store sizes, growth flags and tracemalloc diffs of this worker"""
+    return get_memory_profiler().report()
+
+
+async def _sample_loop() -> None:
+    profiler = get_memory_profiler()
+    while True:
+        try:
+            await profiler.sample()
+        except Exception as e:
+            logger.warning(f"Memory profiling sample failed: {e}")
+        await asyncio.sleep(settings.MEMORY_PROFILER_INTERVAL)
+
+
+def start_memory_profiler() -> None:
+    """Start periodic sampling (call at startup, after the cache)"""
+    global _sampler
+    if _sampler is not None:
+        return
+    if settings.MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_TRACEMALLOC_FRAMES)
+        logger.info(f"tracemalloc started ({settings.MEMORY_TRACEMALLOC_FRAMES} frame(s))")
+    _sampler = asyncio.create_task(_sample_loop())
+
+
+async def stop_memory_profiler() -> None:
+    """Stop sampling and tracemalloc (call at shutdown)"""
+    global _sampler
+    if _sampler is not None:
+        _sampler.cancel()
+        try:
+            await _sampler
+        except asyncio.CancelledError:
+            pass
+        _sampler = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
@@ -0,0 +1,515 @@
+# backend/app/core/metrics.py
+"""
+Prometheus metrics in OpenMetrics text format.
+
+Each worker keeps its own counters, gauges and histograms. Snapshots are
+JSON-serializable and merge exactly (counters and histogram buckets add up,
+gauges are summed or maxed per metric), so a scrape of any worker can
+report the whole deployment:
+
+- every worker publishes its snapshot to the cache (metrics:worker:<id>,
+  expiring after a few publish intervals);
+- /metrics merges the live local snapshot with the other workers' ones.
+
+With the in-memory cache (single worker) only the local snapshot is used.
+Counters of a stopped worker disappear with its snapshot (withdrawn at
+shutdown, or expired after a crash), which Prometheus handles as a reset.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.routing import replace_params
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+WORKER_KEY_PREFIX = "metrics:worker:"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OPENAI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+# Label values of unmatched routes are grouped to bound cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _label_key(labelnames: Sequence[str], labels: Dict[str, str]) -> str:
+    return json.dumps([str(labels.get(name, "")) for name in labelnames])
+
+
+class Metric:
+    """Base class: one metric family with fixed label names"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[str, object] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labels": list(self.labelnames),
+            "samples": dict(self._values),
+        }
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels) -> None:
+        """Mirror a running total kept elsewhere (collected at snapshot time)"""
+        self._values[_label_key(self.labelnames, labels)] = float(value)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), aggregate: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self.aggregate = aggregate
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_label_key(self.labelnames, labels)] = float(value)
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["aggregate"] = self.aggregate
+        return data
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        sample = self._values.get(key)
+        if sample is None:
+            # Per-bucket counts (not cumulative) + the +Inf bucket
+            sample = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        sample["counts"][index] += 1
+        sample["sum"] += value
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        data["samples"] = {key: {"counts": list(s["counts"]), "sum": s["sum"]} for key, s in self._values.items()}
+        return data
+
+
+class MetricsRegistry:
+    """Metric families of this worker, plus collectors run before each snapshot"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), aggregate: str = "sum") -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, aggregate))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = HTTP_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a function updating gauges/counters from other components"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """
+    Merge worker snapshots: counters and histograms add up, gauges use their
+    aggregate ("sum" or "max"). Families are kept in first-seen order.
+    """
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**family, "samples": {}}
+            if target.get("buckets") != family.get("buckets"):
+                continue
+            samples = target["samples"]
+            for key, value in family["samples"].items():
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = {"counts": list(value["counts"]), "sum": value["sum"]} \
+                        if family["type"] == "histogram" else value
+                elif family["type"] == "histogram":
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                elif family["type"] == "gauge" and family.get("aggregate") == "max":
+                    samples[key] = max(current, value)
+                else:
+                    samples[key] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_openmetrics(snapshot: dict) -> str:
+    """Render a (merged) snapshot in the OpenMetrics text format"""
+    lines = []
+    for name, family in snapshot.items():
+        kind = family["type"]
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        labelnames = family["labels"]
+        for key in sorted(family["samples"]):
+            value = family["samples"][key]
+            labelvalues = json.loads(key)
+            if kind == "counter":
+                lines.append(f"{name}_total{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+            elif kind == "gauge":
+                lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+            else:
+                cumulative = 0
+                bounds = [repr(float(b)) for b in family["buckets"]] + ["+Inf"]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labelvalues, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labelvalues)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labelvalues)} {_format_value(value['sum'])}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+# ===================
+# Application metrics
+# ===================
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+    HTTP_BUCKETS
+)
+openai_request_duration = registry.histogram(
+    "openai_request_duration_seconds",
+    "OpenAI API call latency by operation",
+    ("operation", "outcome"),
+    OPENAI_BUCKETS
+)
+openai_tokens = registry.counter(
+    "openai_tokens",
+    "OpenAI tokens used by operation",
+    ("operation", "kind")
+)
+cache_requests = registry.counter(
+    "cache_requests",
+    "@cached lookups by prefix, tier (l1 in-process, l2 shared) and result",
+    ("prefix", "tier", "result")
+)
+circuit_breaker_state = registry.gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open; worst worker)",
+    ("breaker",),
+    aggregate="max"
+)
+circuit_breaker_failures = registry.counter(
+    "circuit_breaker_failures",
+    "Failed calls through the circuit breaker",
+    ("breaker",)
+)
+chat_sessions_active = registry.gauge(
+    "chat_sessions_active",
+    "Chatbot sessions held in memory"
+)
+sav_tickets_active = registry.gauge(
+    "sav_tickets_active",
+    "SAV tickets held in memory by the workflow engine"
+)
+metrics_workers = registry.gauge(
+    "metrics_workers",
+    "Workers included in this scrape"
+)
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _collect_circuit_breakers() -> None:
+    from app.core.circuit_breaker import get_circuit_stats
+
+    for name, stats in get_circuit_stats().items():
+        circuit_breaker_state.set(_BREAKER_STATES.get(stats["state"], 0), breaker=name)
+        circuit_breaker_failures.set_total(stats["total_failures"], breaker=name)
+
+
+def _collect_in_memory_state() -> None:
+    from app.api.endpoints.chat import chatbot_instances
+    from app.services.sav_workflow_engine import sav_workflow_engine
+
+    chat_sessions_active.set(len(chatbot_instances))
+    sav_tickets_active.set(len(sav_workflow_engine.active_tickets))
+
+
+registry.add_collector(_collect_circuit_breakers)
+registry.add_collector(_collect_in_memory_state)
+
+
+class OpenAICall:
+    """Outcome and token usage of one tracked OpenAI call"""
+
+    __slots__ = ("operation", "outcome")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.outcome = "success"
+
+    def record_usage(self, response) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        for kind in ("prompt_tokens", "completion_tokens"):
+            count = getattr(usage, kind, None)
+            if count:
+                openai_tokens.inc(count, operation=self.operation, kind=kind.split("_")[0])
+
+
+@contextmanager
+def track_openai(operation: str):
+    """
+    Time an OpenAI call and count its tokens.
+
+        with track_openai("chat") as call:
+            resp = await breaker.call(...)
+            call.record_usage(resp)
+    """
+    from app.core.circuit_breaker import CircuitBreakerError
+
+    call = OpenAICall(operation)
+    start = time.perf_counter()
+    try:
+        yield call
+    except CircuitBreakerError:
+        call.outcome = "circuit_open"
+        raise
+    except BaseException:
+        call.outcome = "error"
+        raise
+    finally:
+        openai_request_duration.observe(time.perf_counter() - start, operation=operation, outcome=call.outcome)
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/tickets/{ticket_id}.
+    route.path_format lacks the prefixes of enclosing routers and mounts: they
+    are the part of the path before the one the route matched, which is
+    rebuilt from the format and the path parameters.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return UNMATCHED_ROUTE
+
+    path = scope["path"]
+    try:
+        matched, _ = replace_params(path_format, route.param_convertors, dict(scope.get("path_params", {})))
+    except (AssertionError, KeyError, ValueError):
+        matched = None
+    if matched is None or not path.endswith(matched):
+        # Parameter not written back as received (e.g. /01 for an int): prefix unknown
+        return path_format
+    return path[:len(path) - len(matched)] + path_format
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template
+    (until the response is complete).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=_route_template(scope),
+                status=str(status_code)
+            )
+
+
+# ===================
+# Cross-worker aggregation
+# ===================
+
+def _is_shared_cache(cache) -> bool:
+    from app.core.redis import MemoryCache
+    return not isinstance(cache, MemoryCache)
+
+
+async def publish_snapshot(snapshot: Optional[dict] = None) -> None:
+    """Store this worker's snapshot for the other workers' scrapes"""
+    from app.core.redis import get_cache, cache_set_json
+
+    if not _is_shared_cache(get_cache()):
+        return
+    await cache_set_json(
+        f"{WORKER_KEY_PREFIX}{WORKER_ID}",
+        snapshot if snapshot is not None else registry.snapshot(),
+        expire=settings.METRICS_PUBLISH_INTERVAL * 3
+    )
+
+
+async def collect_all_workers() -> dict:
+    """Merged snapshot of this worker (live) and the other workers (last published)"""
+    from app.core.redis import get_cache, cache_get_many_json
+
+    local = registry.snapshot()
+    snapshots = [local]
+
+    try:
+        cache = get_cache()
+        if _is_shared_cache(cache):
+            await publish_snapshot(local)
+            own_key = f"{WORKER_KEY_PREFIX}{WORKER_ID}"
+            keys = [
+                key.decode() if isinstance(key, bytes) else key
+                for key in await cache.keys(f"{WORKER_KEY_PREFIX}*")
+            ]
+            others = [key for key in keys if key != own_key]
+            snapshots.extend(snapshot for snapshot in await cache_get_many_json(others) if snapshot)
+    except Exception as e:
+        logger.warning(f"Could not read other workers' metrics: {e}")
+
+    merged = merge_snapshots(snapshots)
+    merged["metrics_workers"]["samples"] = {_label_key((), {}): float(len(snapshots))}
+    return merged
+
+
+_publisher: Optional[asyncio.Task] = None
+
+
+async def _publish_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_PUBLISH_INTERVAL)
+        try:
+            await publish_snapshot()
+        except Exception as e:
+            logger.warning(f"Metrics publish failed: {e}")
+
+
+def start_metrics_publisher() -> None:
+    """Publish this worker's snapshot periodically (call at startup, after the cache)"""
+    global _publisher
+    if _publisher is None:
+        _publisher = asyncio.create_task(_publish_loop())
+
+
+async def stop_metrics_publisher() -> None:
+    """Stop publishing and withdraw this worker's snapshot (call at shutdown)"""
+    global _publisher
+    if _publisher is not None:
+        _publisher.cancel()
+        try:
+            await _publisher
+        except asyncio.CancelledError:
+            pass
+        _publisher = None
+
+    try:
+        from app.core.redis import get_cache
+        cache = get_cache()
+        if _is_shared_cache(cache):
+            await cache.delete(f"{WORKER_KEY_PREFIX}{WORKER_ID}")
+    except Exception as e:
+        logger.warning(f"Could not withdraw metrics snapshot: {e}")
+
+
+def setup_metrics(app):
+    """
+    Setup request metrics.
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not settings.METRICS_ENABLED:
+        return
+
+    app.add_middleware(MetricsMiddleware)
+    logger.info(f"Metrics enabled (worker {WORKER_ID}, publish every {settings.METRICS_PUBLISH_INTERVAL}s)")
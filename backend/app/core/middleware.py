@@ -5,42 +5,44 @@ Security middleware for headers, request validation, and logging
 import time
 import uuid
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import MutableHeaders, URL
+from starlette.responses import RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.request_limits import client_host, get_header
 
 logger = logging.getLogger(__name__)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Middleware to add security headers to all responses.
     Similar to helmet.js for Node.js.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
         # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        headers = {
+            "X-Content-Type-Options": "nosniff",
+            "X-Frame-Options": "DENY",
+            "X-XSS-Protection": "1; mode=block",
+            "Referrer-Policy": "strict-origin-when-cross-origin",
+            "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+        }
 
         # Strict Transport Security (HSTS) in production
         # - max-age=63072000 (2 years) - tells browsers to always use HTTPS
         # - includeSubDomains - applies to all subdomains
         # - preload - eligible for browser preload lists
         if not settings.DEBUG:
-            response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains; preload"
+            headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains; preload"
 
         # Content Security Policy (relaxed for API)
         if not settings.DEBUG:
-            response.headers["Content-Security-Policy"] = (
+            headers["Content-Security-Policy"] = (
                 "default-src 'self'; "
                 "script-src 'self' 'unsafe-inline'; "
                 "style-src 'self' 'unsafe-inline'; "
@@ -49,123 +51,131 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 "connect-src 'self' https:;"
             )
 
-        # Ensure Set-Cookie headers have Secure flag in production
-        if not settings.DEBUG:
-            set_cookie = response.headers.get("set-cookie")
-            if set_cookie and "Secure" not in set_cookie:
-                # Add Secure flag to cookies in production
-                if not set_cookie.endswith(";"):
-                    set_cookie += ";"
-                set_cookie += " Secure; HttpOnly; SameSite=Strict"
-                response.headers["set-cookie"] = set_cookie
-
-        return response
-
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+        self.headers = list(headers.items())
+        self.secure_cookies = not settings.DEBUG
+
+    @staticmethod
+    def _secure_cookie(value: str) -> str:
+        if "Secure" in value:
+            return value
+        if not value.endswith(";"):
+            value += ";"
+        return value + " Secure; HttpOnly; SameSite=Strict"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self.headers:
+                    headers[name] = value
+
+                # Ensure Set-Cookie headers have Secure flag in production
+                if self.secure_cookies:
+                    message["headers"] = [
+                        (name, self._secure_cookie(value.decode("latin-1")).encode("latin-1"))
+                        if name == b"set-cookie" else (name, value)
+                        for name, value in message["headers"]
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class RequestLoggingMiddleware:
     """
     Middleware to log all requests with timing information.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Generate request ID
-        request_id = str(uuid.uuid4())[:8]
-        request.state.request_id = request_id
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate request ID (read back as request.state.request_id)
+        request_id = uuid.uuid4().hex[:8]
+        scope.setdefault("state", {})["request_id"] = request_id
 
         # Start timing
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Get client info
-        client_ip = request.headers.get("X-Forwarded-For", request.client.host if request.client else "unknown")
+        client_ip = get_header(scope, b"x-forwarded-for") or client_host(scope)
         if "," in client_ip:
             client_ip = client_ip.split(",")[0].strip()
 
-        # Log request
-        logger.info(
-            f"[{request_id}] {request.method} {request.url.path} - Client: {client_ip}"
-        )
+        method = scope["method"]
+        path = scope["path"]
 
-        try:
-            response = await call_next(request)
-
-            # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
+        # Log request
+        logger.info(f"[{request_id}] {method} {path} - Client: {client_ip}")
 
-            # Log response
-            logger.info(
-                f"[{request_id}] {request.method} {request.url.path} - "
-                f"Status: {response.status_code} - Duration: {duration_ms:.2f}ms"
-            )
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                duration_ms = (time.perf_counter() - start_time) * 1000
 
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+                # Log response
+                logger.info(
+                    f"[{request_id}] {method} {path} - "
+                    f"Status: {message['status']} - Duration: {duration_ms:.2f}ms"
+                )
 
-            return response
+                # Add request ID to response headers
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.perf_counter() - start_time) * 1000
             logger.error(
-                f"[{request_id}] {request.method} {request.url.path} - "
+                f"[{request_id}] {method} {path} - "
                 f"Error: {str(e)} - Duration: {duration_ms:.2f}ms"
             )
             raise
 
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware to limit request body size.
-    """
-
-    def __init__(self, app: ASGIApp, max_size: int = 10 * 1024 * 1024):  # 10MB default
-        super().__init__(app)
-        self.max_size = max_size
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Check content-length header
-        content_length = request.headers.get("content-length")
-        if content_length:
-            if int(content_length) > self.max_size:
-                from fastapi.responses import JSONResponse
-                return JSONResponse(
-                    status_code=413,
-                    content={
-                        "success": False,
-                        "error": "request_too_large",
-                        "detail": f"Request body too large. Maximum size is {self.max_size // (1024*1024)}MB"
-                    }
-                )
-
-        return await call_next(request)
-
-
-class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
+class HTTPSRedirectMiddleware:
     """
     Middleware to redirect HTTP requests to HTTPS in production.
     Only applies when ENFORCE_HTTPS is enabled.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip redirect if HTTPS enforcement is disabled or already HTTPS
-        if not settings.ENFORCE_HTTPS:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip redirect if HTTPS enforcement is disabled or not an HTTP request
+        if scope["type"] != "http" or not settings.ENFORCE_HTTPS:
+            await self.app(scope, receive, send)
+            return
 
         # Check if request is HTTP (not HTTPS)
         # In production behind a proxy, check X-Forwarded-Proto header
-        forwarded_proto = request.headers.get("X-Forwarded-Proto", "")
+        forwarded_proto = get_header(scope, b"x-forwarded-proto") or ""
         is_https = (
-            request.url.scheme == "https" or
+            scope.get("scheme") == "https" or
             forwarded_proto.lower() == "https"
         )
 
         if not is_https:
             # Redirect to HTTPS version
-            from fastapi.responses import RedirectResponse
-            https_url = str(request.url).replace("http://", "https://", 1)
-            logger.info(f"🔒 Redirecting HTTP to HTTPS: {request.url.path}")
-            return RedirectResponse(url=https_url, status_code=301)
+            url = URL(scope=scope)
+            https_url = str(url).replace("http://", "https://", 1)
+            logger.info(f"🔒 Redirecting HTTP to HTTPS: {scope['path']}")
+            response = RedirectResponse(url=https_url, status_code=301)
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
 
 class TrustedHostMiddleware:
@@ -202,9 +212,7 @@ def setup_security_middleware(app):
         app: FastAPI application instance
     """
     # Add middleware in reverse order (last added = first executed)
-
-    # Request size limit
-    app.add_middleware(RequestSizeLimitMiddleware, max_size=settings.MAX_FILE_SIZE)
+    # Request size limits are set up in app.core.request_limits
 
     # Request logging
     app.add_middleware(RequestLoggingMiddleware)
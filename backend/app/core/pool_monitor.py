@@ -0,0 +1,256 @@
+# backend/app/core/pool_monitor.py
+"""
+Connection pool monitoring.
+Tracks checkouts, overflow, checkout wait times, connection age and recycles
+through SQLAlchemy pool events, to tell pool starvation apart from slow SQL.
+"""
+import bisect
+import contextvars
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Checkout wait histogram bucket upper bounds (milliseconds)
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Key used to stamp connection records with their creation time
+_CREATED_AT_KEY = "pool_monitor_created_at"
+
+# Set while inside the outermost _do_get call (QueuePool._do_get may recurse)
+_in_checkout: contextvars.ContextVar[bool] = contextvars.ContextVar("pool_monitor_in_checkout", default=False)
+
+
+class PoolMonitor:
+    """
+    SQLAlchemy pool event listener collecting pool telemetry.
+    """
+
+    def __init__(self, wait_warning_ms: int = 0, recycle_seconds: int = -1):
+        """
+        Initialize pool monitor.
+
+        Args:
+            wait_warning_ms: Log a warning when a checkout waits longer than this (0 disables)
+            recycle_seconds: Pool recycle setting, used to classify closes as recycles
+        """
+        self.wait_warning_ms = wait_warning_ms
+        self.recycle_seconds = recycle_seconds
+        self.engine: Optional[Engine] = None
+
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.recycles = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.slow_waits = 0
+
+        self.closed_connection_age_total = 0.0
+        self._live: Dict[int, float] = {}
+
+    def record_wait(self, wait_ms: float):
+        """Record the time spent waiting for a pooled connection."""
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+        self.wait_count += 1
+        self.total_wait_ms += wait_ms
+        if wait_ms > self.max_wait_ms:
+            self.max_wait_ms = wait_ms
+
+        if self.wait_warning_ms and wait_ms > self.wait_warning_ms:
+            self.slow_waits += 1
+            logger.warning(
+                f"SLOW POOL CHECKOUT [{wait_ms:.2f}ms] "
+                f"(threshold: {self.wait_warning_ms}ms) - "
+                f"checked out: {self._checked_out()}, overflow: {self._overflow()}"
+            )
+
+    def connect(self, dbapi_connection: Any, connection_record: Any):
+        """New DBAPI connection created by the pool."""
+        self.connects += 1
+        now = time.time()
+        connection_record.info[_CREATED_AT_KEY] = now
+        self._live[id(connection_record)] = now
+
+    def checkout(self, dbapi_connection: Any, connection_record: Any, connection_proxy: Any):
+        """Connection checked out from the pool."""
+        self.checkouts += 1
+        checked_out = self._checked_out()
+        if checked_out > self.peak_checked_out:
+            self.peak_checked_out = checked_out
+
+    def checkin(self, dbapi_connection: Any, connection_record: Any):
+        """Connection returned to the pool."""
+        self.checkins += 1
+
+    def close(self, dbapi_connection: Any, connection_record: Any):
+        """DBAPI connection closed (recycle, invalidation, overflow or dispose)."""
+        self.closes += 1
+        created_at = self._live.pop(id(connection_record), None)
+        if created_at is None:
+            created_at = connection_record.info.get(_CREATED_AT_KEY)
+        if created_at is not None:
+            age = time.time() - created_at
+            self.closed_connection_age_total += age
+            if self.recycle_seconds > 0 and age >= self.recycle_seconds:
+                self.recycles += 1
+
+    def invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Optional[BaseException]):
+        """Connection invalidated (e.g. failed pre-ping)."""
+        self.invalidations += 1
+
+    @property
+    def pool(self):
+        """Current pool of the monitored engine (dispose() replaces it)."""
+        return self.engine.pool if self.engine is not None else None
+
+    def _checked_out(self) -> int:
+        checkedout = getattr(self.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def _overflow(self) -> int:
+        overflow = getattr(self.pool, "overflow", None)
+        return max(overflow(), 0) if overflow else 0
+
+    def get_stats(self) -> dict:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with pool statistics
+        """
+        now = time.time()
+        ages = [now - created for created in self._live.values()]
+
+        histogram = {}
+        cumulative = 0
+        for bound, count in zip(WAIT_BUCKETS_MS + ["+Inf"], self.wait_buckets):
+            cumulative += count
+            histogram[f"le_{bound}"] = cumulative
+
+        size = getattr(self.pool, "size", None)
+        checkedin = getattr(self.pool, "checkedin", None)
+
+        return {
+            "pool_class": type(self.pool).__name__ if self.pool is not None else None,
+            "pool_size": size() if size else None,
+            "max_overflow": getattr(self.pool, "_max_overflow", None),
+            "checked_out": self._checked_out(),
+            "checked_in": checkedin() if checkedin else None,
+            "overflow_in_use": self._overflow(),
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "closes": self.closes,
+            "recycles": self.recycles,
+            "invalidations": self.invalidations,
+            "checkout_wait": {
+                "count": self.wait_count,
+                "average_ms": round(self.total_wait_ms / self.wait_count, 3) if self.wait_count else 0,
+                "max_ms": round(self.max_wait_ms, 3),
+                "warning_threshold_ms": self.wait_warning_ms or None,
+                "slow_waits": self.slow_waits,
+                "histogram_ms": histogram
+            },
+            "connection_age_seconds": {
+                "live_connections": len(ages),
+                "oldest": round(max(ages), 1) if ages else 0,
+                "average": round(sum(ages) / len(ages), 1) if ages else 0,
+                "average_at_close": round(self.closed_connection_age_total / self.closes, 1) if self.closes else 0,
+                "recycle_after": self.recycle_seconds if self.recycle_seconds > 0 else None
+            }
+        }
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that reports checkout wait time to the pool monitor.
+    SQLAlchemy has no event before a checkout starts waiting, so the wait is
+    timed around _do_get, and only when the checkout is going to block: a
+    checkout that opens a new connection is connect time, not pool wait.
+    """
+
+    def _checkout_blocks(self) -> bool:
+        """Mirror QueuePool._do_get: it waits only with no idle connection and no overflow left."""
+        overflow_exhausted = self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        return overflow_exhausted and self.checkedin() == 0
+
+    def _do_get(self):
+        if _in_checkout.get() or not self._checkout_blocks():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _in_checkout.reset(token)
+            if _pool_monitor is not None:
+                _pool_monitor.record_wait((time.perf_counter() - start) * 1000)
+
+
+# Global pool monitor instance
+_pool_monitor: PoolMonitor = None
+
+
+def setup_pool_monitoring(engine: Engine | AsyncEngine, wait_warning_ms: int = None):
+    """
+    Setup pool monitoring for a SQLAlchemy engine.
+
+    Args:
+        engine: SQLAlchemy engine (sync or async)
+        wait_warning_ms: Optional threshold override (uses config default if not provided)
+    """
+    global _pool_monitor
+
+    if wait_warning_ms is None:
+        wait_warning_ms = settings.POOL_WAIT_WARNING_MS
+
+    target_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+    if _pool_monitor is not None and _pool_monitor.engine is target_engine:
+        return
+
+    _pool_monitor = PoolMonitor(
+        wait_warning_ms=wait_warning_ms,
+        recycle_seconds=getattr(target_engine.pool, "_recycle", -1)
+    )
+    _pool_monitor.engine = target_engine
+
+    # Register pool event listeners (propagate to pools recreated by dispose())
+    for name in ("connect", "checkout", "checkin", "close", "invalidate"):
+        event.listen(target_engine, name, getattr(_pool_monitor, name))
+
+    logger.info(
+        f"Pool monitoring enabled ({type(target_engine.pool).__name__}, "
+        f"wait warning: {wait_warning_ms}ms)" if wait_warning_ms else
+        f"Pool monitoring enabled ({type(target_engine.pool).__name__})"
+    )
+
+
+def get_pool_stats() -> dict:
+    """
+    Get current pool statistics.
+
+    Returns:
+        Dictionary with pool statistics, or an error if monitoring not initialized
+    """
+    if _pool_monitor is None:
+        return {"error": "Pool monitor not initialized"}
+
+    return _pool_monitor.get_stats()
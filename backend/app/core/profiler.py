@@ -0,0 +1,436 @@
+# backend/app/core/profiler.py
+"""
+On-demand sampling profiler.
+
+A daemon thread wakes every `interval` and records the Python stack of the
+event loop thread (sys._current_frames), so nothing is instrumented and
+the profiled code runs unmodified. Stacks are aggregated in the collapsed
+format ("frame;frame;frame count") read by flamegraph.pl and speedscope.
+
+Two modes, one session at a time per worker:
+
+    profile = await profile_for(10)                       # whole worker
+    capture = arm_request_capture("/api/chat/", count=5)  # next K requests
+
+In request mode a sample is only kept when the task running on the loop is
+one of the matching requests (work they hand to other tasks or threads is
+not attributed). Overhead is bounded by a minimum interval, a cap on
+duration, stack depth and distinct stacks, and by backing off the sampling
+rate when sampling costs more than PROFILER_MAX_OVERHEAD of the loop.
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL_MS = 5
+MAX_INTERVAL_MS = 200
+MAX_STACK_DEPTH = 128
+MAX_DISTINCT_STACKS = 5000
+TRUNCATED_STACK = "[truncated]"
+OTHER_STACK = "[other]"
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profiling session is already running in this worker"""
+
+
+# ============== Frame labels ==============
+
+_path_prefixes = sorted(
+    {os.path.abspath(p or os.curdir) + os.sep for p in sys.path if os.path.isdir(p or os.curdir)},
+    key=len,
+    reverse=True
+)
+_labels: Dict[object, str] = {}
+
+
+def short_path(filename: str) -> str:
+    """Source path relative to its sys.path entry (app/core/x.py, fastapi/routing.py)"""
+    for prefix in _path_prefixes:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_label(code) -> str:
+    """`module/path.py:qualname` for a code object (cached)"""
+    label = _labels.get(code)
+    if label is None:
+        label = f"{short_path(code.co_filename)}:{code.co_qualname}"
+        if len(_labels) < 50_000:
+            _labels[code] = label
+    return label
+
+
+def _is_idle(frame) -> bool:
+    """True when the loop thread is waiting in the selector"""
+    code = frame.f_code
+    return code.co_name in ("select", "poll") and code.co_filename.endswith("selectors.py")
+
+
+def collapse_stack(frame) -> str:
+    """`root;...;leaf` labels of a frame and its callers"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    if frame is not None:
+        names.append(TRUNCATED_STACK)
+    names.reverse()
+    return ";".join(names)
+
+
+# ============== Profile ==============
+
+class Profile:
+    """Aggregated samples of one profiling session"""
+
+    def __init__(self, interval_ms: float):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.interval_ms = interval_ms
+        self.sampling_time = 0.0
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+
+    def add(self, stack: str) -> None:
+        if stack not in self.stacks and len(self.stacks) >= MAX_DISTINCT_STACKS:
+            stack = OTHER_STACK
+        self.stacks[stack] += 1
+        self.samples += 1
+
+    def to_collapsed(self) -> str:
+        """Collapsed stacks, one `frame;frame count` line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 30) -> List[dict]:
+        """Functions by self samples (leaf) and total samples (anywhere on the stack)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return [
+            {
+                "function": name,
+                "self_samples": own[name],
+                "total_samples": total[name],
+                "self_percent": round(100 * own[name] / self.samples, 1) if self.samples else 0
+            }
+            for name, _ in own.most_common(limit)
+        ]
+
+    def to_dict(self, limit: int = 30) -> dict:
+        duration = self.duration or time.perf_counter() - self.start
+        return {
+            "started_at": self.started_at,
+            "duration_s": round(duration, 3),
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "distinct_stacks": len(self.stacks),
+            "overhead_percent": round(100 * self.sampling_time / duration, 2) if duration else 0,
+            "top_functions": self.top_functions(limit),
+            "collapsed": self.to_collapsed()
+        }
+
+
+# ============== Sampler ==============
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a daemon thread.
+
+    Args:
+        thread_id: Thread to sample (the event loop thread)
+        interval_ms: Sampling interval (clamped to MIN_INTERVAL_MS..MAX_INTERVAL_MS)
+        max_seconds: Hard stop
+        include_idle: Record samples where the loop waits for I/O
+        loop: Event loop whose current task is checked against `tasks`
+        tasks: When set, only sample while one of these tasks is running
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval_ms: float,
+        max_seconds: float,
+        include_idle: bool = False,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        tasks: Optional[Set[asyncio.Task]] = None
+    ):
+        self.thread_id = thread_id
+        self.interval = min(max(interval_ms, MIN_INTERVAL_MS), MAX_INTERVAL_MS) / 1000
+        self.max_seconds = max_seconds
+        self.include_idle = include_idle
+        self.loop = loop
+        self.tasks = tasks
+        self.profile = Profile(interval_ms=self.interval * 1000)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> Profile:
+        self._stop.set()
+        if wait and self._thread.is_alive():
+            self._thread.join()
+        return self.profile
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        profile = self.profile
+        deadline = profile.start + self.max_seconds
+        ticks = 0
+
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if self.tasks is not None and (
+                not self.tasks or asyncio.current_task(self.loop) not in self.tasks
+            ):
+                continue
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            if _is_idle(frame):
+                profile.idle_samples += 1
+                if self.include_idle:
+                    profile.add("[idle]")
+            else:
+                profile.add(collapse_stack(frame))
+            del frame
+
+            ticks += 1
+            profile.sampling_time += time.perf_counter() - now
+            # Back off when sampling costs more than the overhead budget
+            if (
+                ticks % 50 == 0
+                and profile.sampling_time / ticks > self.interval * settings.PROFILER_MAX_OVERHEAD
+                and self.interval < MAX_INTERVAL_MS / 1000
+            ):
+                self.interval = min(self.interval * 2, MAX_INTERVAL_MS / 1000)
+                profile.interval_ms = self.interval * 1000
+                logger.warning(f"Profiler sampling too costly, interval raised to {profile.interval_ms:.0f}ms")
+
+        profile.duration = time.perf_counter() - profile.start
+
+
+# ============== Sessions ==============
+
+_session_lock = threading.Lock()
+_active_sampler: Optional[StackSampler] = None
+
+
+def _acquire(sampler: StackSampler) -> None:
+    global _active_sampler
+    with _session_lock:
+        if _active_sampler is not None and _active_sampler.running:
+            raise ProfilerBusyError("A profiling session is already running in this worker")
+        _active_sampler = sampler
+        sampler.start()
+
+
+async def profile_for(seconds: float, interval_ms: Optional[float] = None, include_idle: bool = False) -> Profile:
+    """
+    Sample the event loop thread for `seconds`.
+
+    Raises:
+        ProfilerBusyError: another session is running in this worker
+    """
+    # The profiling request itself must finish before the request timeout
+    seconds = min(max(seconds, 0.1), settings.PROFILER_MAX_SECONDS, settings.REQUEST_TIMEOUT - 1)
+    sampler = StackSampler(
+        threading.get_ident(),
+        interval_ms or settings.PROFILER_INTERVAL_MS,
+        max_seconds=seconds,
+        include_idle=include_idle
+    )
+    _acquire(sampler)
+    logger.info(f"Profiling worker {os.getpid()} for {seconds:.1f}s")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(sampler.stop)
+    return sampler.profile
+
+
+def compile_route_pattern(route: str) -> re.Pattern:
+    """
+    `/api/tickets/{ticket_id}` matches one path segment per parameter,
+    a trailing `*` matches any suffix.
+    """
+    prefix = route.endswith("*")
+    parts = re.split(r"(\{[^}/]+\})", route.rstrip("*"))
+    regex = "".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts)
+    return re.compile(regex + (".*" if prefix else ""))
+
+
+class RequestCapture:
+    """Profiles the next `count` HTTP requests whose path matches `route`"""
+
+    def __init__(self, route: str, count: int, method: Optional[str], timeout: float, interval_ms: float):
+        self.route = route
+        self.pattern = compile_route_pattern(route)
+        self.method = method.upper() if method else None
+        self.count = count
+        self.timeout = timeout
+        self.claimed = 0
+        self.completed = 0
+        self.request_times_ms: List[float] = []
+        self.tasks: Set[asyncio.Task] = set()
+        self.cancelled = False
+        self.sampler = StackSampler(
+            threading.get_ident(),
+            interval_ms,
+            max_seconds=timeout,
+            loop=asyncio.get_running_loop(),
+            tasks=self.tasks
+        )
+
+    @property
+    def profile(self) -> Profile:
+        return self.sampler.profile
+
+    @property
+    def status(self) -> str:
+        if self.cancelled:
+            return "cancelled"
+        if self.completed >= self.count:
+            return "done"
+        if not self.sampler.running:
+            return "expired"
+        return "waiting" if self.claimed < self.count else "running"
+
+    def matches(self, scope: Scope) -> bool:
+        return (
+            self.claimed < self.count
+            and self.sampler.running
+            and (self.method is None or scope["method"] == self.method)
+            and self.pattern.fullmatch(scope["path"]) is not None
+        )
+
+    def request_started(self, task: asyncio.Task) -> None:
+        self.claimed += 1
+        self.tasks.add(task)
+
+    def request_finished(self, task: asyncio.Task, duration_ms: float) -> None:
+        self.tasks.discard(task)
+        self.completed += 1
+        self.request_times_ms.append(round(duration_ms, 2))
+        if self.completed >= self.count:
+            self.sampler.stop(wait=False)
+            logger.info(f"Request profile of {self.route} complete ({self.completed} requests)")
+
+    def to_dict(self, limit: int = 30) -> dict:
+        return {
+            "route": self.route,
+            "method": self.method,
+            "status": self.status,
+            "requested": self.count,
+            "completed": self.completed,
+            "request_times_ms": self.request_times_ms,
+            "profile": self.profile.to_dict(limit)
+        }
+
+
+_capture: Optional[RequestCapture] = None
+
+
+def arm_request_capture(
+    route: str,
+    count: int,
+    method: Optional[str] = None,
+    timeout: Optional[float] = None,
+    interval_ms: Optional[float] = None
+) -> RequestCapture:
+    """
+    Profile the next `count` requests matching `route` (must run on the event loop).
+
+    Raises:
+        ProfilerBusyError: another session is running in this worker
+    """
+    global _capture
+    capture = RequestCapture(
+        route,
+        count=min(max(count, 1), settings.PROFILER_MAX_REQUESTS),
+        method=method,
+        timeout=min(timeout or settings.PROFILER_CAPTURE_TIMEOUT, settings.PROFILER_CAPTURE_TIMEOUT),
+        interval_ms=interval_ms or settings.PROFILER_INTERVAL_MS
+    )
+    _acquire(capture.sampler)
+    _capture = capture
+    logger.info(f"Profiling next {capture.count} requests matching {route} in worker {os.getpid()}")
+    return capture
+
+
+def get_request_capture() -> Optional[RequestCapture]:
+    return _capture
+
+
+def cancel_request_capture() -> Optional[RequestCapture]:
+    capture = _capture
+    if capture is not None and capture.sampler.running:
+        capture.cancelled = True
+        capture.sampler.stop(wait=False)
+    return capture
+
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware marking requests selected by an armed RequestCapture.
+    Costs one global lookup per request when no capture is armed.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        capture = _capture
+        if capture is None or scope["type"] != "http" or not capture.matches(scope):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        capture.request_started(task)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            capture.request_finished(task, (time.perf_counter() - start) * 1000)
+
+
+def setup_profiler(app):
+    """
+    Setup the on-demand profiler (request capture middleware).
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not settings.PROFILER_ENABLED:
+        return
+
+    app.add_middleware(ProfilerMiddleware)
+    logger.info("On-demand profiler enabled (admin only)")
@@ -0,0 +1,261 @@
+# backend/app/core/pubsub.py
+"""
+Publish/subscribe broker for cross-worker notifications.
+Uses Redis pub/sub in production, with an in-process fallback for memory://.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Default per-subscriber buffer; slow consumers lose the oldest messages
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    Local subscription to a channel.
+    Messages are buffered in a bounded queue; iterate with `async for`.
+    """
+
+    def __init__(self, broker: 'PubSubBroker', channel: str, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        """Put a message in the queue, dropping the oldest if full."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next message (None on timeout)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    async def close(self) -> None:
+        await self.broker.unsubscribe(self)
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+class PubSubBroker:
+    """
+    In-process broker: messages are fanned out to local subscriptions only.
+    Suitable for development and single-worker deployments.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    def _fan_out(self, channel: str, message: Dict[str, Any]) -> int:
+        subscriptions = self._subscriptions.get(channel, ())
+        for subscription in list(subscriptions):
+            subscription._deliver(message)
+        return len(subscriptions)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        """
+        Publish a JSON-serializable message.
+
+        Returns:
+            Number of local subscribers that received it
+        """
+        return self._fan_out(channel, message)
+
+    async def subscribe(self, channel: str, maxsize: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        """Subscribe to a channel."""
+        subscription = Subscription(self, channel, maxsize)
+        self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        subscriptions = self._subscriptions.get(subscription.channel)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        """Number of local subscribers on a channel."""
+        return len(self._subscriptions.get(channel, ()))
+
+    async def close(self) -> None:
+        self._subscriptions.clear()
+
+
+class RedisPubSubBroker(PubSubBroker):
+    """
+    Redis-backed broker.
+    Each worker holds one Redis subscription per channel and fans messages out
+    to its local subscriptions, so every worker sees every message.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        self._url = url
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        # Incremented whenever the listener fails; messages may have been missed
+        self.listener_errors = 0
+
+    async def _get_client(self):
+        """Lazy initialization of Redis client."""
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(
+                self._url,
+                encoding="utf-8",
+                decode_responses=True,
+                socket_connect_timeout=5.0,
+                retry_on_timeout=True,
+            )
+        return self._client
+
+    async def _ensure_listener(self) -> None:
+        if self._pubsub is None:
+            client = await self._get_client()
+            self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Read Redis messages and fan them out locally."""
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                try:
+                    payload = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring non-JSON pub/sub message on {message.get('channel')}")
+                    continue
+                self._fan_out(message["channel"], payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.listener_errors += 1
+                logger.error(f"Redis pub/sub listener error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        try:
+            client = await self._get_client()
+            return await client.publish(channel, json.dumps(message, default=str))
+        except Exception as e:
+            logger.error(f"Redis PUBLISH error: {e}")
+            return 0
+
+    async def subscribe(self, channel: str, maxsize: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        first = channel not in self._subscriptions
+        subscription = await super().subscribe(channel, maxsize)
+        if first:
+            try:
+                await self._ensure_listener()
+                await self._pubsub.subscribe(channel)
+            except Exception as e:
+                logger.error(f"Redis SUBSCRIBE error: {e}")
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        await super().unsubscribe(subscription)
+        if subscription.channel not in self._subscriptions and self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(subscription.channel)
+            except Exception as e:
+                logger.error(f"Redis UNSUBSCRIBE error: {e}")
+
+    async def close(self) -> None:
+        await super().close()
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception as e:
+                logger.error(f"Error closing Redis pub/sub: {e}")
+            self._pubsub = None
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+                logger.info("Redis pub/sub connection closed")
+            except Exception as e:
+                logger.error(f"Error closing Redis pub/sub connection: {e}")
+            self._client = None
+
+
+class PubSubManager:
+    """
+    Singleton pub/sub manager, mirrors CacheManager.
+    """
+
+    _instance: Optional['PubSubManager'] = None
+    _broker: Optional[PubSubBroker] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    @classmethod
+    def initialize(cls, redis_url: str) -> 'PubSubManager':
+        """
+        Initialize the broker for the given Redis URL ('memory://' for in-process).
+        """
+        instance = cls()
+
+        if redis_url.startswith("memory://"):
+            instance._broker = PubSubBroker()
+        else:
+            instance._broker = RedisPubSubBroker(redis_url)
+
+        return instance
+
+    @classmethod
+    def get_broker(cls) -> Optional[PubSubBroker]:
+        """Get the broker, or None if not initialized."""
+        return cls()._broker
+
+    @classmethod
+    async def close(cls):
+        """Close the broker."""
+        instance = cls()
+        if instance._broker:
+            await instance._broker.close()
+            instance._broker = None
+
+
+def get_pubsub() -> Optional[PubSubBroker]:
+    """Get the pub/sub broker (None if not initialized)."""
+    return PubSubManager.get_broker()
@@ -0,0 +1,102 @@
+# backend/app/core/quantile_sketch.py
+"""
+Streaming quantile sketch for latency percentiles.
+Log-bucketed (DDSketch-style): constant memory per order of magnitude,
+quantiles within a fixed relative error, and sketches can be merged.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+
+class QuantileSketch:
+    """
+    Streaming quantile estimator with bounded relative error.
+
+    Values are counted in logarithmic buckets; a quantile is reported as the
+    midpoint of its bucket, so it is within `relative_accuracy` of the true value.
+    """
+
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "_bins",
+                 "_zero_count", "count", "total", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Initialize sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of reported quantiles (0 < a < 1)
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add a non-negative observation."""
+        if value <= 0:
+            self._zero_count += 1
+            value = 0.0
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._bins[index] = self._bins.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the q-quantile (0 <= q <= 1).
+
+        Returns:
+            Estimated value, or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        if rank < self._zero_count:
+            return 0.0
+
+        seen = self._zero_count
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            if seen > rank:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        """Estimate several quantiles at once."""
+        return {q: self.quantile(q) for q in qs}
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Merge another sketch with the same accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other._bins.items():
+            self._bins[index] = self._bins.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
@@ -1,19 +1,39 @@
 # backend/app/core/rate_limit.py
 """
-Rate limiting configuration using slowapi
+Rate limiting (GCRA, Redis Lua script with local pre-check)
 """
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from fastapi import Request, Response
-from typing import Callable
+import functools
+import inspect
 import logging
+import math
+import time
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.rate_limit_storage import (
+    GCRAResult,
+    MemoryGCRAStore,
+    RateLimitItem,
+    RedisGCRAStore,
+    parse_limits,
+)
 
 logger = logging.getLogger(__name__)
 
+# request.state attribute holding (limit, result) for the response headers
+_STATE_KEY = "rate_limit"
+
+
+def get_remote_address(request: HTTPConnection) -> str:
+    """Client IP address from the connection"""
+    return request.client.host if request.client else "127.0.0.1"
+
 
 def get_identifier(request: Request) -> str:
     """
@@ -33,12 +53,170 @@ def get_identifier(request: Request) -> str:
     return get_remote_address(request)
 
 
+class RateLimitExceeded(HTTPException):
+    """Raised when a request exceeds a rate limit (HTTP 429)"""
+
+    def __init__(self, limit: RateLimitItem, result: GCRAResult):
+        self.limit = limit
+        self.result = result
+        super().__init__(
+            status_code=429,
+            detail=str(limit),
+            headers=rate_limit_headers(limit, result)
+        )
+
+
+def rate_limit_headers(limit: RateLimitItem, result: GCRAResult) -> dict:
+    """X-RateLimit-* (and Retry-After when rejected) headers from a check result"""
+    headers = {
+        "X-RateLimit-Limit": str(limit.amount),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(time.time() + result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
+class RateLimiter:
+    """
+    Rate limiter with a slowapi-compatible decorator API.
+
+    - `@limiter.limit("5/minute")` on endpoints that take a `request: Request`
+    - `default_limits` apply to every other route (per route and client)
+    """
+
+    def __init__(
+        self,
+        key_func: Callable[[Request], str],
+        default_limits: Optional[List[str]] = None,
+        storage_uri: str = "memory://",
+        key_prefix: str = "ratelimit"
+    ):
+        self.key_func = key_func
+        self.default_limits = [item for value in (default_limits or []) for item in parse_limits(value)]
+        self.key_prefix = key_prefix
+        self.enabled = True
+        self.storage_uri = storage_uri
+        if storage_uri.startswith("memory://"):
+            self.storage = MemoryGCRAStore()
+        else:
+            self.storage = RedisGCRAStore(storage_uri)
+
+    async def check(
+        self,
+        request: Request,
+        limits: List[RateLimitItem],
+        scope: str,
+        key_func: Optional[Callable[[Request], str]] = None
+    ) -> None:
+        """
+        Apply `limits` to the request.
+
+        Raises:
+            RateLimitExceeded: If any limit is exceeded
+        """
+        if not self.enabled:
+            return
+
+        identifier = (key_func or self.key_func)(request)
+        tightest: Optional[Tuple[RateLimitItem, GCRAResult]] = None
+        for item in limits:
+            key = f"{self.key_prefix}:{scope}:{identifier}:{item.amount}/{item.period}"
+            result = await self.storage.hit(key, item)
+            if not result.allowed:
+                logger.warning(f"Rate limit exceeded: {identifier} on {scope} ({item})")
+                raise RateLimitExceeded(item, result)
+            if tightest is None or result.remaining < tightest[1].remaining:
+                tightest = (item, result)
+
+        if tightest is not None:
+            setattr(request.state, _STATE_KEY, tightest)
+
+    def limit(self, limit_value: str, key_func: Optional[Callable[[Request], str]] = None):
+        """
+        Decorator limiting an endpoint.
+        The endpoint must accept a `request: Request` parameter.
+        """
+        limits = parse_limits(limit_value)
+
+        def decorator(func):
+            if "request" not in inspect.signature(func).parameters:
+                raise Exception(f'No "request" argument on function "{func.__name__}"')
+
+            scope = f"{func.__module__}.{func.__name__}"
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    await self.check(kwargs["request"], limits, scope, key_func)
+                    return await func(*args, **kwargs)
+            else:
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    await self.check(kwargs["request"], limits, scope, key_func)
+                    return func(*args, **kwargs)
+
+            wrapper._rate_limited = True
+            return wrapper
+
+        return decorator
+
+    async def default_limit_dependency(self, connection: HTTPConnection) -> None:
+        """Router dependency applying `default_limits` to routes without @limit"""
+        if not self.default_limits or connection.scope["type"] != "http":
+            return
+        endpoint = connection.scope.get("endpoint")
+        if endpoint is None or getattr(endpoint, "_rate_limited", False):
+            return
+        scope = f"{endpoint.__module__}.{endpoint.__name__}"
+        await self.check(connection, self.default_limits, scope)
+
+    def reset(self) -> None:
+        """Clear local state (tests)"""
+        self.storage.reset()
+
+    def get_stats(self) -> dict:
+        return {
+            "storage": "redis" if isinstance(self.storage, RedisGCRAStore) else "memory",
+            "local_rejections": getattr(self.storage, "local_rejections", 0),
+            "remote_checks": getattr(self.storage, "remote_checks", 0),
+            "fallbacks": getattr(self.storage, "fallbacks", 0),
+        }
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Pure ASGI middleware adding X-RateLimit-* headers to responses of
+    rate-limited requests, from the result stored on request.state.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                checked = scope.get("state", {}).get(_STATE_KEY)
+                if checked is not None:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in rate_limit_headers(*checked).items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
 # Create limiter instance
-limiter = Limiter(
+limiter = RateLimiter(
     key_func=get_identifier,
     default_limits=["100/minute"],  # Default rate limit
-    storage_uri=settings.REDIS_URL if not settings.DEBUG else "memory://",
-    strategy="fixed-window"
+    storage_uri=settings.REDIS_URL if not settings.DEBUG else "memory://"
 )
 
 
@@ -71,18 +249,29 @@ class RateLimits:
     PUBLIC_READ = "200/minute"
 
 
+async def _rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Response:
+    """429 response (same body as slowapi's default handler)"""
+    return JSONResponse(
+        status_code=429,
+        content={"error": f"Rate limit exceeded: {exc.detail}"},
+        headers=exc.headers
+    )
+
+
 def setup_rate_limiter(app):
     """
     Configure rate limiter for the FastAPI application.
+    Must run before routers are included (default limits are a router dependency).
 
     Args:
         app: FastAPI application instance
     """
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    app.router.dependencies.append(Depends(limiter.default_limit_dependency))
+    app.add_middleware(RateLimitHeadersMiddleware)
 
-    logger.info("Rate limiter configured")
+    logger.info(f"Rate limiter configured (GCRA, {limiter.get_stats()['storage']} storage)")
 
 
 def rate_limit_key_user(request: Request) -> str:
@@ -101,8 +290,6 @@ async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded) ->
     Custom handler for rate limit exceeded errors.
     Provides more helpful error messages.
     """
-    from fastapi.responses import JSONResponse
-
     logger.warning(f"Rate limit exceeded: {get_identifier(request)} - {exc.detail}")
 
     return JSONResponse(
@@ -111,10 +298,7 @@ async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded) ->
             "success": False,
             "error": "rate_limit_exceeded",
             "detail": "Too many requests. Please slow down.",
-            "retry_after": exc.detail.split("per")[0].strip() if exc.detail else "60 seconds"
+            "retry_after": exc.headers.get("Retry-After", "60")
         },
-        headers={
-            "Retry-After": "60",
-            "X-RateLimit-Limit": str(exc.detail) if exc.detail else "unknown"
-        }
+        headers=exc.headers
     )
@@ -0,0 +1,228 @@
+# backend/app/core/rate_limit_storage.py
+"""
+GCRA (generic cell rate algorithm) rate limit storage.
+
+A limit of N requests per period T is enforced by storing one number per key,
+the theoretical arrival time (TAT) of the next request. Each request advances
+the TAT by T/N; a request is rejected when the TAT would run more than T ahead
+of now. This is a smooth token bucket of capacity N: no 2x burst at window
+edges as with fixed windows, and one key per client instead of a log.
+
+- MemoryGCRAStore: in-process, for memory:// and development.
+- RedisGCRAStore: one atomic Lua script per check (clock taken from Redis),
+  with a local mirror of the last known TAT per key that rejects requests
+  the script would certainly reject, without a network round trip.
+"""
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+
+# Local state is pruned of expired keys once it grows past this size
+MAX_LOCAL_KEYS = 10000
+
+
+@dataclass(frozen=True)
+class RateLimitItem:
+    """A parsed limit: `amount` requests per `period` seconds"""
+    amount: int
+    period: int
+
+    @property
+    def period_ms(self) -> int:
+        return self.period * 1000
+
+    @property
+    def interval_ms(self) -> int:
+        """Time one request "costs" (rounded up, never more permissive)"""
+        return max(1, math.ceil(self.period_ms / self.amount))
+
+    def __str__(self) -> str:
+        for name, seconds in _PERIODS.items():
+            if self.period == seconds:
+                return f"{self.amount} per 1 {name}"
+        return f"{self.amount} per {self.period} seconds"
+
+
+def parse_limits(value: str) -> List[RateLimitItem]:
+    """
+    Parse "5/minute", "100 per hour", "10/30 seconds" (several separated by ';').
+
+    Raises:
+        ValueError: On an invalid limit string
+    """
+    items = []
+    for part in re.split(r"[;,]", value):
+        if not part.strip():
+            continue
+        match = _LIMIT_RE.match(part)
+        if not match:
+            raise ValueError(f"Invalid rate limit: {part!r}")
+        amount, multiple, unit = match.groups()
+        items.append(RateLimitItem(int(amount), int(multiple or 1) * _PERIODS[unit.lower()]))
+    if not items:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return items
+
+
+@dataclass
+class GCRAResult:
+    """Outcome of one rate limit check (durations in seconds)"""
+    allowed: bool
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+
+def _gcra(tat_ms: Optional[float], now_ms: float, item: RateLimitItem, cost: int = 1):
+    """
+    Pure GCRA step.
+
+    Returns:
+        (result, new TAT or None if rejected)
+    """
+    interval = item.interval_ms
+    tat = now_ms if tat_ms is None or tat_ms < now_ms else tat_ms
+    new_tat = tat + interval * cost
+    allow_at = new_tat - item.period_ms
+    if allow_at > now_ms:
+        return GCRAResult(False, 0, (allow_at - now_ms) / 1000, (tat - now_ms) / 1000), None
+    remaining = int((item.period_ms - (new_tat - now_ms)) // interval)
+    return GCRAResult(True, remaining, 0.0, (new_tat - now_ms) / 1000), new_tat
+
+
+def _prune(state: Dict[str, float], now_ms: float) -> None:
+    if len(state) > MAX_LOCAL_KEYS:
+        for key in [k for k, tat in state.items() if tat <= now_ms]:
+            del state[key]
+
+
+class MemoryGCRAStore:
+    """In-process GCRA state (per worker)"""
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+
+    async def hit(self, key: str, item: RateLimitItem, cost: int = 1) -> GCRAResult:
+        return self.hit_sync(key, item, cost)
+
+    def hit_sync(self, key: str, item: RateLimitItem, cost: int = 1) -> GCRAResult:
+        now_ms = time.monotonic() * 1000
+        result, new_tat = _gcra(self._tat.get(key), now_ms, item, cost)
+        if new_tat is not None:
+            self._tat[key] = new_tat
+            _prune(self._tat, now_ms)
+        return result
+
+    def reset(self) -> None:
+        self._tat.clear()
+
+    async def close(self) -> None:
+        self.reset()
+
+
+# KEYS[1] = key; ARGV = interval_ms, period_ms, cost
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}
+GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((period - (new_tat - now)) / interval), 0, new_tat - now}
+"""
+
+
+class RedisGCRAStore:
+    """
+    Shared GCRA state in Redis.
+
+    The local mirror keeps, per key, the TAT last reported by Redis (converted
+    to the local clock) plus local admissions. Redis' TAT can only be later
+    than that (other workers add to it), so a request the mirror rejects would
+    be rejected by Redis too. If Redis is unreachable, limits fall back to
+    per-worker in-memory state instead of failing open.
+    """
+
+    def __init__(self, url: str):
+        self._url = url
+        self._client = None
+        self._script = None
+        self._mirror: Dict[str, float] = {}
+        self._fallback = MemoryGCRAStore()
+        self.local_rejections = 0
+        self.remote_checks = 0
+        self.fallbacks = 0
+
+    async def _get_script(self):
+        """Lazy initialization of Redis client and script (EVALSHA with EVAL fallback)"""
+        if self._script is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(
+                self._url,
+                socket_connect_timeout=2.0,
+                socket_timeout=2.0,
+            )
+            self._script = self._client.register_script(GCRA_LUA)
+        return self._script
+
+    def _precheck(self, key: str, item: RateLimitItem, cost: int, now_ms: float) -> Optional[GCRAResult]:
+        tat = self._mirror.get(key)
+        if tat is None:
+            return None
+        result, _ = _gcra(tat, now_ms, item, cost)
+        return None if result.allowed else result
+
+    async def hit(self, key: str, item: RateLimitItem, cost: int = 1) -> GCRAResult:
+        now_ms = time.monotonic() * 1000
+        rejected = self._precheck(key, item, cost, now_ms)
+        if rejected is not None:
+            self.local_rejections += 1
+            return rejected
+
+        try:
+            script = await self._get_script()
+            allowed, remaining, retry_after_ms, reset_after_ms = await script(
+                keys=[key], args=[item.interval_ms, item.period_ms, cost]
+            )
+        except Exception as e:
+            self.fallbacks += 1
+            if self.fallbacks == 1 or self.fallbacks % 1000 == 0:
+                logger.error(f"Redis rate limit error, using local limits ({self.fallbacks} fallbacks): {e}")
+            return self._fallback.hit_sync(key, item, cost)
+
+        self.remote_checks += 1
+        # Mirror Redis' TAT on the local clock
+        self._mirror[key] = now_ms + int(reset_after_ms)
+        _prune(self._mirror, now_ms)
+        return GCRAResult(bool(allowed), int(remaining), int(retry_after_ms) / 1000, int(reset_after_ms) / 1000)
+
+    def reset(self) -> None:
+        self._mirror.clear()
+        self._fallback.reset()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing rate limit Redis connection: {e}")
+            self._client = None
+            self._script = None
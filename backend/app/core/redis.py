@@ -4,14 +4,120 @@ Redis connection manager for session storage and caching.
 Supports fallback to in-memory storage for development.
 """
 import asyncio
-import json
+import fnmatch
+import heapq
 import logging
-from typing import Any, Optional, Dict
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, Dict, List, Sequence, Tuple, Union
 from datetime import timedelta
 from abc import ABC, abstractmethod
 
+from app.core import codec
+from app.core.config import settings
+from app.core.metrics import registry
+
 logger = logging.getLogger(__name__)
 
+memory_cache_removals = registry.counter(
+    "memory_cache_removals", "Keys dropped by the in-memory cache", ("reason",)
+)
+
+# Keys per MGET / DEL / pipeline sent to Redis by the bulk operations
+BULK_CHUNK = 1000
+
+# KEYS[1] = key; ARGV[1] = expected value. Deletes the key only if it holds that value.
+DELETE_IF_EQUALS_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Result of each pipeline command when the pipeline fails (same as the single calls)
+_PIPELINE_FAILURE = {
+    "get": None, "set": False, "delete": False, "exists": False, "expire": False, "ttl": -2,
+    "hset": 0, "hgetall": {}, "hincrby": None, "rpush": 0, "ltrim": False, "lrange": []
+}
+
+
+class CachePipeline:
+    """
+    Commands queued for a single round trip (see BaseCache.pipeline).
+
+    Each method queues a command and returns the pipeline, so calls can be
+    chained. After execution, `results` holds one result per command, in
+    order, with the same values as the single-key methods (None when the
+    `if_exists` key was missing and nothing was applied).
+    """
+
+    def __init__(self, cache: "BaseCache", transaction: bool = True, if_exists: Optional[str] = None):
+        self._cache = cache
+        self.transaction = transaction or if_exists is not None
+        self.if_exists = if_exists
+        self._commands: List[Tuple[str, tuple]] = []
+        self.results: Optional[list] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def get(self, key: str) -> "CachePipeline":
+        self._commands.append(("get", (key,)))
+        return self
+
+    def set(self, key: str, value: str, expire: Optional[int] = None) -> "CachePipeline":
+        self._commands.append(("set", (key, value, expire)))
+        return self
+
+    def delete(self, key: str) -> "CachePipeline":
+        self._commands.append(("delete", (key,)))
+        return self
+
+    def exists(self, key: str) -> "CachePipeline":
+        self._commands.append(("exists", (key,)))
+        return self
+
+    def expire(self, key: str, seconds: int) -> "CachePipeline":
+        self._commands.append(("expire", (key, seconds)))
+        return self
+
+    def ttl(self, key: str) -> "CachePipeline":
+        self._commands.append(("ttl", (key,)))
+        return self
+
+    def hset(self, key: str, mapping: Dict[str, str]) -> "CachePipeline":
+        self._commands.append(("hset", (key, mapping)))
+        return self
+
+    def hgetall(self, key: str) -> "CachePipeline":
+        self._commands.append(("hgetall", (key,)))
+        return self
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> "CachePipeline":
+        self._commands.append(("hincrby", (key, field, amount)))
+        return self
+
+    def rpush(self, key: str, *values: str) -> "CachePipeline":
+        self._commands.append(("rpush", (key, *values)))
+        return self
+
+    def ltrim(self, key: str, start: int, stop: int) -> "CachePipeline":
+        self._commands.append(("ltrim", (key, start, stop)))
+        return self
+
+    def lrange(self, key: str, start: int, stop: int) -> "CachePipeline":
+        self._commands.append(("lrange", (key, start, stop)))
+        return self
+
+    async def execute(self) -> Optional[list]:
+        """Send the queued commands; returns (and stores) their results"""
+        commands, self._commands = self._commands, []
+        self.results = (
+            await self._cache._execute_pipeline(commands, self.transaction, self.if_exists) if commands else []
+        )
+        return self.results
+
 
 class BaseCache(ABC):
     """Abstract base class for cache implementations."""
@@ -26,11 +132,21 @@ class BaseCache(ABC):
         """Set a value in cache with optional expiration in seconds."""
         pass
 
+    @abstractmethod
+    async def setnx(self, key: str, value: str, expire: Optional[int] = None) -> bool:
+        """Set a value only if the key does not exist; True if it was set."""
+        pass
+
     @abstractmethod
     async def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         pass
 
+    @abstractmethod
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        """Atomically delete a key if it still holds `value`; True if it was deleted."""
+        pass
+
     @abstractmethod
     async def exists(self, key: str) -> bool:
         """Check if a key exists."""
@@ -51,6 +167,38 @@ class BaseCache(ABC):
         """Get keys matching a pattern."""
         pass
 
+    # Hashes and lists (values of one key holding several strings)
+
+    @abstractmethod
+    async def hset(self, key: str, mapping: Dict[str, str]) -> int:
+        """Set fields of a hash; returns how many fields were added."""
+        pass
+
+    @abstractmethod
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        """Get all fields of a hash ({} if the key does not exist)."""
+        pass
+
+    @abstractmethod
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> Optional[int]:
+        """Increment an integer hash field; returns its new value."""
+        pass
+
+    @abstractmethod
+    async def rpush(self, key: str, *values: str) -> int:
+        """Append values to a list; returns its new length."""
+        pass
+
+    @abstractmethod
+    async def ltrim(self, key: str, start: int, stop: int) -> bool:
+        """Keep only the elements start..stop (inclusive, negative from the end) of a list."""
+        pass
+
+    @abstractmethod
+    async def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        """Get the elements start..stop (inclusive, negative from the end) of a list."""
+        pass
+
     @abstractmethod
     async def close(self) -> None:
         """Close the connection."""
@@ -61,92 +209,364 @@ class BaseCache(ABC):
         """Check if the connection is alive."""
         pass
 
+    # Bulk operations: implementations override these with native batching
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        """Get several values (None for missing keys), in the order of `keys`."""
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, mapping: Dict[str, str], expire: Optional[int] = None) -> bool:
+        """Set several values with the same optional expiration in seconds."""
+        results = [await self.set(key, value, expire) for key, value in mapping.items()]
+        return all(results)
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        """Delete several keys; returns how many existed."""
+        return sum([await self.delete(key) for key in keys])
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = True, if_exists: Optional[str] = None) -> AsyncIterator[CachePipeline]:
+        """
+        Queue commands and send them together when the block exits.
+
+        Usage:
+            async with cache.pipeline() as pipe:
+                pipe.set("a", "1", expire=60).delete("b")
+            created, deleted = pipe.results
+
+        With `transaction`, the commands are applied atomically. With
+        `if_exists`, they are applied (atomically) only if that key exists
+        when they run; otherwise nothing is written and `results` is None.
+        Nothing is sent if the block raises.
+        """
+        pipe = CachePipeline(self, transaction, if_exists)
+        yield pipe
+        await pipe.execute()
+
+    async def _execute_pipeline(self, commands: List[Tuple[str, tuple]], transaction: bool,
+                                if_exists: Optional[str] = None) -> Optional[list]:
+        # Single-process caches never await inside their operations, so this runs as one step
+        if if_exists is not None and not await self.exists(if_exists):
+            return None
+        return [await getattr(self, name)(*args) for name, args in commands]
+
 
 class MemoryCache(BaseCache):
     """
     In-memory cache implementation for development.
     NOT suitable for production use with multiple workers.
+
+    Every operation runs to completion without awaiting, so the event loop
+    already serializes them and no lock is taken. Expired keys are dropped
+    when accessed and proactively by a sweeper task that pops a min-heap of
+    expiry times. The store is an LRU bounded by entry count and by the
+    approximate size of keys and values (characters). Hashes and lists are
+    stored as dicts and lists of strings.
+
+    Args:
+        max_entries: Maximum number of keys (0 = unbounded)
+        max_bytes: Maximum approximate size of keys + values (0 = unbounded)
+        sweep_interval: Seconds between sweeper passes
+        clock: Monotonic time source (injectable for tests)
     """
 
-    def __init__(self):
-        self._data: Dict[str, str] = {}
+    # Expired keys removed per sweeper step before yielding to the loop
+    SWEEP_BATCH = 1000
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0, sweep_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._data: "OrderedDict[str, Union[str, Dict[str, str], List[str]]]" = OrderedDict()
         self._expiry: Dict[str, float] = {}
-        self._lock = asyncio.Lock()
+        self._heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._sweeper: Optional[asyncio.Task] = None
         logger.info("Using in-memory cache (development mode)")
 
-    async def _cleanup_expired(self):
-        """Remove expired keys."""
-        import time
-        current_time = time.time()
-        expired_keys = [
-            key for key, expiry in self._expiry.items()
-            if expiry and current_time > expiry
-        ]
-        for key in expired_keys:
-            self._data.pop(key, None)
+    # ---- internals ----
+
+    @staticmethod
+    def _size(value) -> int:
+        if isinstance(value, str):
+            return len(value)
+        if isinstance(value, dict):
+            return sum(len(field) + len(item) for field, item in value.items())
+        return sum(len(item) for item in value)
+
+    def _remove(self, key: str) -> bool:
+        value = self._data.pop(key, None)
+        self._expiry.pop(key, None)
+        if value is None:
+            return False
+        self._bytes -= len(key) + self._size(value)
+        return True
+
+    def _container(self, key: str, kind: type, create: bool = False):
+        """The hash (dict) or list stored at `key`, optionally created"""
+        if self._live(key):
+            value = self._data[key]
+            if not isinstance(value, kind):
+                raise TypeError(f"WRONGTYPE {key} does not hold a {kind.__name__}")
+            self._data.move_to_end(key)
+            return value
+        if not create:
+            return None
+        value = self._data[key] = kind()
+        self._bytes += len(key)
+        return value
+
+    def _live(self, key: str, now: Optional[float] = None) -> bool:
+        """Whether `key` exists, dropping it if it has expired"""
+        when = self._expiry.get(key)
+        if when is not None and when <= (self._clock() if now is None else now):
+            self._remove(key)
+            self.expirations += 1
+            memory_cache_removals.inc(reason="expired")
+            return False
+        return key in self._data
+
+    def _set_expiry(self, key: str, seconds: float) -> None:
+        when = self._clock() + seconds
+        self._expiry[key] = when
+        heapq.heappush(self._heap, (when, key))
+        # Overwritten expiries leave stale heap entries: rebuild when they dominate
+        if len(self._heap) > 2 * len(self._expiry) + self.SWEEP_BATCH:
+            self._heap = [(when, key) for key, when in self._expiry.items()]
+            heapq.heapify(self._heap)
+        self._ensure_sweeper()
+
+    def _store(self, key: str, value: str, expire: Optional[int]) -> None:
+        previous = self._data.get(key)
+        if previous is not None:
+            self._bytes -= len(key) + self._size(previous)
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._bytes += len(key) + len(value)
+        if expire:
+            self._set_expiry(key, expire)
+        else:
             self._expiry.pop(key, None)
 
+    def _evict(self) -> None:
+        """Drop least recently used keys until the bounds hold"""
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._remove(key)
+            self.evictions += 1
+            memory_cache_removals.inc(reason="evicted")
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Remove keys whose expiry has passed (at most `limit`); returns the count"""
+        now = self._clock()
+        heap = self._heap
+        removed = 0
+        while heap and heap[0][0] <= now and (limit is None or removed < limit):
+            when, key = heapq.heappop(heap)
+            # Skip entries superseded by a later set/expire
+            if self._expiry.get(key) == when:
+                self._remove(key)
+                removed += 1
+        if removed:
+            self.expirations += removed
+            memory_cache_removals.inc(removed, reason="expired")
+        return removed
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            try:
+                self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+            except RuntimeError:
+                pass  # No running loop yet: keys still expire on access
+
+    async def _sweep_loop(self) -> None:
+        while self._heap:
+            await asyncio.sleep(self.sweep_interval)
+            while self.sweep(self.SWEEP_BATCH) == self.SWEEP_BATCH:
+                await asyncio.sleep(0)
+
+    # ---- BaseCache ----
+
     async def get(self, key: str) -> Optional[str]:
-        async with self._lock:
-            await self._cleanup_expired()
-            return self._data.get(key)
+        if not self._live(key) or not isinstance(self._data[key], str):
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
 
     async def set(self, key: str, value: str, expire: Optional[int] = None) -> bool:
-        import time
-        async with self._lock:
-            self._data[key] = value
-            if expire:
-                self._expiry[key] = time.time() + expire
-            else:
-                self._expiry.pop(key, None)
-            return True
+        self._store(key, value, expire)
+        self._evict()
+        return True
+
+    async def setnx(self, key: str, value: str, expire: Optional[int] = None) -> bool:
+        if self._live(key):
+            return False
+        self._store(key, value, expire)
+        self._evict()
+        return True
 
     async def delete(self, key: str) -> bool:
-        async with self._lock:
-            deleted = key in self._data
-            self._data.pop(key, None)
-            self._expiry.pop(key, None)
-            return deleted
+        live = self._live(key)
+        self._remove(key)
+        return live
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        if not self._live(key) or self._data[key] != value:
+            return False
+        self._remove(key)
+        return True
 
     async def exists(self, key: str) -> bool:
-        async with self._lock:
-            await self._cleanup_expired()
-            return key in self._data
+        return self._live(key)
 
     async def expire(self, key: str, seconds: int) -> bool:
-        import time
-        async with self._lock:
-            if key in self._data:
-                self._expiry[key] = time.time() + seconds
-                return True
+        if not self._live(key):
             return False
+        if seconds <= 0:
+            self._remove(key)
+        else:
+            self._set_expiry(key, seconds)
+        return True
 
     async def ttl(self, key: str) -> int:
-        import time
-        async with self._lock:
-            if key not in self._expiry:
-                return -1  # No expiry set
-            if key not in self._data:
-                return -2  # Key doesn't exist
-            remaining = int(self._expiry[key] - time.time())
-            return max(0, remaining)
+        if not self._live(key):
+            return -2  # Key doesn't exist
+        if key not in self._expiry:
+            return -1  # No expiry set
+        remaining = int(self._expiry[key] - self._clock() + 0.5)  # Rounded like Redis
+        return max(0, remaining)
 
     async def keys(self, pattern: str) -> list:
-        import fnmatch
-        async with self._lock:
-            await self._cleanup_expired()
-            # Convert Redis pattern to fnmatch pattern
-            fnmatch_pattern = pattern.replace('*', '*')
-            return [k for k in self._data.keys() if fnmatch.fnmatch(k, fnmatch_pattern)]
+        # Redis glob patterns are fnmatch patterns
+        now = self._clock()
+        return [k for k in list(self._data) if fnmatch.fnmatchcase(k, pattern) and self._live(k, now)]
+
+    async def hset(self, key: str, mapping: Dict[str, str]) -> int:
+        fields = self._container(key, dict, create=True)
+        added = 0
+        for field, value in mapping.items():
+            previous = fields.get(field)
+            if previous is None:
+                added += 1
+                self._bytes += len(field)
+            else:
+                self._bytes -= len(previous)
+            fields[field] = value
+            self._bytes += len(value)
+        self._evict()
+        return added
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        fields = self._container(key, dict)
+        return dict(fields) if fields else {}
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> Optional[int]:
+        fields = self._container(key, dict, create=True)
+        previous = fields.get(field)
+        if previous is None:
+            self._bytes += len(field)
+        else:
+            self._bytes -= len(previous)
+        value = int(previous or 0) + amount
+        fields[field] = str(value)
+        self._bytes += len(fields[field])
+        return value
+
+    async def rpush(self, key: str, *values: str) -> int:
+        items = self._container(key, list, create=True)
+        items.extend(values)
+        self._bytes += sum(len(value) for value in values)
+        self._evict()
+        return len(items)
+
+    @staticmethod
+    def _bounds(length: int, start: int, stop: int) -> Tuple[int, int]:
+        """Python slice bounds of the inclusive Redis range start..stop"""
+        if start < 0:
+            start = max(length + start, 0)
+        if stop < 0:
+            stop = length + stop
+        return start, max(start, min(stop + 1, length))
+
+    async def ltrim(self, key: str, start: int, stop: int) -> bool:
+        items = self._container(key, list)
+        if items is None:
+            return True
+        start, end = self._bounds(len(items), start, stop)
+        removed = items[:start] + items[end:]
+        if removed:
+            self._bytes -= sum(len(value) for value in removed)
+            items[:] = items[start:end]
+        if not items:
+            self._remove(key)  # Like Redis, empty lists do not exist
+        return True
+
+    async def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        items = self._container(key, list)
+        if items is None:
+            return []
+        start, end = self._bounds(len(items), start, stop)
+        return items[start:end]
 
     async def close(self) -> None:
-        async with self._lock:
-            self._data.clear()
-            self._expiry.clear()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        self._data.clear()
+        self._expiry.clear()
+        self._heap.clear()
+        self._bytes = 0
 
     async def ping(self) -> bool:
         return True
 
+    # Pipelines use the base implementation: no command awaits, so the queued
+    # commands run back to back without other tasks interleaving.
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        now = self._clock()
+        values = []
+        for key in keys:
+            if self._live(key, now) and isinstance(self._data[key], str):
+                self._data.move_to_end(key)
+                values.append(self._data[key])
+            else:
+                values.append(None)
+        return values
+
+    async def set_many(self, mapping: Dict[str, str], expire: Optional[int] = None) -> bool:
+        for key, value in mapping.items():
+            self._store(key, value, expire)
+        self._evict()
+        return True
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        now = self._clock()
+        deleted = 0
+        for key in keys:
+            if self._live(key, now):
+                deleted += 1
+            self._remove(key)
+        return deleted
+
+    def get_stats(self) -> dict:
+        return {
+            "keys": len(self._data),
+            "approx_bytes": self._bytes,
+            "with_expiry": len(self._expiry),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
 
 class RedisCache(BaseCache):
     """
@@ -157,6 +577,7 @@ class RedisCache(BaseCache):
     def __init__(self, url: str):
         self._url = url
         self._client = None
+        self._scripts: Dict[str, Any] = {}
         logger.info(f"Connecting to Redis: {url.split('@')[-1] if '@' in url else url}")
 
     async def _get_client(self):
@@ -173,6 +594,14 @@ class RedisCache(BaseCache):
             )
         return self._client
 
+    async def _run_script(self, source: str, keys: List[str], args: list) -> Any:
+        """Run a Lua script (EVALSHA with EVAL fallback)"""
+        client = await self._get_client()
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = client.register_script(source)
+        return await script(keys=keys, args=args)
+
     async def get(self, key: str) -> Optional[str]:
         try:
             client = await self._get_client()
@@ -193,6 +622,14 @@ class RedisCache(BaseCache):
             logger.error(f"Redis SET error: {e}")
             return False
 
+    async def setnx(self, key: str, value: str, expire: Optional[int] = None) -> bool:
+        try:
+            client = await self._get_client()
+            return bool(await client.set(key, value, ex=expire or None, nx=True))
+        except Exception as e:
+            logger.error(f"Redis SET NX error: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         try:
             client = await self._get_client()
@@ -202,6 +639,13 @@ class RedisCache(BaseCache):
             logger.error(f"Redis DELETE error: {e}")
             return False
 
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        try:
+            return bool(await self._run_script(DELETE_IF_EQUALS_LUA, [key], [value]))
+        except Exception as e:
+            logger.error(f"Redis compare-and-delete error: {e}")
+            return False
+
     async def exists(self, key: str) -> bool:
         try:
             client = await self._get_client()
@@ -247,6 +691,7 @@ class RedisCache(BaseCache):
                 logger.error(f"Error closing Redis connection: {e}")
             finally:
                 self._client = None
+                self._scripts.clear()
 
     async def ping(self) -> bool:
         try:
@@ -256,6 +701,133 @@ class RedisCache(BaseCache):
             logger.error(f"Redis PING error: {e}")
             return False
 
+    async def hset(self, key: str, mapping: Dict[str, str]) -> int:
+        try:
+            client = await self._get_client()
+            return await client.hset(key, mapping=mapping)
+        except Exception as e:
+            logger.error(f"Redis HSET error: {e}")
+            return 0
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        try:
+            client = await self._get_client()
+            return await client.hgetall(key)
+        except Exception as e:
+            logger.error(f"Redis HGETALL error: {e}")
+            return {}
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> Optional[int]:
+        try:
+            client = await self._get_client()
+            return await client.hincrby(key, field, amount)
+        except Exception as e:
+            logger.error(f"Redis HINCRBY error: {e}")
+            return None
+
+    async def rpush(self, key: str, *values: str) -> int:
+        try:
+            client = await self._get_client()
+            return await client.rpush(key, *values)
+        except Exception as e:
+            logger.error(f"Redis RPUSH error: {e}")
+            return 0
+
+    async def ltrim(self, key: str, start: int, stop: int) -> bool:
+        try:
+            client = await self._get_client()
+            return bool(await client.ltrim(key, start, stop))
+        except Exception as e:
+            logger.error(f"Redis LTRIM error: {e}")
+            return False
+
+    async def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        try:
+            client = await self._get_client()
+            return await client.lrange(key, start, stop)
+        except Exception as e:
+            logger.error(f"Redis LRANGE error: {e}")
+            return []
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        keys = list(keys)
+        try:
+            client = await self._get_client()
+            values = []
+            for i in range(0, len(keys), BULK_CHUNK):
+                values.extend(await client.mget(keys[i:i + BULK_CHUNK]))
+            return values
+        except Exception as e:
+            logger.error(f"Redis MGET error: {e}")
+            return [None] * len(keys)
+
+    async def set_many(self, mapping: Dict[str, str], expire: Optional[int] = None) -> bool:
+        items = list(mapping.items())
+        try:
+            client = await self._get_client()
+            for i in range(0, len(items), BULK_CHUNK):
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in items[i:i + BULK_CHUNK]:
+                        pipe.set(key, value, ex=expire or None)
+                    await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis bulk SET error: {e}")
+            return False
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        keys = list(keys)
+        try:
+            client = await self._get_client()
+            deleted = 0
+            for i in range(0, len(keys), BULK_CHUNK):
+                deleted += await client.delete(*keys[i:i + BULK_CHUNK])
+            return deleted
+        except Exception as e:
+            logger.error(f"Redis bulk DELETE error: {e}")
+            return 0
+
+    async def _execute_pipeline(self, commands: List[Tuple[str, tuple]], transaction: bool,
+                                if_exists: Optional[str] = None) -> Optional[list]:
+        from redis.exceptions import WatchError
+
+        try:
+            client = await self._get_client()
+            async with client.pipeline(transaction=transaction) as pipe:
+                while True:
+                    if if_exists is not None:
+                        # WATCH/EXISTS/MULTI: EXEC is aborted if the key changes or expires meanwhile
+                        await pipe.watch(if_exists)
+                        if not await pipe.exists(if_exists):
+                            return None
+                        pipe.multi()
+                    for name, args in commands:
+                        if name == "set":
+                            key, value, expire = args
+                            pipe.set(key, value, ex=expire or None)
+                        elif name == "hset":
+                            key, mapping = args
+                            pipe.hset(key, mapping=mapping)
+                        else:
+                            getattr(pipe, name)(*args)
+                    try:
+                        raw = await pipe.execute()
+                        break
+                    except WatchError:
+                        continue
+        except Exception as e:
+            logger.error(f"Redis pipeline error: {e}")
+            return [_PIPELINE_FAILURE[name] for name, _ in commands]
+
+        results = []
+        for (name, _), value in zip(commands, raw):
+            if name in ("delete", "exists"):
+                value = value > 0
+            elif name in ("set", "expire", "ltrim"):
+                value = bool(value)
+            results.append(value)
+        return results
+
 
 class CacheManager:
     """
@@ -285,7 +857,11 @@ class CacheManager:
         instance = cls()
 
         if redis_url.startswith("memory://"):
-            instance._cache = MemoryCache()
+            instance._cache = MemoryCache(
+                max_entries=settings.MEMORY_CACHE_MAX_ENTRIES,
+                max_bytes=settings.MEMORY_CACHE_MAX_MB * 1024 * 1024,
+                sweep_interval=settings.MEMORY_CACHE_SWEEP_INTERVAL
+            )
         else:
             instance._cache = RedisCache(redis_url)
 
@@ -331,18 +907,29 @@ async def cache_get_json(key: str) -> Optional[Any]:
     value = await cache.get(key)
     if value:
         try:
-            return json.loads(value)
-        except json.JSONDecodeError:
+            return codec.loads(value)
+        except codec.CodecError:
             return None
     return None
 
 
+async def cache_get_many_json(keys: Sequence[str]) -> List[Optional[Any]]:
+    """Get several JSON values in one round trip (None for missing or invalid ones)."""
+    cache = get_cache()
+    values = []
+    for value in await cache.get_many(keys):
+        try:
+            values.append(codec.loads(value) if value else None)
+        except codec.CodecError:
+            values.append(None)
+    return values
+
+
 async def cache_set_json(key: str, value: Any, expire: Optional[int] = None) -> bool:
     """Set a JSON value in cache."""
     cache = get_cache()
     try:
-        json_str = json.dumps(value, default=str)
-        return await cache.set(key, json_str, expire)
+        return await cache.set(key, codec.dumps(value), expire)
     except (TypeError, ValueError) as e:
         logger.error(f"Failed to serialize value to JSON: {e}")
         return False
@@ -1,98 +1,182 @@
 # backend/app/core/request_limits.py
 """
 Request size and timeout middleware for DoS prevention.
+Pure ASGI: they wrap `receive`/`send` instead of buffering through
+BaseHTTPMiddleware, so streaming requests and responses stay streaming.
 """
-import logging
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
-from starlette.types import ASGIApp
 import asyncio
-from typing import Callable
+import json
+import logging
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
+def get_header(scope: Scope, name: bytes) -> Optional[str]:
+    """First value of a request header (name in lowercase bytes)"""
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_host(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def send_json(send: Send, status_code: int, content: dict, headers: Optional[Dict[str, str]] = None) -> None:
+    """Send a complete JSON response"""
+    body = json.dumps(content).encode("utf-8")
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RequestBodyTooLarge(Exception):
+    """Raised from `receive` once the body exceeds the limit"""
+
+
+class RequestSizeLimitMiddleware:
     """
     Middleware to enforce maximum request body size.
     Prevents DoS attacks from large payload submissions.
+
+    A declared Content-Length above the limit is rejected up front; the body
+    is also counted as it is received, so chunked or mislabelled requests are
+    cut off as soon as they cross the limit. Limits can differ per path prefix
+    (e.g. uploads).
     """
 
-    def __init__(self, app: ASGIApp, max_size: int):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, max_size: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
         self.max_size = max_size
-        self.max_size_mb = round(max_size / 1024 / 1024, 2)
-
-    async def dispatch(self, request: Request, call_next: Callable):
-        """
-        Check request body size before processing.
-        """
-        # Skip for file uploads (handled separately by upload endpoint)
-        if request.url.path.startswith("/api/upload"):
-            return await call_next(request)
+        self.path_limits = sorted((path_limits or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self.path_limits:
+            if path.startswith(prefix):
+                return limit
+        return self.max_size
+
+    async def _reject(self, scope: Scope, send: Send, size: int, max_size: int) -> None:
+        max_size_mb = round(max_size / 1024 / 1024, 2)
+        logger.warning(
+            f"Request rejected: body size {size} bytes "
+            f"exceeds limit of {max_size} bytes ({max_size_mb}MB) "
+            f"from {client_host(scope)} to {scope['path']}"
+        )
+        await send_json(send, 413, {
+            "success": False,
+            "error": "payload_too_large",
+            "detail": f"Request body exceeds maximum size of {max_size_mb}MB",
+            "max_size_bytes": max_size
+        }, headers={"Connection": "close"})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_size = self.limit_for(scope["path"])
 
         # Check Content-Length header
-        content_length = request.headers.get("content-length")
+        content_length = get_header(scope, b"content-length")
         if content_length:
-            content_length = int(content_length)
-            if content_length > self.max_size:
-                logger.warning(
-                    f"Request rejected: body size {content_length} bytes "
-                    f"exceeds limit of {self.max_size} bytes ({self.max_size_mb}MB) "
-                    f"from {request.client.host} to {request.url.path}"
-                )
-                return JSONResponse(
-                    status_code=413,
-                    content={
-                        "success": False,
-                        "error": "payload_too_large",
-                        "detail": f"Request body exceeds maximum size of {self.max_size_mb}MB",
-                        "max_size_bytes": self.max_size
-                    }
-                )
-
-        return await call_next(request)
-
-
-class RequestTimeoutMiddleware(BaseHTTPMiddleware):
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = 0
+            if declared > max_size:
+                await self._reject(scope, send, declared, max_size)
+                return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    exceeded = True
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded and not response_started:
+                # The app's error response to the aborted body is replaced by a 413
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            await self._reject(scope, send, received, max_size)
+
+
+class RequestTimeoutMiddleware:
     """
     Middleware to enforce request timeouts.
     Prevents long-running requests from exhausting resources.
+
+    The timeout covers the time until the response starts; streaming
+    responses (SSE, exports) are not cut off once they have begun.
     """
 
     def __init__(self, app: ASGIApp, timeout: int):
-        super().__init__(app)
+        self.app = app
         self.timeout = timeout
 
-    async def dispatch(self, request: Request, call_next: Callable):
-        """
-        Wrap request processing with a timeout.
-        """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
         try:
-            # Wrap the request with a timeout
-            response = await asyncio.wait_for(
-                call_next(request),
-                timeout=self.timeout
-            )
-            return response
+            async with asyncio.timeout(self.timeout) as deadline:
+                async def send_wrapper(message: Message) -> None:
+                    nonlocal response_started
+                    if message["type"] == "http.response.start":
+                        response_started = True
+                        deadline.reschedule(None)
+                    await send(message)
+
+                await self.app(scope, receive, send_wrapper)
 
-        except asyncio.TimeoutError:
+        except TimeoutError:
             logger.error(
                 f"Request timeout after {self.timeout}s: "
-                f"{request.method} {request.url.path} from {request.client.host}"
-            )
-            return JSONResponse(
-                status_code=504,
-                content={
-                    "success": False,
-                    "error": "gateway_timeout",
-                    "detail": f"Request exceeded maximum processing time of {self.timeout}s",
-                    "timeout_seconds": self.timeout
-                }
+                f"{scope['method']} {scope['path']} from {client_host(scope)}"
             )
+            if response_started:
+                return
+            await send_json(send, 504, {
+                "success": False,
+                "error": "gateway_timeout",
+                "detail": f"Request exceeded maximum processing time of {self.timeout}s",
+                "timeout_seconds": self.timeout
+            })
 
 
 def setup_request_limits(app):
@@ -102,14 +186,16 @@ def setup_request_limits(app):
     Args:
         app: FastAPI application instance
     """
-    # Add request size limit middleware
+    # Add request size limit middleware (uploads get the larger file limit)
     app.add_middleware(
         RequestSizeLimitMiddleware,
-        max_size=settings.MAX_REQUEST_SIZE
+        max_size=settings.MAX_REQUEST_SIZE,
+        path_limits={"/api/upload": settings.MAX_FILE_SIZE}
     )
 
     logger.info(
-        f"Request size limit enabled: {round(settings.MAX_REQUEST_SIZE / 1024 / 1024, 2)}MB"
+        f"Request size limit enabled: {round(settings.MAX_REQUEST_SIZE / 1024 / 1024, 2)}MB "
+        f"(uploads: {round(settings.MAX_FILE_SIZE / 1024 / 1024, 2)}MB)"
     )
 
     # Add request timeout middleware
@@ -7,10 +7,13 @@ from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
+import hashlib
+import hmac
 import secrets
 import logging
 
 from app.core.config import settings
+from app.core.token_revocation import BLACKLIST_KEY_PREFIX, get_revocation_filter, publish_revocation
 
 logger = logging.getLogger(__name__)
 
@@ -121,6 +124,40 @@ def create_refresh_token(
     return encoded_jwt
 
 
+def _decode_claims(token: str) -> Optional[dict]:
+    """Verify the signature and expiry of a JWT and return its raw claims"""
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+def _payload_from_claims(claims: dict) -> TokenPayload:
+    return TokenPayload(
+        sub=claims.get("sub"),
+        exp=datetime.fromtimestamp(claims.get("exp")),
+        type=claims.get("type", "access"),
+        scopes=claims.get("scopes", [])
+    )
+
+
+def _token_data_from_payload(payload: Optional[TokenPayload], token_type: str) -> Optional[TokenData]:
+    if payload is None:
+        return None
+
+    if payload.type != token_type:
+        return None
+
+    if payload.exp < datetime.utcnow():
+        return None
+
+    return TokenData(
+        user_id=payload.sub,
+        username=payload.sub,
+        scopes=payload.scopes
+    )
+
+
 def decode_token(token: str) -> Optional[TokenPayload]:
     """
     Decode and validate a JWT token
@@ -131,16 +168,10 @@ def decode_token(token: str) -> Optional[TokenPayload]:
     Returns:
         TokenPayload if valid, None otherwise
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        return TokenPayload(
-            sub=payload.get("sub"),
-            exp=datetime.fromtimestamp(payload.get("exp")),
-            type=payload.get("type", "access"),
-            scopes=payload.get("scopes", [])
-        )
-    except JWTError:
+    claims = _decode_claims(token)
+    if claims is None:
         return None
+    return _payload_from_claims(claims)
 
 
 def verify_token(token: str, token_type: str = "access") -> Optional[TokenData]:
@@ -154,36 +185,50 @@ def verify_token(token: str, token_type: str = "access") -> Optional[TokenData]:
     Returns:
         TokenData if valid, None otherwise
     """
-    payload = decode_token(token)
-    if payload is None:
-        return None
-
-    if payload.type != token_type:
-        return None
+    return _token_data_from_payload(decode_token(token), token_type)
 
-    if payload.exp < datetime.utcnow():
-        return None
 
-    return TokenData(
-        user_id=payload.sub,
-        username=payload.sub,
-        scopes=payload.scopes
-    )
+# API keys: mdf_<lookup prefix>_<secret>
+# The lookup prefix is public and indexed; the key itself is stored as a SHA-256
+# digest (the secret is 256 random bits, so a slow password hash adds nothing).
+# Legacy keys (mdf_<secret>, bcrypt hash) are still accepted.
+API_KEY_PREFIX_LENGTH = 12
+API_KEY_SHA256_SCHEME = "sha256$"
 
 
 def generate_api_key() -> str:
     """Generate a secure API key for service-to-service auth"""
-    return f"mdf_{secrets.token_urlsafe(32)}"
+    return f"mdf_{secrets.token_hex(API_KEY_PREFIX_LENGTH // 2)}_{secrets.token_urlsafe(32)}"
+
+
+def get_api_key_prefix(api_key: str) -> Optional[str]:
+    """Extract the public lookup prefix of an API key (None for legacy keys)"""
+    parts = api_key.split("_", 2)
+    if len(parts) != 3 or parts[0] != "mdf" or len(parts[1]) != API_KEY_PREFIX_LENGTH:
+        return None
+    try:
+        int(parts[1], 16)
+    except ValueError:
+        return None
+    return parts[1]
+
+
+def api_key_digest(api_key: str) -> str:
+    """SHA-256 hex digest of an API key"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
 
 
 def verify_api_key(api_key: str, stored_key_hash: str) -> bool:
     """Verify an API key against its stored hash"""
+    if stored_key_hash.startswith(API_KEY_SHA256_SCHEME):
+        expected = stored_key_hash[len(API_KEY_SHA256_SCHEME):]
+        return hmac.compare_digest(api_key_digest(api_key), expected)
     return pwd_context.verify(api_key, stored_key_hash)
 
 
 def hash_api_key(api_key: str) -> str:
     """Hash an API key for storage"""
-    return pwd_context.hash(api_key)
+    return f"{API_KEY_SHA256_SCHEME}{api_key_digest(api_key)}"
 
 
 # ============== JWT Token Blacklist ==============
@@ -221,9 +266,12 @@ async def blacklist_token(token: str) -> bool:
 
         # Store in cache with expiration
         cache = get_cache()
-        key = f"blacklist:token:{jti}"
+        key = f"{BLACKLIST_KEY_PREFIX}{jti}"
         await cache.set(key, "revoked", expire=ttl_seconds)
 
+        # Update the local revocation filter on every worker
+        await publish_revocation(jti)
+
         logger.info(f"Token blacklisted: {jti[:16]}... (TTL: {ttl_seconds}s)")
         return True
 
@@ -235,45 +283,61 @@ async def blacklist_token(token: str) -> bool:
         return False
 
 
-async def is_token_blacklisted(token: str) -> bool:
+async def is_jti_revoked(jti: str) -> bool:
     """
-    Check if a token is blacklisted.
+    Check if a token id is blacklisted.
+    The local revocation filter answers the common "not revoked" case without
+    a cache round trip; possible hits are confirmed in the cache.
 
     Args:
-        token: The JWT token string to check
+        jti: The token's unique id
 
     Returns:
-        True if token is blacklisted, False otherwise
+        True if the token is blacklisted, False otherwise
     """
+    if not get_revocation_filter().might_be_revoked(jti):
+        return False
+
     try:
         from app.core.redis import get_cache
 
-        # Decode token to get jti
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        jti = payload.get("jti")
-
-        if not jti:
-            # Old tokens without jti cannot be blacklisted
-            # Consider them valid (or update all tokens to have jti)
-            return False
-
-        # Check cache
         cache = get_cache()
-        key = f"blacklist:token:{jti}"
-        return await cache.exists(key)
+        return await cache.exists(f"{BLACKLIST_KEY_PREFIX}{jti}")
 
-    except JWTError:
-        # If token is invalid, treat as blacklisted
-        return True
     except Exception as e:
         logger.error(f"Error checking token blacklist: {e}")
         # Fail secure: treat as blacklisted on error
         return True
 
 
+async def is_token_blacklisted(token: str) -> bool:
+    """
+    Check if a token is blacklisted.
+
+    Args:
+        token: The JWT token string to check
+
+    Returns:
+        True if token is blacklisted, False otherwise
+    """
+    claims = _decode_claims(token)
+    if claims is None:
+        # If token is invalid, treat as blacklisted
+        return True
+
+    jti = claims.get("jti")
+    if not jti:
+        # Old tokens without jti cannot be blacklisted
+        # Consider them valid (or update all tokens to have jti)
+        return False
+
+    return await is_jti_revoked(jti)
+
+
 async def verify_token_with_blacklist(token: str, token_type: str = "access") -> Optional[TokenData]:
     """
     Verify a JWT token and check if it's blacklisted.
+    The token is decoded once and the claims are reused for both checks.
 
     Args:
         token: The JWT token string
@@ -282,10 +346,15 @@ async def verify_token_with_blacklist(token: str, token_type: str = "access") ->
     Returns:
         TokenData if valid and not blacklisted, None otherwise
     """
+    claims = _decode_claims(token)
+    if claims is None:
+        return None
+
     # First check if token is blacklisted
-    if await is_token_blacklisted(token):
+    jti = claims.get("jti")
+    if jti and await is_jti_revoked(jti):
         logger.warning("Attempted use of blacklisted token")
         return None
 
     # Then do standard token verification
-    return verify_token(token, token_type)
+    return _token_data_from_payload(_payload_from_claims(claims), token_type)
@@ -3,17 +3,115 @@
 Slow query logging for performance monitoring.
 Tracks database query execution time and logs slow queries.
 """
+import functools
 import logging
+import re
 import time
-from typing import Any
+from typing import Any, Dict, List, Optional
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from app.core.config import settings
+from app.core.quantile_sketch import QuantileSketch
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of distinct fingerprints tracked (the rest are grouped)
+MAX_FINGERPRINTS = 500
+OTHER_FINGERPRINT = "<other>"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_BIND_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint_statement(statement: str) -> str:
+    """
+    Normalize a SQL statement into a fingerprint.
+    Literals and bind parameters become '?', IN lists and multi-row VALUES collapse.
+
+    Args:
+        statement: SQL statement as sent to the driver
+
+    Returns:
+        Normalized statement
+    """
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _BIND_PARAM.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (?...)", text)
+    text = _VALUES_ROWS.sub(r"\1, ...", text)
+    return text
+
+
+class FingerprintStats:
+    """Aggregated statistics for one statement fingerprint."""
+
+    __slots__ = ("fingerprint", "count", "total_time_ms", "rows", "sketch",
+                 "slowest_ms", "slowest_statement", "slowest_parameters")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total_time_ms = 0.0
+        self.rows = 0
+        self.sketch = QuantileSketch(relative_accuracy=0.02)
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.slowest_parameters: Any = None
+
+    def record(self, duration_ms: float, rows: Optional[int], statement: str, parameters: Any, executemany: bool):
+        self.count += 1
+        self.total_time_ms += duration_ms
+        if rows:
+            self.rows += rows
+        self.sketch.add(duration_ms)
+        if duration_ms > self.slowest_ms:
+            self.slowest_ms = duration_ms
+            # Keep the slowest sample for EXPLAIN (single-statement executions only)
+            if not executemany:
+                self.slowest_statement = statement
+                self.slowest_parameters = parameters
+
+    def to_dict(self) -> dict:
+        p50, p95, p99 = (self.sketch.quantile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_time_ms": round(self.total_time_ms, 2),
+            "average_ms": round(self.total_time_ms / self.count, 3) if self.count else 0,
+            "p50_ms": round(p50, 3) if p50 is not None else None,
+            "p95_ms": round(p95, 3) if p95 is not None else None,
+            "p99_ms": round(p99, 3) if p99 is not None else None,
+            "max_ms": round(self.slowest_ms, 3),
+            "rows": self.rows,
+            "rows_per_call": round(self.rows / self.count, 1) if self.count else 0
+        }
+
+
+def _rows_returned(cursor: Any, context: Any) -> Optional[int]:
+    """
+    Rows returned by a statement, without consuming the cursor.
+    The async adapters (asyncpg, aiosqlite) prefetch SELECT results into
+    cursor._rows; DML statements report rowcount. Server-side cursors are skipped.
+    """
+    execution_options = getattr(context, "execution_options", None) or {}
+    if execution_options.get("stream_results") or "yield_per" in execution_options:
+        return None
+
+    if getattr(cursor, "description", None) is not None:
+        rows = getattr(cursor, "_rows", None)
+        return len(rows) if rows is not None else None
+
+    rowcount = getattr(cursor, "rowcount", -1)
+    return rowcount if rowcount is not None and rowcount >= 0 else None
+
 
 class SlowQueryLogger:
     """
@@ -32,6 +130,7 @@ class SlowQueryLogger:
         self.query_count = 0
         self.slow_query_count = 0
         self.total_query_time_ms = 0.0
+        self.fingerprints: Dict[str, FingerprintStats] = {}
 
     def before_cursor_execute(
         self,
@@ -67,6 +166,7 @@ class SlowQueryLogger:
         # Update statistics
         self.query_count += 1
         self.total_query_time_ms += total_time_ms
+        self._record_fingerprint(statement, parameters, context, cursor, executemany, total_time_ms)
 
         # Log slow queries
         if total_time_ms > self.threshold_ms:
@@ -93,6 +193,50 @@ class SlowQueryLogger:
                 f"({(self.slow_query_count/self.query_count*100):.1f}%)"
             )
 
+    def _record_fingerprint(
+        self,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        cursor: Any,
+        executemany: bool,
+        total_time_ms: float
+    ):
+        """Aggregate timing and row counts per statement fingerprint."""
+        fingerprint = fingerprint_statement(statement)
+        stats = self.fingerprints.get(fingerprint)
+        if stats is None:
+            if len(self.fingerprints) >= MAX_FINGERPRINTS:
+                fingerprint = OTHER_FINGERPRINT
+                stats = self.fingerprints.get(fingerprint)
+            if stats is None:
+                stats = self.fingerprints[fingerprint] = FingerprintStats(fingerprint)
+
+        stats.record(total_time_ms, _rows_returned(cursor, context), statement, parameters, executemany)
+
+    def get_top_fingerprints(self, top_n: int = 10, order_by: str = "total_time_ms") -> List[dict]:
+        """
+        Get the top fingerprints.
+
+        Args:
+            top_n: Number of fingerprints to return
+            order_by: total_time_ms, count, p95_ms, max_ms or rows
+
+        Returns:
+            List of fingerprint statistics, most expensive first
+        """
+        entries = [stats.to_dict() for stats in self.fingerprints.values()]
+        entries.sort(key=lambda e: e.get(order_by) or 0, reverse=True)
+        return entries[:top_n]
+
+    def get_slowest_sample(self) -> Optional[FingerprintStats]:
+        """Fingerprint with the slowest single execution that has an explainable sample."""
+        candidates = [
+            stats for stats in self.fingerprints.values()
+            if stats.slowest_statement and stats.fingerprint != OTHER_FINGERPRINT
+        ]
+        return max(candidates, key=lambda stats: stats.slowest_ms, default=None)
+
     def get_stats(self) -> dict:
         """
         Get query performance statistics.
@@ -116,7 +260,8 @@ class SlowQueryLogger:
             "slow_query_percentage": round(slow_query_percentage, 2),
             "average_query_time_ms": round(avg_query_time, 2),
             "total_query_time_ms": round(self.total_query_time_ms, 2),
-            "threshold_ms": self.threshold_ms
+            "threshold_ms": self.threshold_ms,
+            "distinct_fingerprints": len(self.fingerprints)
         }
 
 
@@ -138,12 +283,18 @@ def setup_slow_query_logging(engine: Engine | AsyncEngine, threshold_ms: int = N
     if threshold_ms is None:
         threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
 
-    # Create logger instance
-    _slow_query_logger = SlowQueryLogger(threshold_ms=threshold_ms)
-
     # For async engines, we need to listen to the sync engine underneath
     target_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
 
+    # Already listening on this engine (init_db called again)
+    if _slow_query_logger is not None and event.contains(
+        target_engine, "after_cursor_execute", _slow_query_logger.after_cursor_execute
+    ):
+        return
+
+    # Create logger instance
+    _slow_query_logger = SlowQueryLogger(threshold_ms=threshold_ms)
+
     # Register event listeners
     event.listen(
         target_engine,
@@ -177,3 +328,55 @@ def get_query_stats() -> dict:
         }
 
     return _slow_query_logger.get_stats()
+
+
+def get_top_query_fingerprints(top_n: int = 10, order_by: str = "total_time_ms") -> List[dict]:
+    """
+    Get the most expensive statement fingerprints.
+
+    Returns:
+        List of fingerprint statistics (empty if logger not initialized)
+    """
+    if _slow_query_logger is None:
+        return []
+
+    return _slow_query_logger.get_top_fingerprints(top_n, order_by)
+
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+async def explain_slowest_query(engine: AsyncEngine) -> Optional[dict]:
+    """
+    Run EXPLAIN (without ANALYZE) on the slowest recorded statement (PostgreSQL only).
+    Only read statements are explained; the plan is computed, the query is not executed.
+
+    Args:
+        engine: Async engine the statement was recorded on
+
+    Returns:
+        Fingerprint, duration and JSON plan, or None if unavailable
+    """
+    if _slow_query_logger is None or engine.dialect.name != "postgresql":
+        return None
+
+    stats = _slow_query_logger.get_slowest_sample()
+    if stats is None or not _EXPLAINABLE.match(stats.slowest_statement):
+        return None
+
+    try:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {stats.slowest_statement}",
+                stats.slowest_parameters or ()
+            )
+            plan = result.scalar()
+    except Exception as e:
+        logger.error(f"EXPLAIN failed for slowest query: {e}")
+        return {"fingerprint": stats.fingerprint, "duration_ms": round(stats.slowest_ms, 2), "error": str(e)}
+
+    return {
+        "fingerprint": stats.fingerprint,
+        "duration_ms": round(stats.slowest_ms, 2),
+        "plan": plan
+    }
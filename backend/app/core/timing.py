@@ -0,0 +1,245 @@
+# backend/app/core/timing.py
+"""
+Per-stage request timing.
+
+    with span("chat.openai"):
+        resp = await ...
+
+Spans are recorded on the trace of the current request (a context variable
+set by ServerTimingMiddleware). Only a sample of requests is traced; outside
+a traced request span() returns a shared no-op, so instrumented code costs a
+context variable lookup.
+
+Traced requests get a Server-Timing response header with the stages that
+finished before the response started, and every stage is aggregated into a
+per-stage latency histogram (see get_timing_stats). Nested spans overlap.
+"""
+import functools
+import inspect
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of distinct stage names tracked (the rest are grouped)
+MAX_STAGES = 200
+OTHER_STAGE = "other"
+
+
+class RequestTiming:
+    """Stage durations of one traced request, in recording order"""
+
+    __slots__ = ("stages", "start")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def header_value(self, total_ms: float) -> str:
+        """Server-Timing header value (repeated stages are summed)"""
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.stages.items()]
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+class _Span:
+    __slots__ = ("timing", "name", "start")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timing.add(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """
+    Time a block as stage `name` of the current request.
+    Works in sync and async code (the block may contain awaits).
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        return _NULL_SPAN
+    return _Span(timing, name)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function (sync or async) as stage `name`"""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class StageStats:
+    """Aggregated durations of one stage"""
+
+    __slots__ = ("name", "count", "total_ms", "max_ms", "sketch")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.sketch = QuantileSketch(relative_accuracy=0.02)
+
+    def record(self, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.sketch.add(duration_ms)
+
+    def to_dict(self) -> dict:
+        p50, p95, p99 = (self.sketch.quantile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "stage": self.name,
+            "count": self.count,
+            "total_time_ms": round(self.total_ms, 2),
+            "average_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "p50_ms": round(p50, 3) if p50 is not None else None,
+            "p95_ms": round(p95, 3) if p95 is not None else None,
+            "p99_ms": round(p99, 3) if p99 is not None else None,
+            "max_ms": round(self.max_ms, 3)
+        }
+
+
+class StageRegistry:
+    """Per-stage histograms of traced requests (per worker)"""
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.traced_requests = 0
+
+    def record(self, timing: RequestTiming) -> None:
+        self.traced_requests += 1
+        for name, duration_ms in timing.stages.items():
+            stats = self.stages.get(name)
+            if stats is None:
+                if len(self.stages) >= MAX_STAGES:
+                    name = OTHER_STAGE
+                    stats = self.stages.get(name)
+                if stats is None:
+                    stats = self.stages[name] = StageStats(name)
+            stats.record(duration_ms)
+
+    def get_stats(self, top_n: int = 50, order_by: str = "total_time_ms") -> List[dict]:
+        entries = [stats.to_dict() for stats in self.stages.values()]
+        entries.sort(key=lambda e: e.get(order_by) or 0, reverse=True)
+        return entries[:top_n]
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.traced_requests = 0
+
+
+_registry = StageRegistry()
+
+
+def get_stage_registry() -> StageRegistry:
+    return _registry
+
+
+def get_timing_stats(top_n: int = 50, order_by: str = "total_time_ms") -> dict:
+    """
+    Stage latency statistics of traced requests.
+
+    Returns:
+        Sampling configuration and per-stage statistics, most expensive first
+    """
+    return {
+        "enabled": settings.SERVER_TIMING_ENABLED,
+        "sample_rate": settings.SERVER_TIMING_SAMPLE_RATE,
+        "traced_requests": _registry.traced_requests,
+        "stages": _registry.get_stats(top_n, order_by)
+    }
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware tracing a sample of HTTP requests.
+    Adds the Server-Timing header and feeds the stage histograms.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - timing.start) * 1000
+                MutableHeaders(scope=message).append("Server-Timing", timing.header_value(total_ms))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
+            _registry.record(timing)
+
+
+def setup_server_timing(app):
+    """
+    Setup per-stage request timing.
+
+    Args:
+        app: FastAPI application instance
+    """
+    if not settings.SERVER_TIMING_ENABLED:
+        return
+
+    app.add_middleware(ServerTimingMiddleware, sample_rate=settings.SERVER_TIMING_SAMPLE_RATE)
+    logger.info(f"Server-Timing enabled (sample rate: {settings.SERVER_TIMING_SAMPLE_RATE:.0%})")
@@ -0,0 +1,212 @@
+# backend/app/core/token_revocation.py
+"""
+Local filter of revoked JWT ids.
+
+Revoked tokens live in the cache under blacklist:token:<jti>. Each worker
+mirrors those ids in a Bloom filter, rebuilt from the cache at startup and
+kept current through pub/sub, so the common "not revoked" case is answered
+in-process. A possible hit is confirmed against the cache.
+
+Whenever the mirror may be incomplete (not yet loaded, pub/sub messages lost,
+listener errors, filter saturated) the filter reports "maybe revoked" for
+every token, which falls back to the cache lookup.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.bloom_filter import BloomFilter
+from app.core.config import settings
+from app.core.pubsub import get_pubsub, Subscription
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "auth:revocations"
+BLACKLIST_KEY_PREFIX = "blacklist:token:"
+
+# How often the listener checks the broker for listener errors (seconds)
+_HEALTH_CHECK_INTERVAL = 5.0
+
+
+class TokenRevocationFilter:
+    """
+    Bloom filter of revoked jti values with a readiness flag.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._rebuilding: Optional[BloomFilter] = None
+        self.ready = False
+        self.local_answers = 0
+        self.cache_checks = 0
+        self.rebuilds = 0
+
+    def add(self, jti: str) -> None:
+        """Record a revoked token id"""
+        self._bloom.add(jti)
+        if self._rebuilding is not None:
+            self._rebuilding.add(jti)
+        if self._bloom.saturated and self.ready:
+            logger.warning(
+                f"Token revocation filter over capacity ({self._bloom.count}/{self.capacity}) "
+                f"- checking the cache for every token until the next rebuild"
+            )
+            self.ready = False
+
+    def might_be_revoked(self, jti: str) -> bool:
+        """
+        False only if the token is certainly not revoked.
+        True means the cache must be checked.
+        """
+        if self.ready and jti not in self._bloom:
+            self.local_answers += 1
+            return False
+        self.cache_checks += 1
+        return True
+
+    def mark_stale(self, reason: str) -> None:
+        if self.ready:
+            logger.warning(f"Token revocation filter stale ({reason}) - falling back to cache lookups")
+        self.ready = False
+
+    async def rebuild(self, cache) -> bool:
+        """
+        Reload revoked ids from the cache.
+
+        Returns:
+            True if the filter is ready afterwards
+        """
+        if not await cache.ping():
+            self.mark_stale("cache unreachable")
+            return False
+
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        self._rebuilding = fresh
+        try:
+            keys = await cache.keys(f"{BLACKLIST_KEY_PREFIX}*")
+            for key in keys:
+                fresh.add(key[len(BLACKLIST_KEY_PREFIX):])
+        finally:
+            self._rebuilding = None
+
+        # A failed SCAN returns no keys; do not trust an empty load from a dead cache
+        if not await cache.ping():
+            self.mark_stale("cache unreachable")
+            return False
+
+        self._bloom = fresh
+        self.rebuilds += 1
+        self.ready = not fresh.saturated
+        if not self.ready:
+            logger.warning(f"Token revocation filter over capacity after rebuild ({fresh.count} ids)")
+        return self.ready
+
+    def get_stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "entries_added": self._bloom.count,
+            "capacity": self.capacity,
+            "local_answers": self.local_answers,
+            "cache_checks": self.cache_checks,
+            "rebuilds": self.rebuilds
+        }
+
+
+# Global instances
+_revocation_filter: Optional[TokenRevocationFilter] = None
+_listener: Optional[asyncio.Task] = None
+_subscription: Optional[Subscription] = None
+
+
+def get_revocation_filter() -> TokenRevocationFilter:
+    """Get or create the revocation filter (not ready until started)"""
+    global _revocation_filter
+    if _revocation_filter is None:
+        _revocation_filter = TokenRevocationFilter(
+            capacity=settings.REVOCATION_FILTER_CAPACITY,
+            error_rate=settings.REVOCATION_FILTER_ERROR_RATE
+        )
+    return _revocation_filter
+
+
+async def publish_revocation(jti: str) -> None:
+    """Record a revocation locally and broadcast it to the other workers"""
+    get_revocation_filter().add(jti)
+
+    broker = get_pubsub()
+    if broker is None:
+        return
+    try:
+        await broker.publish(REVOCATION_CHANNEL, {"jti": jti})
+    except Exception as e:
+        logger.warning(f"Failed to broadcast token revocation: {e}")
+
+
+def _listener_errors() -> int:
+    broker = get_pubsub()
+    return getattr(broker, "listener_errors", 0) if broker is not None else 0
+
+
+async def _listen(subscription: Subscription) -> None:
+    from app.core.redis import get_cache
+
+    revocation_filter = get_revocation_filter()
+    dropped = subscription.dropped
+    errors = _listener_errors()
+    last_rebuild = time.monotonic()
+
+    while True:
+        message = await subscription.get(timeout=_HEALTH_CHECK_INTERVAL)
+        if message is not None:
+            jti = message.get("jti") if isinstance(message, dict) else None
+            if jti:
+                revocation_filter.add(jti)
+
+        current_errors = _listener_errors()
+        if subscription.dropped != dropped or current_errors != errors:
+            revocation_filter.mark_stale("pub/sub messages may have been lost")
+            dropped = subscription.dropped
+            errors = current_errors
+
+        since_rebuild = time.monotonic() - last_rebuild
+        if (since_rebuild >= settings.REVOCATION_FILTER_RESYNC_SECONDS
+                or (not revocation_filter.ready and since_rebuild >= _HEALTH_CHECK_INTERVAL)):
+            last_rebuild = time.monotonic()
+            try:
+                await revocation_filter.rebuild(get_cache())
+            except Exception as e:
+                revocation_filter.mark_stale(f"rebuild failed: {e}")
+
+
+async def start_revocation_filter() -> None:
+    """Load the filter and follow revocations (call at startup, after cache and pub/sub)"""
+    global _listener, _subscription
+    from app.core.redis import get_cache
+
+    broker = get_pubsub()
+    if broker is None or _listener is not None:
+        return
+
+    # Subscribe before loading so revocations during the load are not missed
+    _subscription = await broker.subscribe(REVOCATION_CHANNEL)
+    await get_revocation_filter().rebuild(get_cache())
+    _listener = asyncio.create_task(_listen(_subscription))
+
+
+async def stop_revocation_filter() -> None:
+    """Stop following revocations (call at shutdown)"""
+    global _listener, _subscription
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+    if _subscription is not None:
+        await _subscription.close()
+        _subscription = None
+    get_revocation_filter().ready = False
@@ -0,0 +1,199 @@
+# backend/app/core/user_cache.py
+"""
+Authenticated-user snapshot cache.
+
+After the JWT or API key is verified, authentication only needs a few user
+fields (id, role, status, lock). They are cached per user id for a short TTL
+so authenticated requests skip the users table. Changes to status, role,
+password or lock state invalidate the entry on every worker through pub/sub.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pubsub import get_pubsub, Subscription
+from app.models.user import UserDB, UserRole, UserStatus
+
+logger = logging.getLogger(__name__)
+
+USER_INVALIDATION_CHANNEL = "auth:users"
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Fields of an authenticated user needed by auth dependencies and handlers"""
+    id: str
+    username: str
+    email: str
+    role: UserRole
+    status: UserStatus
+    locked_until: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: UserDB) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            status=user.status,
+            locked_until=user.locked_until
+        )
+
+
+class UserSnapshotCache:
+    """
+    TTL + LRU cache of user snapshots keyed by user id.
+
+    `generation` increases on every invalidation; a snapshot loaded before an
+    invalidation is not stored, so a concurrent status change cannot be
+    overwritten by a stale read.
+    """
+
+    def __init__(self, ttl: int = 60, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[UserSnapshot, float]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[UserSnapshot]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, snapshot: UserSnapshot, generation: Optional[int] = None) -> None:
+        """Store a snapshot (skipped if an invalidation happened since `generation`)"""
+        if self.ttl <= 0 or (generation is not None and generation != self.generation):
+            return
+        self._entries[snapshot.id] = (snapshot, time.monotonic() + self.ttl)
+        self._entries.move_to_end(snapshot.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self.generation += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl
+        }
+
+
+# Global instances
+_user_cache: Optional[UserSnapshotCache] = None
+_listener: Optional[asyncio.Task] = None
+_subscription: Optional[Subscription] = None
+
+
+def get_user_cache() -> UserSnapshotCache:
+    """Get or create the user snapshot cache"""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserSnapshotCache(
+            ttl=settings.USER_CACHE_TTL,
+            max_entries=settings.USER_CACHE_MAX_ENTRIES
+        )
+    return _user_cache
+
+
+async def load_user_snapshot(db: AsyncSession, user_id: str) -> Optional[UserSnapshot]:
+    """
+    Get a user snapshot from the cache, loading it from the database on a miss.
+
+    Returns:
+        The snapshot, or None if the user does not exist
+    """
+    cache = get_user_cache()
+    snapshot = cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    generation = cache.generation
+    result = await db.execute(select(UserDB).where(UserDB.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+
+    snapshot = UserSnapshot.from_user(user)
+    cache.put(snapshot, generation)
+    return snapshot
+
+
+async def invalidate_user(user_id: str) -> None:
+    """
+    Drop a user's snapshot on this worker and broadcast to the others.
+    Call after changing status, role, password or lock state.
+    """
+    get_user_cache().invalidate(user_id)
+
+    broker = get_pubsub()
+    if broker is None:
+        return
+    try:
+        await broker.publish(USER_INVALIDATION_CHANNEL, {"user_id": user_id})
+    except Exception as e:
+        logger.warning(f"Failed to broadcast user invalidation for {user_id}: {e}")
+
+
+async def _listen(subscription: Subscription) -> None:
+    dropped = subscription.dropped
+    async for message in subscription:
+        cache = get_user_cache()
+        if subscription.dropped != dropped:
+            # Some invalidations were lost while the queue was full
+            dropped = subscription.dropped
+            cache.clear()
+        user_id = message.get("user_id") if isinstance(message, dict) else None
+        if user_id:
+            cache.invalidate(user_id)
+        else:
+            cache.clear()
+
+
+async def start_invalidation_listener() -> None:
+    """Apply invalidations published by other workers (call at startup)"""
+    global _listener, _subscription
+    broker = get_pubsub()
+    if broker is None or _listener is not None:
+        return
+    _subscription = await broker.subscribe(USER_INVALIDATION_CHANNEL)
+    _listener = asyncio.create_task(_listen(_subscription))
+
+
+async def stop_invalidation_listener() -> None:
+    """Stop the invalidation listener (call at shutdown)"""
+    global _listener, _subscription
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+    if _subscription is not None:
+        await _subscription.close()
+        _subscription = None
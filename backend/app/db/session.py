@@ -3,24 +3,33 @@
 Database session management with async support
 """
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import StaticPool, NullPool
+from sqlalchemy.pool import NullPool
 from typing import AsyncGenerator
 
 from app.core.config import settings
 from app.core.slow_query_logger import setup_slow_query_logging
+from app.core.pool_monitor import setup_pool_monitoring, InstrumentedAsyncAdaptedQueuePool
+from app.db.sqlite import create_sqlite_engines, to_async_sqlite_url, SQLiteRoutingSession
 
 # Create async engine based on database URL
 # Convert sync URLs to async variants
 async_database_url = settings.DATABASE_URL
 
+# Reader engine (SQLite production profile only - reads go to a separate pool)
+read_engine = None
+
 if settings.DATABASE_URL.startswith("sqlite"):
     # SQLite async - use aiosqlite driver
-    async_database_url = settings.DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
-    # SQLite-specific configuration for development
-    engine = create_async_engine(
+    async_database_url = to_async_sqlite_url(settings.DATABASE_URL)
+    # development: single shared connection; production: WAL + readers + single writer
+    engine, read_engine = create_sqlite_engines(
         async_database_url,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
+        profile=settings.SQLITE_PROFILE,
+        read_pool_size=settings.SQLITE_READ_POOL_SIZE,
+        mmap_size_mb=settings.SQLITE_MMAP_SIZE_MB,
+        cache_size_mb=settings.SQLITE_CACHE_SIZE_MB,
+        busy_timeout_ms=settings.SQLITE_BUSY_TIMEOUT_MS,
+        writer_timeout=settings.DB_POOL_TIMEOUT,
         echo=settings.DEBUG
     )
 elif settings.DATABASE_URL.startswith("postgresql+psycopg2://"):
@@ -29,29 +38,48 @@ elif settings.DATABASE_URL.startswith("postgresql+psycopg2://"):
     # PostgreSQL configuration for production
     engine = create_async_engine(
         async_database_url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         echo=settings.DEBUG
     )
 else:
     # Fallback - assume it's already async compatible
     engine = create_async_engine(
         async_database_url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         echo=settings.DEBUG
     )
 
 # Async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+if read_engine is not None:
+    # SQLite production profile: route SELECTs to readers, writes to the single writer
+    AsyncSessionLocal = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        sync_session_class=SQLiteRoutingSession,
+        reader_engine=read_engine,
+        writer_engine=engine,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -82,6 +110,7 @@ async def init_db():
 
     # Setup slow query logging for performance monitoring
     setup_slow_query_logging(engine)
+    setup_pool_monitoring(engine)
 
     # Create all tables asynchronously
     async with engine.begin() as conn:
@@ -95,3 +124,5 @@ async def close_db():
     Call this at application shutdown.
     """
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
@@ -0,0 +1,172 @@
+# backend/app/db/sqlite.py
+"""
+SQLite engine profiles.
+
+- development: a single shared aiosqlite connection (StaticPool), as before.
+- production: WAL journal, synchronous=NORMAL, mmap and page cache pragmas,
+  a small pool of read-only reader connections and a single writer connection.
+  Writers queue on the writer pool (size 1, no overflow), so writes are
+  serialized in-process instead of failing with "database is locked", while
+  readers keep reading the last committed snapshot concurrently.
+"""
+import logging
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Select
+
+from app.core.pool_monitor import InstrumentedAsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PROFILE_DEVELOPMENT = "development"
+SQLITE_PROFILE_PRODUCTION = "production"
+
+# Session.info flag: the current transaction has written through the writer connection
+_WRITER_ACTIVE_KEY = "sqlite_writer_active"
+
+
+def to_async_sqlite_url(url: str) -> str:
+    """Convert a sqlite:/// URL to the aiosqlite driver."""
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    return url
+
+
+def is_file_database(url: str) -> bool:
+    """True for file-backed SQLite URLs (WAL needs a real file)."""
+    return ":memory:" not in url and "mode=memory" not in url and not url.rstrip("/").endswith(":")
+
+
+def _apply_pragmas(
+    dbapi_connection: Any,
+    read_only: bool,
+    mmap_size_mb: int,
+    cache_size_mb: int,
+    busy_timeout_ms: int
+) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        if not read_only:
+            # Persistent in the database file; only the writer needs to set it
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size_mb) * 1024 * 1024}")
+        # Negative cache_size is expressed in KiB
+        cursor.execute(f"PRAGMA cache_size={-int(cache_size_mb) * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _install_pragmas(engine: AsyncEngine, read_only: bool, **pragmas) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only=read_only, **pragmas)
+
+
+def create_sqlite_engines(
+    url: str,
+    profile: str = SQLITE_PROFILE_DEVELOPMENT,
+    read_pool_size: int = 4,
+    mmap_size_mb: int = 256,
+    cache_size_mb: int = 64,
+    busy_timeout_ms: int = 5000,
+    writer_timeout: int = 30,
+    echo: bool = False
+) -> Tuple[AsyncEngine, Optional[AsyncEngine]]:
+    """
+    Create SQLite engines for the given profile.
+
+    Args:
+        url: sqlite:/// or sqlite+aiosqlite:/// URL
+        profile: "development" or "production"
+        read_pool_size: Number of reader connections (production)
+        mmap_size_mb: PRAGMA mmap_size in MB (production)
+        cache_size_mb: PRAGMA cache_size in MB (production)
+        busy_timeout_ms: PRAGMA busy_timeout (production, cross-process locking)
+        writer_timeout: Seconds a write may wait for the writer connection
+        echo: SQL echo
+
+    Returns:
+        (writer engine, reader engine or None in development)
+    """
+    url = to_async_sqlite_url(url)
+
+    if profile == SQLITE_PROFILE_PRODUCTION and not is_file_database(url):
+        logger.warning("SQLite production profile requires a file database - using development profile")
+        profile = SQLITE_PROFILE_DEVELOPMENT
+
+    if profile != SQLITE_PROFILE_PRODUCTION:
+        engine = create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            echo=echo
+        )
+        return engine, None
+
+    pragmas = dict(mmap_size_mb=mmap_size_mb, cache_size_mb=cache_size_mb, busy_timeout_ms=busy_timeout_ms)
+
+    # Single writer connection: concurrent writers wait in the pool queue
+    writer = create_async_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=writer_timeout,
+        echo=echo
+    )
+    _install_pragmas(writer, read_only=False, **pragmas)
+
+    reader = create_async_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=read_pool_size,
+        max_overflow=0,
+        pool_timeout=writer_timeout,
+        echo=echo
+    )
+    _install_pragmas(reader, read_only=True, **pragmas)
+
+    logger.info(
+        f"SQLite production profile: WAL, synchronous=NORMAL, "
+        f"{read_pool_size} readers + 1 writer, mmap {mmap_size_mb}MB, cache {cache_size_mb}MB"
+    )
+
+    return writer, reader
+
+
+class SQLiteRoutingSession(Session):
+    """
+    Session routing plain SELECTs to the reader pool and everything else
+    (flushes, INSERT/UPDATE/DELETE, text() statements) to the writer.
+
+    Once a transaction has used the writer, the rest of it stays on the writer
+    so it reads its own uncommitted changes.
+    """
+
+    def __init__(self, *args, reader_engine: AsyncEngine = None, writer_engine: AsyncEngine = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reader_bind = reader_engine.sync_engine
+        self._writer_bind = writer_engine.sync_engine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get(_WRITER_ACTIVE_KEY) or self._flushing or not isinstance(clause, Select):
+            self.info[_WRITER_ACTIVE_KEY] = True
+            return self._writer_bind
+        return self._reader_bind
+
+
+@event.listens_for(SQLiteRoutingSession, "after_transaction_end")
+def _reset_writer_flag(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_WRITER_ACTIVE_KEY, None)
@@ -2,11 +2,12 @@
 """
 Main FastAPI application with security features enabled
 """
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
+import hmac
 import logging
 import time
 import asyncio
@@ -18,16 +19,32 @@ from datetime import datetime
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.middleware import setup_security_middleware
-from app.core.rate_limit import setup_rate_limiter
+from app.core.rate_limit import setup_rate_limiter, limiter
 from app.core.request_limits import setup_request_limits
+from app.core.timing import setup_server_timing, get_timing_stats
+from app.core.profiler import setup_profiler
+from app.core.loop_monitor import get_loop_stats, start_loop_monitor, stop_loop_monitor
+from app.core.metrics import (
+    OPENMETRICS_CONTENT_TYPE, setup_metrics, collect_all_workers, render_openmetrics,
+    start_metrics_publisher, stop_metrics_publisher
+)
 from app.core.redis import CacheManager
-from app.core.circuit_breaker import get_circuit_stats
-from app.core.slow_query_logger import get_query_stats
+from app.core.pubsub import PubSubManager
+from app.core.circuit_breaker import get_circuit_stats, start_circuit_sync, stop_circuit_sync
+from app.core.slow_query_logger import get_query_stats, get_top_query_fingerprints, explain_slowest_query
+from app.core.pool_monitor import get_pool_stats
+from app.core.api_key_auth import get_usage_tracker
+from app.core.user_cache import start_invalidation_listener, stop_invalidation_listener
+from app.core.cache_decorators import (
+    get_cache_stats, start_cache_invalidation_listener, stop_cache_invalidation_listener
+)
+from app.core.token_revocation import start_revocation_filter, stop_revocation_filter
 from app.core.memory_monitor import get_memory_status, get_memory_usage, trigger_garbage_collection
+from app.core.memory_profiler import get_memory_profile, start_memory_profiler, stop_memory_profiler
 from app.core.env_validator import validate_environment
 from app.core.secure_static_files import create_secure_static_files
-from app.db.session import init_db, close_db
-from app.api.endpoints import chat, upload, products, tickets, faq, sav, auth, voice, realtime, realtime_ws
+from app.db.session import init_db, close_db, engine as db_engine
+from app.api.endpoints import chat, upload, products, tickets, faq, sav, auth, voice, realtime, realtime_ws, admin
 from app.services.storage import StorageManager
 from app.services.cloudinary_storage import CloudinaryService
 
@@ -76,6 +93,10 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Database initialization failed: {e}")
         init_failures.append(("database", str(e)))
 
+    # Start periodic flush of API key last_used timestamps
+    if app.state.db_available:
+        get_usage_tracker().start()
+
     # Initialize cache (Redis or in-memory)
     try:
         CacheManager.initialize(settings.REDIS_URL)
@@ -85,6 +106,36 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Cache initialization failed: {e}")
         init_failures.append(("cache", str(e)))
 
+    # Initialize pub/sub (Redis or in-process)
+    try:
+        PubSubManager.initialize(settings.REDIS_URL)
+        await start_invalidation_listener()
+        await start_cache_invalidation_listener()
+        await start_circuit_sync()
+        logger.info("✅ Pub/sub initialized")
+    except Exception as e:
+        logger.error(f"❌ Pub/sub initialization failed: {e}")
+        init_failures.append(("pubsub", str(e)))
+
+    # Publish this worker's metrics for cross-worker scrapes
+    if settings.METRICS_ENABLED:
+        start_metrics_publisher()
+
+    # Measure event loop lag and capture blocking stacks
+    if settings.LOOP_MONITOR_ENABLED:
+        start_loop_monitor()
+
+    # Sample in-memory store sizes (and tracemalloc diffs) for /memory/usage
+    if settings.MEMORY_PROFILER_ENABLED:
+        start_memory_profiler()
+
+    # Load the local token revocation filter (falls back to cache lookups until ready)
+    try:
+        await start_revocation_filter()
+        logger.info("✅ Token revocation filter loaded")
+    except Exception as e:
+        logger.error(f"⚠️  Token revocation filter unavailable: {e}")
+
     # Initialize storage
     try:
         StorageManager.initialize("local", base_path=settings.UPLOAD_DIR)
@@ -146,6 +197,39 @@ async def lifespan(app: FastAPI):
     logger.info("⏳ Waiting for in-flight requests to complete (max 30s)...")
     await asyncio.sleep(0.5)  # Brief pause to allow current requests to finish
 
+    # Write pending API key last_used timestamps
+    try:
+        await get_usage_tracker().stop()
+    except Exception as e:
+        logger.error(f"❌ Error flushing API key usage: {e}")
+
+    # Close pub/sub connection
+    try:
+        await stop_invalidation_listener()
+        await stop_cache_invalidation_listener()
+        await stop_circuit_sync()
+        await stop_revocation_filter()
+        await PubSubManager.close()
+        logger.info("✅ Pub/sub closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing pub/sub: {e}")
+
+    # Stop memory profiling
+    await stop_memory_profiler()
+    await stop_loop_monitor()
+
+    # Withdraw this worker's metrics
+    try:
+        await stop_metrics_publisher()
+    except Exception as e:
+        logger.error(f"❌ Error stopping metrics publisher: {e}")
+
+    # Close rate limiter storage
+    try:
+        await limiter.storage.close()
+    except Exception as e:
+        logger.error(f"❌ Error closing rate limiter storage: {e}")
+
     # Close cache connection
     try:
         logger.info("📦 Closing cache connection...")
@@ -339,6 +423,15 @@ setup_request_limits(app)
 # Setup security middleware
 setup_security_middleware(app)
 
+# Setup per-stage timing (Server-Timing headers, sampled)
+setup_server_timing(app)
+
+# Setup request metrics (/metrics)
+setup_metrics(app)
+
+# Setup on-demand profiler (admin request captures)
+setup_profiler(app)
+
 # Setup response compression (GZip)
 # Compress responses > 500 bytes to reduce bandwidth
 app.add_middleware(GZipMiddleware, minimum_size=500)
@@ -406,6 +499,8 @@ app.include_router(sav.router, prefix="/api", tags=["SAV"])
 app.include_router(voice.router, prefix="/api/voice", tags=["Voice"])
 app.include_router(realtime.router, prefix="/api/realtime", tags=["Realtime"])
 app.include_router(realtime_ws.router, prefix="/api/realtime-ws", tags=["Realtime WebSocket"])
+# Admin diagnostics (profiler)
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/", tags=["Root"])
@@ -639,12 +734,22 @@ async def circuit_breaker_status():
 
 
 @app.get("/query-stats", tags=["Health"])
-async def query_statistics():
+async def query_statistics(top: int = 10, order_by: str = "total_time_ms", explain: bool = False):
     """
     Database query performance statistics.
-    Returns metrics on query execution times and slow query detection.
+    Returns metrics on query execution times and slow query detection,
+    plus connection pool telemetry (checkouts, overflow, wait times).
+
+    Args:
+        top: Number of statement fingerprints to return
+        order_by: Fingerprint ordering (total_time_ms, count, p95_ms, max_ms, rows)
+        explain: EXPLAIN the slowest statement (PostgreSQL, requires QUERY_EXPLAIN_ENABLED)
     """
+    if order_by not in ("total_time_ms", "count", "p95_ms", "max_ms", "rows"):
+        order_by = "total_time_ms"
+
     stats = get_query_stats()
+    pool_stats = get_pool_stats()
 
     # Determine if performance is concerning
     slow_query_percentage = stats.get("slow_query_percentage", 0)
@@ -655,12 +760,87 @@ async def query_statistics():
     elif slow_query_percentage > 5:
         performance_status = "warning"
 
-    return {
+    # Pool starvation: checkouts waited longer than POOL_WAIT_WARNING_MS
+    if pool_stats.get("checkout_wait", {}).get("slow_waits") and performance_status == "good":
+        performance_status = "warning"
+
+    response = {
         "performance_status": performance_status,
         "stats": stats,
+        "pool": pool_stats,
+        "top_fingerprints": get_top_query_fingerprints(max(1, min(top, 100)), order_by),
         "timestamp": datetime.now().isoformat()
     }
 
+    if explain and settings.QUERY_EXPLAIN_ENABLED:
+        response["slowest_query_plan"] = await explain_slowest_query(db_engine)
+
+    return response
+
+
+@app.get("/timing-stats", tags=["Health"])
+async def timing_statistics(top: int = 50, order_by: str = "total_time_ms"):
+    """
+    Per-stage latency statistics (chat, voice, SAV workflow).
+    Aggregated from the sampled requests that received a Server-Timing header.
+
+    Args:
+        top: Number of stages to return
+        order_by: Stage ordering (total_time_ms, count, p95_ms, max_ms)
+    """
+    if order_by not in ("total_time_ms", "count", "p95_ms", "max_ms"):
+        order_by = "total_time_ms"
+
+    return {
+        **get_timing_stats(max(1, min(top, 200)), order_by),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/cache-stats", tags=["Health"])
+async def cache_statistics():
+    """
+    @cached lookups and hit ratios per prefix and tier of this worker
+    (l1: in-process copies, l2: shared cache).
+    """
+    return {
+        "prefixes": get_cache_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/loop-stats", tags=["Health"])
+async def loop_statistics(top: int = 20):
+    """
+    Event loop lag percentiles and the code that blocked the loop.
+    Sites are the innermost application frames seen while the loop stalled.
+
+    Args:
+        top: Number of blocking sites to return
+    """
+    return {
+        **get_loop_stats(max(1, min(top, 50))),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus metrics (OpenMetrics text format), aggregated across workers.
+    Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    snapshot = await collect_all_workers()
+    return Response(content=render_openmetrics(snapshot), media_type=OPENMETRICS_CONTENT_TYPE)
+
 
 @app.get("/memory", tags=["Health"])
 async def memory_status():
@@ -679,11 +859,14 @@ async def memory_status():
 async def memory_usage_detail():
     """
     Detailed memory usage without threshold checks.
-    Returns process and system memory metrics.
+    Returns process and system memory metrics, approximate sizes of the
+    in-memory stores and the code locations whose allocations grew
+    (tracemalloc, when MEMORY_TRACEMALLOC is enabled).
     """
     usage = get_memory_usage()
     return {
         "usage": usage,
+        "profile": get_memory_profile(),
         "timestamp": datetime.now().isoformat()
     }
 
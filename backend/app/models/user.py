@@ -189,6 +189,7 @@ class APIKeyDB(Base):
 
     id = Column(String(36), primary_key=True)
     name = Column(String(100), nullable=False)
+    key_prefix = Column(String(16), nullable=True, unique=True, index=True)  # Public lookup prefix (NULL for legacy keys)
     key_hash = Column(String(255), nullable=False, index=True)  # Index for key lookup
     user_id = Column(String(36), nullable=False, index=True)  # Index for user's keys
     scopes = Column(String(500), default="")  # Comma-separated scopes
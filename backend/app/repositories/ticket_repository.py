@@ -3,16 +3,21 @@
 Repository for SAV Ticket CRUD operations with async database persistence
 """
 import logging
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, insert
 
 from app.models.ticket import TicketDB
 from app.services.sav_workflow_engine import SAVTicket
+from app.core.cache_decorators import delete_cached
+from app.services import ticket_events
 
 logger = logging.getLogger(__name__)
 
+# Cache prefix for serialized client dossiers (see sav.generate_client_dossier)
+DOSSIER_CACHE_PREFIX = "dossier"
+
 
 class TicketRepository:
     """Repository for ticket database operations"""
@@ -96,6 +101,7 @@ class TicketRepository:
             db.add(db_ticket)
             await db.commit()
             await db.refresh(db_ticket)
+            ticket_events.emit_ticket_event(ticket_events.TICKET_CREATED, db_ticket)
             logger.info(f"Ticket {ticket.ticket_id} saved to database")
             return db_ticket
         except Exception as e:
@@ -103,12 +109,65 @@ class TicketRepository:
             await db.rollback()
             raise
 
+    @staticmethod
+    async def bulk_create(db: AsyncSession, tickets: List[SAVTicket]) -> int:
+        """
+        Insert many tickets at once with multi-row INSERT statements
+        and a single commit.
+
+        Returns:
+            Number of tickets inserted
+        """
+        if not tickets:
+            return 0
+
+        rows = [TicketRepository._ticket_to_db(ticket) for ticket in tickets]
+        try:
+            await db.execute(insert(TicketDB), rows)
+            await db.commit()
+            ticket_events.emit_tickets_imported(row["ticket_id"] for row in rows)
+            logger.info(f"{len(rows)} tickets saved to database (bulk insert)")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error bulk saving {len(rows)} tickets: {e}")
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def get_existing_ids(db: AsyncSession, ticket_ids: List[str]) -> set:
+        """Return the subset of ticket_ids already present in database"""
+        if not ticket_ids:
+            return set()
+        result = await db.execute(
+            select(TicketDB.ticket_id).where(TicketDB.ticket_id.in_(ticket_ids))
+        )
+        return set(result.scalars().all())
+
     @staticmethod
     async def get_by_id(db: AsyncSession, ticket_id: str) -> Optional[TicketDB]:
         """Get ticket by ID"""
         result = await db.execute(select(TicketDB).where(TicketDB.ticket_id == ticket_id))
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_version(db: AsyncSession, ticket_id: str) -> Optional[str]:
+        """
+        Get the ticket version (updated_at) without loading the row.
+
+        Returns:
+            ISO updated_at ("" if never set), or None if the ticket does not exist
+        """
+        result = await db.execute(select(TicketDB.updated_at).where(TicketDB.ticket_id == ticket_id))
+        row = result.first()
+        if row is None:
+            return None
+        return row[0].isoformat() if row[0] else ""
+
+    @staticmethod
+    async def invalidate_cached_views(ticket_id: str) -> None:
+        """Drop cached views derived from a ticket (client dossier)"""
+        await delete_cached(DOSSIER_CACHE_PREFIX, ticket_id)
+
     @staticmethod
     async def get_all(db: AsyncSession, limit: int = 100, offset: int = 0) -> List[TicketDB]:
         """Get all tickets with pagination"""
@@ -141,8 +200,54 @@ class TicketRepository:
         return list(result.scalars().all())
 
     @staticmethod
-    async def update(db: AsyncSession, ticket: SAVTicket) -> TicketDB:
-        """Update existing ticket"""
+    async def stream_for_export(
+        db: AsyncSession,
+        columns: List[str],
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        statuses: Optional[List[str]] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream ticket rows for export through a server-side cursor.
+
+        Only the requested columns are selected and rows are fetched
+        `batch_size` at a time (`yield_per`), so memory stays flat regardless
+        of how many tickets match.
+
+        Args:
+            db: Database session
+            columns: Column names of `sav_tickets` to select
+            created_from: Inclusive lower bound on created_at
+            created_to: Exclusive upper bound on created_at
+            statuses: Optional list of statuses to keep
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            One dict per ticket, keyed by column name
+        """
+        table_columns = TicketDB.__table__.c
+        stmt = select(*[table_columns[name] for name in columns])
+
+        if created_from:
+            stmt = stmt.where(TicketDB.created_at >= created_from)
+        if created_to:
+            stmt = stmt.where(TicketDB.created_at < created_to)
+        if statuses:
+            stmt = stmt.where(TicketDB.status.in_(statuses))
+
+        stmt = stmt.order_by(TicketDB.created_at, TicketDB.ticket_id).execution_options(yield_per=batch_size)
+
+        result = await db.stream(stmt)
+        try:
+            async for row in result.mappings():
+                yield dict(row)
+        finally:
+            await result.close()
+
+    @staticmethod
+    async def update(db: AsyncSession, ticket: SAVTicket, event_type: str = ticket_events.TICKET_UPDATED) -> TicketDB:
+        """Update existing ticket (published as `event_type` once committed)"""
         try:
             result = await db.execute(select(TicketDB).where(TicketDB.ticket_id == ticket.ticket_id))
             db_ticket = result.scalar_one_or_none()
@@ -157,6 +262,8 @@ class TicketRepository:
             db_ticket.updated_at = datetime.now()
             await db.commit()
             await db.refresh(db_ticket)
+            await TicketRepository.invalidate_cached_views(ticket.ticket_id)
+            ticket_events.emit_ticket_event(event_type, db_ticket)
             logger.info(f"Ticket {ticket.ticket_id} updated in database")
             return db_ticket
         except Exception as e:
@@ -173,6 +280,8 @@ class TicketRepository:
             if db_ticket:
                 await db.delete(db_ticket)
                 await db.commit()
+                await TicketRepository.invalidate_cached_views(ticket_id)
+                ticket_events.emit_ticket_event(ticket_events.TICKET_DELETED, ticket_id=ticket_id)
                 logger.info(f"Ticket {ticket_id} deleted from database")
                 return True
             return False
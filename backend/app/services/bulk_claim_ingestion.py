@@ -0,0 +1,277 @@
+# backend/app/services/bulk_claim_ingestion.py
+"""
+Import en masse de réclamations SAV (fichiers CSV magasins / centre d'appels)
+
+Le fichier est lu ligne par ligne, les étapes d'analyse déterministes du
+workflow SAV (problème, ton, garantie, priorité, SLA) sont exécutées par lots
+et les tickets de chaque lot sont écrits avec des INSERT multi-lignes.
+"""
+
+import asyncio
+import csv
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.warranty import WarrantyType
+from app.repositories.ticket_repository import ticket_repository
+from app.services.sav_workflow_engine import SAVWorkflowEngine, SAVTicket
+from app.services.warranty_service import warranty_service
+
+logger = logging.getLogger(__name__)
+
+# Colonnes obligatoires du fichier d'import (mêmes champs que /create-claim)
+REQUIRED_COLUMNS = [
+    "customer_id",
+    "order_number",
+    "product_sku",
+    "product_name",
+    "problem_description",
+    "purchase_date",
+    "delivery_date",
+]
+
+DEFAULT_BATCH_SIZE = 200
+MAX_REPORTED_ERRORS = 1000  # Au-delà, les erreurs sont comptées mais pas détaillées
+DEFAULT_SOURCE = "bulk_import"
+
+
+@dataclass
+class BulkRowError:
+    """Erreur sur une ligne du fichier d'import"""
+    row_number: int
+    order_number: Optional[str]
+    error: str
+
+
+@dataclass
+class BulkIngestionReport:
+    """Rapport d'exécution d'un import en masse"""
+    total_rows: int = 0
+    analyzed: int = 0
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    duration_seconds: float = 0.0
+    dry_run: bool = False
+    errors: List[BulkRowError] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        """Débit global (lignes lues par seconde)"""
+        if self.duration_seconds <= 0:
+            return 0.0
+        return self.total_rows / self.duration_seconds
+
+    def add_error(self, row_number: int, order_number: Optional[str], error: str):
+        """Enregistre une erreur de ligne"""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(BulkRowError(row_number, order_number, error))
+        else:
+            self.errors_truncated = True
+
+    def to_dict(self) -> Dict:
+        """Convertit le rapport en dict (réponse API / sortie CLI)"""
+        return {
+            "total_rows": self.total_rows,
+            "analyzed": self.analyzed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "dry_run": self.dry_run,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": [
+                {"row": e.row_number, "order_number": e.order_number, "error": e.error}
+                for e in self.errors
+            ],
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+def _parse_date(value: str, field_name: str) -> datetime:
+    """Parse une date ISO (les fuseaux horaires sont ignorés)"""
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f"Date invalide pour {field_name}: {value!r}")
+
+
+class BulkClaimIngestor:
+    """
+    Importe des réclamations SAV par lots.
+
+    Un seul SAVWorkflowEngine (sans session DB) est partagé pour l'analyse;
+    la persistance est faite par lot via ticket_repository.bulk_create.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        if batch_size < 1:
+            raise ValueError("batch_size doit être >= 1")
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.engine = SAVWorkflowEngine()
+
+    async def ingest_csv(self, db: AsyncSession, lines: Iterable[str]) -> BulkIngestionReport:
+        """
+        Importe un fichier CSV lu en flux.
+
+        Args:
+            db: Session de base de données
+            lines: Itérable de lignes CSV (fichier texte ouvert, TextIOWrapper...)
+
+        Returns:
+            BulkIngestionReport
+
+        Raises:
+            ValueError: Si l'en-tête ne contient pas les colonnes obligatoires
+        """
+        reader = csv.DictReader(lines)
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"Colonnes obligatoires manquantes: {', '.join(missing)}")
+        reader.fieldnames = header
+
+        # La ligne 1 est l'en-tête
+        return await self.ingest_rows(db, enumerate(reader, start=2))
+
+    async def ingest_rows(
+        self,
+        db: AsyncSession,
+        rows: Iterable[Tuple[int, Dict]]
+    ) -> BulkIngestionReport:
+        """
+        Importe des lignes déjà décodées.
+
+        Args:
+            db: Session de base de données
+            rows: Itérable de (numéro de ligne, dict de colonnes)
+
+        Returns:
+            BulkIngestionReport
+        """
+        report = BulkIngestionReport(dry_run=self.dry_run)
+        start = time.perf_counter()
+        batch: List[Tuple[int, Dict]] = []
+
+        for row_number, row in rows:
+            report.total_rows += 1
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                await self._process_batch(db, batch, report)
+                batch = []
+                # Laisser la boucle d'événements servir les autres requêtes
+                await asyncio.sleep(0)
+
+        if batch:
+            await self._process_batch(db, batch, report)
+
+        report.duration_seconds = time.perf_counter() - start
+
+        logger.info(
+            f"📦 Import en masse terminé: {report.inserted}/{report.total_rows} tickets insérés, "
+            f"{report.failed} erreurs, {report.batches} lots, "
+            f"{report.rows_per_second:.1f} lignes/s"
+            f"{' (dry run)' if self.dry_run else ''}"
+        )
+
+        return report
+
+    async def _analyze_row(self, row: Dict) -> SAVTicket:
+        """Exécute les étapes d'analyse déterministes pour une ligne"""
+        values = {k: (v or "").strip() for k, v in row.items() if k}
+
+        for column in REQUIRED_COLUMNS:
+            if not values.get(column):
+                raise ValueError(f"Champ obligatoire manquant: {column}")
+
+        purchase_date = _parse_date(values["purchase_date"], "purchase_date")
+        delivery_date = _parse_date(values["delivery_date"], "delivery_date")
+
+        try:
+            product_value = float(values.get("product_value") or 0.0)
+        except ValueError:
+            raise ValueError(f"product_value invalide: {values.get('product_value')!r}")
+
+        warranty = await warranty_service.create_warranty(
+            order_number=values["order_number"],
+            product_sku=values["product_sku"],
+            product_name=values["product_name"],
+            customer_id=values["customer_id"],
+            purchase_date=purchase_date,
+            delivery_date=delivery_date,
+            warranty_type=WarrantyType.STANDARD
+        )
+
+        ticket = await self.engine.analyze_claim(
+            customer_id=values["customer_id"],
+            order_number=values["order_number"],
+            product_sku=values["product_sku"],
+            product_name=values["product_name"],
+            problem_description=values["problem_description"],
+            warranty=warranty,
+            customer_tier=values.get("customer_tier") or "standard",
+            product_value=product_value
+        )
+
+        # Champs optionnels lus par ticket_repository._ticket_to_db
+        ticket.customer_name = values.get("customer_name") or None
+        ticket.source = values.get("source") or DEFAULT_SOURCE
+
+        return ticket
+
+    async def _process_batch(
+        self,
+        db: AsyncSession,
+        batch: List[Tuple[int, Dict]],
+        report: BulkIngestionReport
+    ):
+        """Analyse puis persiste un lot de lignes"""
+        report.batches += 1
+        analyzed: List[Tuple[int, SAVTicket]] = []
+
+        for row_number, row in batch:
+            try:
+                ticket = await self._analyze_row(row)
+            except Exception as e:
+                report.add_error(row_number, (row.get("order_number") or "").strip() or None, str(e))
+                continue
+            analyzed.append((row_number, ticket))
+
+        report.analyzed += len(analyzed)
+
+        if not analyzed:
+            return
+
+        # Doublons: dans le lot lui-même et déjà présents en base
+        existing = await ticket_repository.get_existing_ids(db, [t.ticket_id for _, t in analyzed])
+        seen = set()
+        to_insert: List[Tuple[int, SAVTicket]] = []
+        for row_number, ticket in analyzed:
+            if ticket.ticket_id in existing or ticket.ticket_id in seen:
+                report.add_error(row_number, ticket.order_number, f"Ticket {ticket.ticket_id} existe déjà")
+                continue
+            seen.add(ticket.ticket_id)
+            to_insert.append((row_number, ticket))
+
+        if self.dry_run or not to_insert:
+            return
+
+        try:
+            report.inserted += await ticket_repository.bulk_create(db, [t for _, t in to_insert])
+        except Exception as e:
+            # Le lot a échoué: réessayer ligne par ligne pour isoler les lignes fautives
+            logger.warning(f"⚠️ Échec de l'insertion du lot {report.batches} ({e}), repli ligne par ligne")
+            for row_number, ticket in to_insert:
+                try:
+                    await ticket_repository.create(db, ticket)
+                    report.inserted += 1
+                except Exception as row_error:
+                    report.add_error(row_number, ticket.order_number, f"Erreur d'insertion: {row_error}")
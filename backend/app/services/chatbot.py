@@ -9,6 +9,8 @@ from app.services.evidence_collector import evidence_collector
 from app.services.warranty_service import warranty_service
 from app.models.warranty import WarrantyType
 from app.core.circuit_breaker import CircuitBreakerManager, CircuitBreakerError
+from app.core.timing import span, timed
+from app.core.metrics import track_openai
 
 logger = logging.getLogger(__name__)
 
@@ -593,7 +595,8 @@ GENERIC ADVICE ONLY - NO SPECIFIC REFERENCES.""",
             # Pass `db_session` explicitly to methods that need it.
 
             # Détection langue (allow override via `preferred_language`)
-            language = preferred_language or self.detect_language(user_message)
+            with span("chat.detect_language"):
+                language = preferred_language or self.detect_language(user_message)
 
             # 🎯 NOUVEAU: Détection automatique du produit mentionné
             detected_product = self.detect_product_mention(user_message)
@@ -628,7 +631,8 @@ GENERIC ADVICE ONLY - NO SPECIFIC REFERENCES.""",
 
             # Si numéro commande fourni, récupérer données
             if order_number and not self.client_data:
-                self.client_data = await self.fetch_order_data(order_number)
+                with span("chat.order_data"):
+                    self.client_data = await self.fetch_order_data(order_number)
 
             # Construction du contexte
             context = ""
@@ -667,13 +671,16 @@ Utilise ces infos pour réponse rapide et pertinente.
 """
 
             # Ajouter le contexte du catalogue produits
-            catalog_context = "\n\n" + product_catalog.get_catalog_summary_for_ai()
+            with span("chat.prompt"):
+                catalog_context = "\n\n" + product_catalog.get_catalog_summary_for_ai()
 
             # Ajouter le contexte SAV dynamique basé sur le message
-            sav_context = "\n\n" + sav_kb.get_sav_context_for_chatbot(user_message)
+            with span("chat.sav_context"):
+                sav_context = "\n\n" + sav_kb.get_sav_context_for_chatbot(user_message)
 
             # Préparer les messages pour OpenAI
-            full_system_prompt = self.create_system_prompt(language) + context + catalog_context + sav_context
+            with span("chat.prompt"):
+                full_system_prompt = self.create_system_prompt(language) + context + catalog_context + sav_context
 
             messages = [
                 {"role": "system", "content": full_system_prompt}
@@ -684,10 +691,10 @@ Utilise ces infos pour réponse rapide et pertinente.
             import asyncio
             loop = asyncio.get_running_loop()
 
-            # Get circuit breaker for OpenAI (5 failures, 60s recovery, 30s timeout)
+            # Get circuit breaker for OpenAI (opens at 50% failures once 5 calls are in the window, 60s recovery, 30s timeout)
             openai_breaker = CircuitBreakerManager.get_breaker(
                 name="openai",
-                failure_threshold=5,
+                minimum_calls=5,
                 recovery_timeout=60,
                 timeout=30
             )
@@ -702,7 +709,9 @@ Utilise ces infos pour réponse rapide et pertinente.
                         temperature=0.7
                     ))
 
-                resp = await openai_breaker.call(call_openai)
+                with span("chat.openai"), track_openai("chat") as openai_call:
+                    resp = await openai_breaker.call(call_openai)
+                    openai_call.record_usage(resp)
                 assistant_message = resp.choices[0].message.content if getattr(resp, 'choices', None) else str(resp)
 
             except CircuitBreakerError as e:
@@ -1053,6 +1062,7 @@ Utilise ces infos pour réponse rapide et pertinente.
         ]
         return any(keyword in message_lower for keyword in close_keywords)
 
+    @timed("chat.ticket_validation")
     async def prepare_ticket_validation(
         self,
         user_message: str,
@@ -1156,6 +1166,7 @@ Utilise ces infos pour réponse rapide et pertinente.
             logger.error(f"❌ Erreur préparation validation: {str(e)}")
             raise
 
+    @timed("chat.ticket_creation")
     async def create_ticket_after_validation(self, db_session: Optional[object] = None) -> Dict:
         """
         Crée le ticket SAV après validation du client
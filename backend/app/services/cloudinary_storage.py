@@ -80,7 +80,7 @@ class CloudinaryService:
             # Get circuit breaker for Cloudinary
             cloudinary_breaker = CircuitBreakerManager.get_breaker(
                 name="cloudinary",
-                failure_threshold=5,
+                minimum_calls=5,
                 recovery_timeout=60,
                 timeout=30
             )
@@ -152,7 +152,7 @@ class CloudinaryService:
             # Get circuit breaker for Cloudinary
             cloudinary_breaker = CircuitBreakerManager.get_breaker(
                 name="cloudinary",
-                failure_threshold=5,
+                minimum_calls=5,
                 recovery_timeout=60,
                 timeout=30
             )
@@ -18,6 +18,8 @@ from app.services.tone_analyzer import tone_analyzer, ToneAnalysis
 from app.services.client_summary_generator import client_summary_generator, ClientSummary
 from app.models.warranty import Warranty, WarrantyCheck
 from app.core.input_sanitizer import input_sanitizer
+from app.core.timing import timed
+from app.services import ticket_events
 
 logger = logging.getLogger(__name__)
 
@@ -167,14 +169,16 @@ class SAVWorkflowEngine:
             }
         }
 
-    async def _persist_ticket(self, ticket: SAVTicket, raise_on_error: bool = False):
-        """Persist ticket to database if db_session is available"""
+    @timed("sav.persist")
+    async def _persist_ticket(self, ticket: SAVTicket, raise_on_error: bool = False,
+                              update_event: str = ticket_events.TICKET_UPDATED):
+        """Persist ticket to database if db_session is available (update_event: event published for an update)"""
         if self.db_session:
             try:
                 from app.repositories.ticket_repository import ticket_repository
                 existing = await ticket_repository.get_by_id(self.db_session, ticket.ticket_id)
                 if existing:
-                    await ticket_repository.update(self.db_session, ticket)
+                    await ticket_repository.update(self.db_session, ticket, event_type=update_event)
                 else:
                     await ticket_repository.create(self.db_session, ticket)
                 logger.info(f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} sauvegardé dans la base de données")
@@ -216,6 +220,61 @@ class SAVWorkflowEngine:
             SAVTicket créé et traité
         """
 
+        ticket = await self.analyze_claim(
+            customer_id=customer_id,
+            order_number=order_number,
+            product_sku=product_sku,
+            product_name=product_name,
+            problem_description=problem_description,
+            warranty=warranty,
+            customer_tier=customer_tier,
+            product_value=product_value
+        )
+
+        # Sauvegarder le ticket en mémoire
+        self.active_tickets[ticket.ticket_id] = ticket
+
+        # 🎯 TOUJOURS persister en base, même si validation requise
+        # Les tickets en attente de validation seront marqués avec status='pending_validation'
+        await self._persist_ticket(ticket)
+
+        if ticket.client_summary and ticket.client_summary.validation_required:
+            logger.info(f"⏳ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} persisté en base avec validation requise")
+        else:
+            logger.info(f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} persisté en base (pas de validation requise)")
+
+        logger.info(
+            f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} traité: "
+            f"{ticket.status} | Priorité: {ticket.priority} | "
+            f"Auto-résolu: {ticket.auto_resolved} | "
+            f"Validation requise: {ticket.client_summary.validation_required if ticket.client_summary else False}"
+        )
+
+        return ticket
+
+    @timed("sav.analyze_claim")
+    async def analyze_claim(
+        self,
+        customer_id: str,
+        order_number: str,
+        product_sku: str,
+        product_name: str,
+        problem_description: str,
+        warranty: Warranty,
+        customer_tier: str = "standard",
+        product_value: float = 0.0
+    ) -> SAVTicket:
+        """
+        Exécute les étapes d'analyse déterministes d'une réclamation
+        (problème, ton, garantie, priorité, SLA, décision, récapitulatif)
+        sans stocker ni persister le ticket.
+
+        Utilisé par process_new_claim et par l'import en masse.
+
+        Returns:
+            SAVTicket analysé (non persisté)
+        """
+
         # 🛡️ SECURITY: Sanitize all inputs before processing
         try:
             customer_id = input_sanitizer.sanitize_customer_id(customer_id)
@@ -270,25 +329,6 @@ class SAVWorkflowEngine:
         # 🎯 8. Générer le récapitulatif client pour validation
         ticket = self._generate_client_summary(ticket)
 
-        # Sauvegarder le ticket en mémoire
-        self.active_tickets[ticket.ticket_id] = ticket
-
-        # 🎯 TOUJOURS persister en base, même si validation requise
-        # Les tickets en attente de validation seront marqués avec status='pending_validation'
-        await self._persist_ticket(ticket)
-
-        if ticket.client_summary and ticket.client_summary.validation_required:
-            logger.info(f"⏳ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} persisté en base avec validation requise")
-        else:
-            logger.info(f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} persisté en base (pas de validation requise)")
-
-        logger.info(
-            f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket.ticket_id)} traité: "
-            f"{ticket.status} | Priorité: {ticket.priority} | "
-            f"Auto-résolu: {ticket.auto_resolved} | "
-            f"Validation requise: {ticket.client_summary.validation_required if ticket.client_summary else False}"
-        )
-
         return ticket
 
     async def _create_ticket(
@@ -854,6 +894,7 @@ class SAVWorkflowEngine:
         }
         return emojis.get(priority, "⚪")
 
+    @timed("sav.validate")
     async def validate_ticket(self, ticket_id: str) -> Dict:
         """
         Valide un ticket et le persiste en base de données
@@ -882,8 +923,11 @@ class SAVWorkflowEngine:
                 metadata={"validation_time": datetime.now().isoformat()}
             ))
 
-            # Persister en base de données
-            await self._persist_ticket(ticket)
+            # Persister en base de données (le dépôt publie ticket.validated une fois le commit fait)
+            if self.db_session:
+                await self._persist_ticket(ticket, update_event=ticket_events.TICKET_VALIDATED)
+            else:
+                ticket_events.emit_ticket_event(ticket_events.TICKET_VALIDATED, ticket)
 
             logger.info(f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket_id)} validé et persisté en base de données")
 
@@ -938,6 +982,8 @@ class SAVWorkflowEngine:
             except Exception:
                 # refresh might not be supported by some test stubs - ignore
                 pass
+            await ticket_repository.invalidate_cached_views(ticket_id)
+            ticket_events.emit_ticket_event(ticket_events.TICKET_VALIDATED, db_ticket)
 
             logger.info(f"✅ Ticket {input_sanitizer.sanitize_for_logging(ticket_id)} validé et mis à jour en base de données (fallback)")
 
@@ -986,6 +1032,8 @@ class SAVWorkflowEngine:
         # Retirer de la liste active
         del self.active_tickets[ticket_id]
 
+        ticket_events.emit_ticket_event(ticket_events.TICKET_CANCELLED, ticket)
+
         logger.info(f"❌ Ticket {input_sanitizer.sanitize_for_logging(ticket_id)} annulé par le client")
 
         return {
@@ -3,19 +3,22 @@
 Session management service for chat sessions.
 Supports Redis for production and in-memory storage for development.
 """
-import json
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
-from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, asdict, field, fields as dataclass_fields
 
-from app.core.redis import get_cache, cache_get_json, cache_set_json
+from app.core import codec
+from app.core.redis import CachePipeline, get_cache, cache_get_json
 
 logger = logging.getLogger(__name__)
 
 # Session configuration
 SESSION_TTL_HOURS = 24  # Sessions expire after 24 hours
 SESSION_KEY_PREFIX = "session:"
+SESSION_FIELDS_SUFFIX = ":fields"
+SESSION_MESSAGES_SUFFIX = ":messages"
+SESSION_MAX_MESSAGES = 500  # Older messages are trimmed from the stored history
 
 
 @dataclass
@@ -86,9 +89,21 @@ class ChatSession:
         self.last_active = datetime.utcnow().isoformat()
 
 
+# Attributes stored in a session's fields hash (the history goes to its own list)
+SESSION_FIELDS = frozenset(f.name for f in dataclass_fields(ChatSession)) - {"conversation_history"}
+
+
 class SessionManager:
     """
     Manages chat sessions using Redis or in-memory cache.
+
+    A session is stored as two keys sharing its TTL:
+    - `session:<id>:fields`: hash of the scalar fields (JSON-encoded values)
+    - `session:<id>:messages`: list of the conversation messages
+
+    Appending a message pushes one element and updates two fields in a
+    single transaction, so the cost of a turn does not grow with the
+    history and concurrent writers cannot drop each other's messages.
     """
 
     def __init__(self):
@@ -101,9 +116,101 @@ class SessionManager:
         return self._cache
 
     def _session_key(self, session_id: str) -> str:
-        """Generate the cache key for a session."""
+        """Generate the cache key of a session stored as one JSON value (before hashes and lists)."""
         return f"{SESSION_KEY_PREFIX}{session_id}"
 
+    def _fields_key(self, session_id: str) -> str:
+        """Generate the cache key of a session's fields hash."""
+        return f"{SESSION_KEY_PREFIX}{session_id}{SESSION_FIELDS_SUFFIX}"
+
+    def _messages_key(self, session_id: str) -> str:
+        """Generate the cache key of a session's message list."""
+        return f"{SESSION_KEY_PREFIX}{session_id}{SESSION_MESSAGES_SUFFIX}"
+
+    @staticmethod
+    def _encode_fields(values: Dict[str, Any]) -> Dict[str, str]:
+        """Hash fields of session attributes (message_count stays a plain integer for HINCRBY)."""
+        return {
+            name: str(value) if name == "message_count" else codec.dumps(value)
+            for name, value in values.items()
+        }
+
+    @staticmethod
+    def _decode_fields(fields: Dict[str, str]) -> Dict[str, Any]:
+        data = {}
+        for name, value in fields.items():
+            if name in SESSION_FIELDS:
+                try:
+                    data[name] = codec.loads(value)
+                except codec.CodecError:
+                    logger.warning(f"Undecodable session field {name}")
+        return data
+
+    def _from_stored(self, fields: Dict[str, str], messages: Optional[List[str]] = None) -> Optional[ChatSession]:
+        data = self._decode_fields(fields)
+        if "session_id" not in data:
+            return None
+        history = []
+        for message in messages or ():
+            try:
+                history.append(codec.loads(message))
+            except codec.CodecError:
+                logger.warning(f"Undecodable message in session {data['session_id']}")
+        return ChatSession.from_dict({**data, "conversation_history": history})
+
+    def _refresh_ttl(self, pipe, session_id: str) -> None:
+        ttl_seconds = SESSION_TTL_HOURS * 3600
+        pipe.expire(self._fields_key(session_id), ttl_seconds)
+        pipe.expire(self._messages_key(session_id), ttl_seconds)
+
+    async def _read(self, session_id: str) -> Optional[ChatSession]:
+        cache = self._get_cache()
+        async with cache.pipeline() as pipe:
+            pipe.hgetall(self._fields_key(session_id))
+            pipe.lrange(self._messages_key(session_id), 0, -1)
+        fields, messages = pipe.results
+        return self._from_stored(fields, messages) if fields else None
+
+    async def _update(
+        self,
+        session_id: str,
+        write: Callable[[CachePipeline], Any],
+        with_history: bool = False
+    ) -> Optional[ChatSession]:
+        """
+        Queue `write` on an existing session and read it back, in one transaction
+        applied only if the session still exists (None otherwise). A session
+        that expires in between is not recreated as a partial hash.
+
+        Only the fields are read back unless `with_history`: the returned
+        session then has an empty conversation_history.
+        """
+        cache = self._get_cache()
+        fields_key = self._fields_key(session_id)
+        for attempt in range(2):
+            async with cache.pipeline(if_exists=fields_key) as pipe:
+                write(pipe)
+                self._refresh_ttl(pipe, session_id)
+                pipe.hgetall(fields_key)
+                if with_history:
+                    pipe.lrange(self._messages_key(session_id), 0, -1)
+            if pipe.results is not None:
+                if with_history:
+                    return self._from_stored(*pipe.results[-2:])
+                return self._from_stored(pipe.results[-1])
+            if attempt or not await self._migrate_legacy(session_id):
+                return None
+
+    async def _migrate_legacy(self, session_id: str) -> Optional[ChatSession]:
+        """Convert a session stored as one JSON value to the hash + list layout."""
+        data = await cache_get_json(self._session_key(session_id))
+        if not data:
+            return None
+        session = ChatSession.from_dict(data)
+        if await self.save_session(session):
+            await self._get_cache().delete(self._session_key(session_id))
+        return session
+
     async def create_session(
         self,
         session_id: str,
@@ -141,19 +248,18 @@ class SessionManager:
         Returns:
             ChatSession if found, None otherwise
         """
-        key = self._session_key(session_id)
-        data = await cache_get_json(key)
+        session = await self._read(session_id) or await self._migrate_legacy(session_id)
 
-        if data:
+        if session:
             logger.debug(f"Session found: {session_id}")
-            return ChatSession.from_dict(data)
+            return session
 
         logger.debug(f"Session not found: {session_id}")
         return None
 
     async def save_session(self, session: ChatSession) -> bool:
         """
-        Save a session to cache.
+        Save a whole session to cache (fields and history are replaced).
 
         Args:
             session: ChatSession to save
@@ -161,10 +267,22 @@ class SessionManager:
         Returns:
             True if successful
         """
-        key = self._session_key(session.session_id)
-        ttl_seconds = SESSION_TTL_HOURS * 3600
-
-        success = await cache_set_json(key, session.to_dict(), expire=ttl_seconds)
+        cache = self._get_cache()
+        data = session.to_dict()
+        history = data.pop("conversation_history")[-SESSION_MAX_MESSAGES:]
+        messages_key = self._messages_key(session.session_id)
+
+        try:
+            async with cache.pipeline() as pipe:
+                pipe.hset(self._fields_key(session.session_id), self._encode_fields(data))
+                pipe.delete(messages_key)
+                if history:
+                    pipe.rpush(messages_key, *(codec.dumps(message) for message in history))
+                self._refresh_ttl(pipe, session.session_id)
+            success = bool(pipe.results[-2])
+        except (TypeError, ValueError) as e:
+            logger.error(f"Failed to serialize session {session.session_id}: {e}")
+            success = False
 
         if success:
             logger.debug(f"Session saved: {session.session_id}")
@@ -190,12 +308,15 @@ class SessionManager:
         Returns:
             ChatSession (existing or new)
         """
-        session = await self.get_session(session_id)
-
+        # Update last active time and read the session in the same round trip
+        last_active = self._encode_fields({"last_active": datetime.utcnow().isoformat()})
+        session = await self._update(
+            session_id,
+            lambda pipe: pipe.hset(self._fields_key(session_id), last_active),
+            with_history=True
+        )
         if session:
-            # Update last active time
-            session.last_active = datetime.utcnow().isoformat()
-            await self.save_session(session)
+            logger.debug(f"Session found: {session_id}")
             return session
 
         return await self.create_session(session_id, user_id, metadata)
@@ -210,9 +331,12 @@ class SessionManager:
         Returns:
             True if deleted, False if not found
         """
-        key = self._session_key(session_id)
         cache = self._get_cache()
-        deleted = await cache.delete(key)
+        deleted = await cache.delete_many([
+            self._fields_key(session_id),
+            self._messages_key(session_id),
+            self._session_key(session_id)
+        ]) > 0
 
         if deleted:
             logger.info(f"Session deleted: {session_id}")
@@ -230,6 +354,7 @@ class SessionManager:
     ) -> Optional[ChatSession]:
         """
         Add a message to a session's conversation history.
+        The message is appended to the stored list; the history is not rewritten.
 
         Args:
             session_id: Session identifier
@@ -238,16 +363,22 @@ class SessionManager:
             metadata: Optional message metadata
 
         Returns:
-            Updated ChatSession or None if session not found
+            Updated ChatSession (fields only, history not loaded; see get_session)
+            or None if session not found
         """
-        session = await self.get_session(session_id)
-
-        if not session:
+        fields_key = self._fields_key(session_id)
+        messages_key = self._messages_key(session_id)
+        message = asdict(ConversationMessage(role=role, content=content, metadata=metadata or {}))
+
+        def write(pipe: CachePipeline) -> None:
+            pipe.rpush(messages_key, codec.dumps(message))
+            pipe.ltrim(messages_key, -SESSION_MAX_MESSAGES, -1)
+            pipe.hincrby(fields_key, "message_count", 1)
+            pipe.hset(fields_key, self._encode_fields({"last_active": message["timestamp"]}))
+
+        session = await self._update(session_id, write)
+        if session is None:
             logger.warning(f"Cannot add message - session not found: {session_id}")
-            return None
-
-        session.add_message(role, content, metadata)
-        await self.save_session(session)
         return session
 
     async def update_session(
@@ -257,26 +388,44 @@ class SessionManager:
     ) -> Optional[ChatSession]:
         """
         Update session fields.
+        Only the given fields are written.
 
         Args:
             session_id: Session identifier
             **updates: Fields to update
 
         Returns:
-            Updated ChatSession or None if not found
+            Updated ChatSession (fields only, history not loaded; see get_session)
+            or None if not found
         """
-        session = await self.get_session(session_id)
-
-        if not session:
-            return None
-
-        for key, value in updates.items():
-            if hasattr(session, key):
-                setattr(session, key, value)
-
-        session.last_active = datetime.utcnow().isoformat()
-        await self.save_session(session)
-        return session
+        fields_key = self._fields_key(session_id)
+        messages_key = self._messages_key(session_id)
+        history = updates.pop("conversation_history", None)
+        values = {name: value for name, value in updates.items() if name in SESSION_FIELDS and name != "session_id"}
+        values["last_active"] = datetime.utcnow().isoformat()
+
+        def write(pipe: CachePipeline) -> None:
+            pipe.hset(fields_key, self._encode_fields(values))
+            if history is not None:
+                pipe.delete(messages_key)
+                if history:
+                    pipe.rpush(messages_key, *(codec.dumps(message) for message in history[-SESSION_MAX_MESSAGES:]))
+
+        return await self._update(session_id, write)
+
+    async def _session_ids(self) -> List[str]:
+        cache = self._get_cache()
+        keys = await cache.keys(f"{SESSION_KEY_PREFIX}*{SESSION_FIELDS_SUFFIX}")
+        return [key[len(SESSION_KEY_PREFIX):-len(SESSION_FIELDS_SUFFIX)] for key in keys]
+
+    async def _read_fields(self, session_ids: List[str]) -> List[Dict[str, Any]]:
+        """Decoded fields of several sessions in one round trip ({} for missing ones)."""
+        if not session_ids:
+            return []
+        async with self._get_cache().pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hgetall(self._fields_key(session_id))
+        return [self._decode_fields(fields) for fields in pipe.results]
 
     async def list_sessions(
         self,
@@ -293,14 +442,10 @@ class SessionManager:
         Returns:
             List of session summaries
         """
-        cache = self._get_cache()
-        keys = await cache.keys(f"{SESSION_KEY_PREFIX}*")
+        session_ids = (await self._session_ids())[:limit]
 
         sessions = []
-        for key in keys[:limit]:
-            session_id = key.replace(SESSION_KEY_PREFIX, "")
-            data = await cache_get_json(key)
-
+        for session_id, data in zip(session_ids, await self._read_fields(session_ids)):
             if data:
                 # Filter by user if specified
                 if user_id and data.get("user_id") != user_id:
@@ -326,9 +471,7 @@ class SessionManager:
         Returns:
             Number of sessions
         """
-        cache = self._get_cache()
-        keys = await cache.keys(f"{SESSION_KEY_PREFIX}*")
-        return len(keys)
+        return len(await self._session_ids())
 
     async def cleanup_expired_sessions(self) -> int:
         """
@@ -339,17 +482,21 @@ class SessionManager:
             Number of sessions cleaned up
         """
         cache = self._get_cache()
-        keys = await cache.keys(f"{SESSION_KEY_PREFIX}*")
-        cleaned = 0
+        session_ids = await self._session_ids()
 
         cutoff = datetime.utcnow() - timedelta(hours=SESSION_TTL_HOURS)
         cutoff_str = cutoff.isoformat()
 
-        for key in keys:
-            data = await cache_get_json(key)
-            if data and data.get("last_active", "") < cutoff_str:
-                await cache.delete(key)
-                cleaned += 1
+        expired = [
+            session_id for session_id, data in zip(session_ids, await self._read_fields(session_ids))
+            if data and data.get("last_active", "") < cutoff_str
+        ]
+        if expired:
+            await cache.delete_many(
+                [self._fields_key(session_id) for session_id in expired]
+                + [self._messages_key(session_id) for session_id in expired]
+            )
+        cleaned = len(expired)
 
         if cleaned > 0:
             logger.info(f"Cleaned up {cleaned} expired sessions")
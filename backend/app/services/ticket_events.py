@@ -0,0 +1,124 @@
+# backend/app/services/ticket_events.py
+"""
+Événements temps réel des tickets SAV pour le tableau de bord
+
+Les changements (création, validation, annulation, statut) sont publiés sous
+forme de deltas compacts sur le broker pub/sub; le tableau de bord les reçoit
+via WebSocket ou SSE au lieu d'interroger /api/sav/tickets.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.pubsub import get_pubsub
+
+logger = logging.getLogger(__name__)
+
+TICKET_EVENTS_CHANNEL = "sav:tickets"
+
+# Types d'événements
+TICKET_CREATED = "ticket.created"
+TICKET_UPDATED = "ticket.updated"
+TICKET_VALIDATED = "ticket.validated"
+TICKET_CANCELLED = "ticket.cancelled"
+TICKET_DELETED = "ticket.deleted"
+TICKETS_IMPORTED = "tickets.imported"
+
+# Nombre max d'identifiants inclus dans un événement d'import en masse
+MAX_IMPORTED_IDS = 100
+
+# Garde des références aux tâches de publication en cours
+_pending: Set[asyncio.Task] = set()
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def ticket_delta(ticket: Any) -> Dict[str, Any]:
+    """
+    Extrait les champs affichés par le tableau de bord (SAVTicket ou TicketDB)
+    """
+    validation_status = getattr(ticket, "validation_status", None)
+    if validation_status is None:
+        client_summary = getattr(ticket, "client_summary", None)
+        if isinstance(client_summary, dict):
+            validation_status = client_summary.get("validation_status")
+
+    updated_at = getattr(ticket, "updated_at", None)
+
+    return {
+        "ticket_id": ticket.ticket_id,
+        "status": _enum_value(getattr(ticket, "status", None)),
+        "priority": getattr(ticket, "priority", None),
+        "priority_score": getattr(ticket, "priority_score", None),
+        "problem_category": getattr(ticket, "problem_category", None),
+        "customer_name": getattr(ticket, "customer_name", None),
+        "validation_status": validation_status,
+        "updated_at": updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+    }
+
+
+def build_event(event_type: str, ticket_id: Optional[str] = None, **fields) -> Dict[str, Any]:
+    """Construit un événement compact"""
+    event = {"type": event_type, "ts": datetime.now().isoformat()}
+    if ticket_id is not None:
+        event["ticket_id"] = ticket_id
+    event.update({k: v for k, v in fields.items() if v is not None})
+    return event
+
+
+async def publish_ticket_event(event_type: str, ticket_id: Optional[str] = None, **fields) -> int:
+    """
+    Publie un événement ticket. Ne lève jamais d'exception.
+
+    Returns:
+        Nombre d'abonnés ayant reçu l'événement (0 si broker non initialisé)
+    """
+    broker = get_pubsub()
+    if broker is None:
+        return 0
+    try:
+        return await broker.publish(TICKET_EVENTS_CHANNEL, build_event(event_type, ticket_id, **fields))
+    except Exception as e:
+        logger.error(f"Erreur publication événement {event_type}: {e}")
+        return 0
+
+
+def emit_ticket_event(event_type: str, ticket: Any = None, ticket_id: Optional[str] = None, **fields) -> None:
+    """
+    Publie un événement sans attendre (utilisable depuis du code synchrone).
+
+    Args:
+        event_type: Type d'événement (ticket.created, ...)
+        ticket: SAVTicket ou TicketDB dont on publie le delta
+        ticket_id: Identifiant si aucun ticket n'est fourni
+        **fields: Champs supplémentaires
+    """
+    if get_pubsub() is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    if ticket is not None:
+        fields = {**ticket_delta(ticket), **fields}
+        ticket_id = fields.pop("ticket_id")
+
+    task = loop.create_task(publish_ticket_event(event_type, ticket_id, **fields))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def emit_tickets_imported(ticket_ids: Iterable[str]) -> None:
+    """Publie un seul événement pour un lot importé (évite d'inonder les abonnés)"""
+    ticket_ids = list(ticket_ids)
+    emit_ticket_event(
+        TICKETS_IMPORTED,
+        count=len(ticket_ids),
+        ticket_ids=ticket_ids[:MAX_IMPORTED_IDS],
+        truncated=len(ticket_ids) > MAX_IMPORTED_IDS or None
+    )
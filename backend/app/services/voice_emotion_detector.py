@@ -14,6 +14,7 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from openai import OpenAI
 from app.core.config import settings
+from app.core.metrics import track_openai
 import httpx
 
 logger = logging.getLogger(__name__)
@@ -217,15 +218,17 @@ Exemples d'indicateurs:
 - Langage calme et pose
 """
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Fast and cheap for emotion detection
-                messages=[
-                    {"role": "system", "content": "Tu es un expert en analyse emotionnelle de service client. Reponds UNIQUEMENT en JSON valide."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # Low temperature for consistent results
-                max_tokens=200
-            )
+            with track_openai("emotion") as openai_call:
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",  # Fast and cheap for emotion detection
+                    messages=[
+                        {"role": "system", "content": "Tu es un expert en analyse emotionnelle de service client. Reponds UNIQUEMENT en JSON valide."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,  # Low temperature for consistent results
+                    max_tokens=200
+                )
+                openai_call.record_usage(response)
 
             result_text = response.choices[0].message.content.strip()
 
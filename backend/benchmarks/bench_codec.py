@@ -0,0 +1,110 @@
+"""
+Benchmark: encoding cost and stored size of chat sessions,
+stdlib json (previous) vs orjson vs orjson + zlib (app.core.codec).
+
+Sessions are ChatSession dicts with realistic French SAV conversations
+(built from a few repeated turns, so zlib ratios are optimistic). The
+stored size is what the cache keeps for the value (UTF-8 bytes), i.e.
+the Redis memory of the payload.
+
+Usage (from backend/):
+    python -m benchmarks.bench_codec [--messages 10,50,200] [--rounds 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench-aaaaaaaaaaaaaaaaaaaaaaaa")
+os.environ.setdefault("DEBUG", "true")
+
+from app.core import codec
+from app.core.config import settings
+from app.services.session_manager import ChatSession
+
+USER_TURNS = [
+    "Bonjour, j'ai reçu mon canapé d'angle hier et le pied avant gauche est cassé.",
+    "Ma commande est la CMD-2024-18734, livrée à Lyon par votre transporteur.",
+    "Oui j'ai des photos, le tissu est aussi déchiré sur l'accoudoir droit.",
+    "Je préférerais un remplacement plutôt qu'un remboursement si possible.",
+]
+ASSISTANT_TURNS = [
+    "Je suis désolé pour ce désagrément. Pouvez-vous me donner votre numéro de commande "
+    "afin que je retrouve votre dossier ?",
+    "Merci, j'ai bien retrouvé votre commande du canapé d'angle Milano, livré le 12 mars. "
+    "Pourriez-vous m'envoyer des photos du pied cassé et de l'étiquette produit ?",
+    "Merci pour les photos. J'ai créé une demande de prise en charge sous garantie ; "
+    "un conseiller vous recontactera sous 48 heures ouvrées.",
+]
+
+
+def make_session(messages: int) -> dict:
+    session = ChatSession(session_id="c0ffee00-1234-4abc-9def-0123456789ab", user_id="42")
+    for i in range(messages):
+        if i % 2:
+            session.add_message("assistant", ASSISTANT_TURNS[i % len(ASSISTANT_TURNS)], {"tokens": 180 + i})
+        else:
+            session.add_message("user", USER_TURNS[i % len(USER_TURNS)], {"language": "fr"})
+    session.order_number = "CMD-2024-18734"
+    session.sav_context = {"product": "Canapé d'angle Milano", "problem": "pied cassé", "photos": 2}
+    return session.to_dict()
+
+
+def measure(encode, decode, value, rounds: int) -> dict:
+    payload = encode(value)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encode(value)
+    encode_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode(payload)
+    decode_us = (time.perf_counter() - start) / rounds * 1e6
+    return {"encode_us": encode_us, "decode_us": decode_us, "bytes": len(payload.encode())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", default="10,50,200", help="messages per session")
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    threshold = settings.CACHE_COMPRESS_THRESHOLD or 4096
+
+    def stdlib_dumps(value):
+        return json.dumps(value, default=str)
+
+    def orjson_dumps(value):
+        settings.CACHE_COMPRESS_THRESHOLD = 0
+        return codec.dumps(value)
+
+    def compressed_dumps(value):
+        settings.CACHE_COMPRESS_THRESHOLD = threshold
+        return codec.dumps(value)
+
+    codecs = (
+        ("json", stdlib_dumps, json.loads),
+        ("orjson", orjson_dumps, codec.loads),
+        (f"orjson+zlib>{threshold}", compressed_dumps, codec.loads),
+    )
+
+    print(f"{'messages':>8} {'codec':<20} {'encode':>10} {'decode':>10} {'stored':>10}")
+    for messages in (int(n) for n in args.messages.split(",")):
+        session = make_session(messages)
+        baseline = None
+        for name, encode, decode in codecs:
+            r = measure(encode, decode, session, args.rounds)
+            baseline = baseline or r
+            print(
+                f"{messages:>8} {name:<20} {r['encode_us']:>8.1f}us {r['decode_us']:>8.1f}us "
+                f"{r['bytes'] / 1024:>7.1f}KB  ({r['bytes'] / baseline['bytes']:.0%} of json)"
+            )
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
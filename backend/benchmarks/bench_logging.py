@@ -0,0 +1,128 @@
+"""
+Benchmark: logging throughput from concurrent asyncio tasks,
+previous setup (ten regexes per handler, synchronous I/O) vs queue logging
+(one combined regex on the listener thread).
+
+"loop" is the time the event loop spends inside logging calls; "drained"
+includes writing every record to the file.
+
+Usage (from backend/):
+    python -m benchmarks.bench_logging [--tasks 50] [--records 400] [--debug-ratio 0.5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logging import DeferredQueueHandler, RedactingQueueListener, SensitiveDataFilter
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class PatternByPatternFilter(SensitiveDataFilter):
+    """Previous redaction: every pattern applied in turn"""
+
+    def redact_sensitive_data(self, text: str) -> str:
+        if not text:
+            return text
+        for pattern_info in self.SENSITIVE_PATTERNS:
+            text = pattern_info["pattern"].sub(pattern_info["replacement"], text)
+        return text
+
+
+def _handlers(path: str):
+    file_handler = logging.FileHandler(path)
+    console_handler = logging.StreamHandler(open(os.devnull, "w"))
+    for handler in (file_handler, console_handler):
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(logging.Formatter(FORMAT))
+    return file_handler, console_handler
+
+
+def configure(setup: str, path: str):
+    """Returns (logger, stop)"""
+    logger = logging.getLogger(f"bench.{setup}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handlers = _handlers(path)
+
+    if setup == "previous":
+        redactor = PatternByPatternFilter()
+        for handler in handlers:
+            handler.addFilter(redactor)
+            logger.addHandler(handler)
+        return logger, lambda: [handler.close() for handler in handlers]
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    listener = RedactingQueueListener(log_queue, *handlers, redactor=SensitiveDataFilter())
+    listener.start()
+
+    def stop():
+        listener.stop()
+        for handler in handlers:
+            handler.close()
+
+    return logger, stop
+
+
+async def run_setup(setup: str, tasks: int, records: int, debug_ratio: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), f"{setup}.log")
+    logger, stop = configure(setup, path)
+    debug_every = int(1 / debug_ratio) if debug_ratio > 0 else 0
+    in_logging = 0.0
+
+    async def worker(n: int):
+        nonlocal in_logging
+        for i in range(records):
+            start = time.perf_counter()
+            if debug_every and i % debug_every == 0:
+                logger.debug(f"[{n}] step {i} payload={{'email': 'client{i}@example.com'}}")
+            else:
+                logger.info(f"[{n}] chat step {i} for client{i}@example.com - session abc{i} - status ok")
+            in_logging += time.perf_counter() - start
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(n) for n in range(tasks)])
+    stop()
+    drained = time.perf_counter() - start
+
+    with open(path) as f:
+        written = sum(1 for _ in f)
+    total = tasks * records
+    return {
+        "setup": setup,
+        "calls_per_s": total / in_logging,
+        "loop_us": in_logging / total * 1e6,
+        "drained_s": drained,
+        "written": written,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--records", type=int, default=400)
+    parser.add_argument("--debug-ratio", type=float, default=0.5, help="share of DEBUG (discarded) records")
+    args = parser.parse_args()
+
+    print(f"{'setup':<10} {'calls/s':>12} {'loop/call':>10} {'drained':>9} {'written':>8}")
+    for setup in ("previous", "queue"):
+        r = await run_setup(setup, args.tasks, args.records, args.debug_ratio)
+        print(
+            f"{r['setup']:<10} {r['calls_per_s']:>12.0f} {r['loop_us']:>8.1f}us "
+            f"{r['drained_s']:>8.2f}s {r['written']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
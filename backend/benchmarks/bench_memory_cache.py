@@ -0,0 +1,98 @@
+"""
+Benchmark: MemoryCache read/write throughput as the key count grows,
+previous implementation (global lock, full expiry scan on every read) vs
+lazy expiry + heap sweeper + LRU.
+
+Half of the keys carry a TTL, like sessions and rate-limit entries do.
+
+Usage (from backend/):
+    python -m benchmarks.bench_memory_cache [--ops 5000] [--sizes 100,1000,10000,100000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench-aaaaaaaaaaaaaaaaaaaaaaaa")
+os.environ.setdefault("DEBUG", "true")
+
+from app.core.redis import MemoryCache
+
+
+class OldMemoryCache:
+    """Previous implementation, reduced to get/set"""
+
+    def __init__(self):
+        self._data = {}
+        self._expiry = {}
+        self._lock = asyncio.Lock()
+
+    async def _cleanup_expired(self):
+        current_time = time.time()
+        expired_keys = [
+            key for key, expiry in self._expiry.items()
+            if expiry and current_time > expiry
+        ]
+        for key in expired_keys:
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+
+    async def get(self, key):
+        async with self._lock:
+            await self._cleanup_expired()
+            return self._data.get(key)
+
+    async def set(self, key, value, expire=None):
+        async with self._lock:
+            self._data[key] = value
+            if expire:
+                self._expiry[key] = time.time() + expire
+            else:
+                self._expiry.pop(key, None)
+            return True
+
+
+async def fill(cache, size: int) -> None:
+    for i in range(size):
+        await cache.set(f"session:{i}", "x" * 200, 3600 if i % 2 else None)
+
+
+async def measure(cache, size: int, ops: int) -> float:
+    """Operations per second of a 90% get / 10% set mix"""
+    rng = random.Random(size)
+    keys = [f"session:{rng.randrange(size)}" for _ in range(ops)]
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        if i % 10:
+            await cache.get(key)
+        else:
+            await cache.set(key, "y" * 200, 3600)
+    return ops / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'previous':>14} {'current':>14} {'speedup':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        old, new = OldMemoryCache(), MemoryCache()
+        await fill(old, size)
+        await fill(new, size)
+        # The old cache scans every key per read: fewer ops keep the run short
+        old_rate = await measure(old, size, max(200, min(args.ops, 2_000_000 // size)))
+        new_rate = await measure(new, size, args.ops)
+        await new.close()
+        print(f"{size:>8} {old_rate:>10.0f} op/s {new_rate:>10.0f} op/s {new_rate / old_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,176 @@
+"""
+Benchmark: per-request overhead of the middleware stack,
+previous BaseHTTPMiddleware implementation vs pure ASGI.
+
+Both stacks wrap the same trivial ASGI app and are called directly (no
+server, no HTTP parsing), so the difference is the middleware cost alone.
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware [--requests 20000] [--body 2048]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench-aaaaaaaaaaaaaaaaaaaaaaaa")
+os.environ.setdefault("DEBUG", "true")
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app.core.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware
+from app.core.request_limits import RequestSizeLimitMiddleware, RequestTimeoutMiddleware
+
+
+async def endpoint(scope, receive, send):
+    """Reads the whole body and answers a small JSON document"""
+    size = 0
+    more = True
+    while more:
+        message = await receive()
+        size += len(message.get("body", b""))
+        more = message.get("more_body", False)
+    body = json.dumps({"size": size}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+# Previous implementation (BaseHTTPMiddleware), reduced to the same work
+
+class OldSecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        return response
+
+
+class OldRequestLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_id = str(uuid.uuid4())[:8]
+        request.state.request_id = request_id
+        start_time = time.time()
+        response = await call_next(request)
+        duration_ms = (time.time() - start_time) * 1000
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+        return response
+
+
+class OldSizeLimit(BaseHTTPMiddleware):
+    def __init__(self, app, max_size):
+        super().__init__(app)
+        self.max_size = max_size
+
+    async def dispatch(self, request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > self.max_size:
+            return JSONResponse(status_code=413, content={"error": "payload_too_large"})
+        return await call_next(request)
+
+
+class OldTimeout(BaseHTTPMiddleware):
+    def __init__(self, app, timeout):
+        super().__init__(app)
+        self.timeout = timeout
+
+    async def dispatch(self, request, call_next):
+        try:
+            return await asyncio.wait_for(call_next(request), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return JSONResponse(status_code=504, content={"error": "gateway_timeout"})
+
+
+def old_stack():
+    # Same order as before: the duplicate size limiter ran twice
+    app = OldSizeLimit(endpoint, max_size=10 * 1024 * 1024)
+    app = OldRequestLogging(app)
+    app = OldSecurityHeaders(app)
+    app = OldTimeout(app, timeout=30)
+    return OldSizeLimit(app, max_size=5 * 1024 * 1024)
+
+
+def new_stack():
+    app = RequestLoggingMiddleware(endpoint)
+    app = SecurityHeadersMiddleware(app)
+    app = RequestTimeoutMiddleware(app, timeout=30)
+    return RequestSizeLimitMiddleware(app, max_size=5 * 1024 * 1024)
+
+
+async def call(app, body: bytes) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/chat", "raw_path": b"/api/chat",
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 5000), "server": ("test", 80),
+        "headers": [(b"host", b"test"), (b"content-length", str(len(body)).encode())],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, requests: int, body: bytes) -> dict:
+    for _ in range(200):
+        await call(app, body)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = await call(app, body)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        assert status == 200
+    latencies.sort()
+    return {
+        "mean_us": statistics.fmean(latencies),
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[int(0.99 * (len(latencies) - 1))],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--body", type=int, default=2048, help="request body size in bytes")
+    args = parser.parse_args()
+
+    body = b"x" * args.body
+    baseline = await measure(endpoint, args.requests, body)
+
+    print(f"{'stack':<12} {'mean':>10} {'p50':>10} {'p99':>10} {'overhead':>10}")
+    for name, app in (("bare app", endpoint), ("basehttp", old_stack()), ("pure asgi", new_stack())):
+        r = await measure(app, args.requests, body)
+        print(
+            f"{name:<12} {r['mean_us']:>8.1f}us {r['p50_us']:>8.1f}us {r['p99_us']:>8.1f}us "
+            f"{r['mean_us'] - baseline['mean_us']:>8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(main())
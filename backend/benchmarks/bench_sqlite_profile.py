@@ -0,0 +1,112 @@
+"""
+Benchmark: dashboard-style reads during concurrent ticket writes,
+SQLite development profile (shared connection) vs production profile (WAL).
+
+Usage (from backend/):
+    python -m benchmarks.bench_sqlite_profile [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.sqlite import SQLiteRoutingSession, create_sqlite_engines
+from app.models.ticket import Base, TicketDB
+
+
+def _session_factory(writer, reader):
+    if reader is None:
+        return async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+    return async_sessionmaker(
+        writer,
+        class_=AsyncSession,
+        sync_session_class=SQLiteRoutingSession,
+        reader_engine=reader,
+        writer_engine=writer,
+        expire_on_commit=False
+    )
+
+
+async def run_profile(profile: str, readers: int, writers: int, seconds: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), f"bench_{profile}.db")
+    writer, reader = create_sqlite_engines(f"sqlite:///{path}", profile=profile, read_pool_size=readers)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = _session_factory(writer, reader)
+
+    deadline = time.perf_counter() + seconds
+    read_latencies = []
+    writes = 0
+
+    async def write_loop(worker: int):
+        nonlocal writes
+        i = 0
+        while time.perf_counter() < deadline:
+            async with factory() as db:
+                db.add(TicketDB(
+                    ticket_id=f"SAV-BENCH-{worker}-{i:06d}",
+                    customer_id=f"CUST-{i}",
+                    status="new",
+                    priority="P2",
+                    created_at=datetime.now()
+                ))
+                await db.commit()
+            writes += 1
+            i += 1
+
+    async def read_loop():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            async with factory() as db:
+                result = await db.execute(
+                    select(TicketDB).order_by(TicketDB.created_at.desc()).limit(100)
+                )
+                result.scalars().all()
+            read_latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(
+        *[write_loop(w) for w in range(writers)],
+        *[read_loop() for _ in range(readers)]
+    )
+
+    if reader is not None:
+        await reader.dispose()
+    await writer.dispose()
+
+    read_latencies.sort()
+    return {
+        "profile": profile,
+        "reads_per_s": len(read_latencies) / seconds,
+        "writes_per_s": writes / seconds,
+        "read_p50_ms": statistics.median(read_latencies) if read_latencies else 0.0,
+        "read_p95_ms": read_latencies[int(0.95 * (len(read_latencies) - 1))] if read_latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'read p50':>10} {'read p95':>10}")
+    for profile in ("development", "production"):
+        r = await run_profile(profile, args.readers, args.writers, args.seconds)
+        print(
+            f"{r['profile']:<12} {r['reads_per_s']:>10.1f} {r['writes_per_s']:>10.1f} "
+            f"{r['read_p50_ms']:>8.2f}ms {r['read_p95_ms']:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bulk claim ingestion script
+Imports a CSV export of SAV claims (stores / call center) into the database
+
+Usage:
+    python ingest_claims.py claims.csv [--batch-size 500] [--dry-run] [--errors-out errors.json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.session import AsyncSessionLocal, init_db, close_db
+from app.services.bulk_claim_ingestion import BulkClaimIngestor, DEFAULT_BATCH_SIZE
+
+
+async def ingest(path: Path, batch_size: int, dry_run: bool, errors_out: Path = None):
+    """Run the ingestion and print a summary"""
+
+    print(f"🚀 Importing claims from {path} (batch size {batch_size}{', dry run' if dry_run else ''})...")
+
+    await init_db()
+    try:
+        ingestor = BulkClaimIngestor(batch_size=batch_size, dry_run=dry_run)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            async with AsyncSessionLocal() as db:
+                report = await ingestor.ingest_csv(db, f)
+    finally:
+        await close_db()
+
+    summary = report.to_dict()
+    print(f"✅ Rows read: {summary['total_rows']}")
+    print(f"✅ Tickets inserted: {summary['inserted']}")
+    print(f"{'❌' if summary['failed'] else '✅'} Rows failed: {summary['failed']}")
+    print(f"⏱️  {summary['duration_seconds']}s ({summary['rows_per_second']} rows/s, {summary['batches']} batches)")
+
+    if errors_out and summary["errors"]:
+        errors_out.write_text(json.dumps(summary["errors"], ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"📝 Row errors written to {errors_out}")
+    else:
+        for error in summary["errors"][:20]:
+            print(f"   line {error['row']} ({error['order_number']}): {error['error']}")
+        if len(summary["errors"]) > 20:
+            print(f"   ... {len(summary['errors']) - 20} more (use --errors-out)")
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import SAV claims from a CSV file")
+    parser.add_argument("file", type=Path, help="CSV file to import")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per batch insert")
+    parser.add_argument("--dry-run", action="store_true", help="Analyze rows without writing to the database")
+    parser.add_argument("--errors-out", type=Path, default=None, help="Write row errors to this JSON file")
+    args = parser.parse_args()
+
+    if not args.file.exists():
+        print(f"❌ ERROR: file not found: {args.file}")
+        sys.exit(1)
+
+    try:
+        summary = asyncio.run(ingest(args.file, args.batch_size, args.dry_run, args.errors_out))
+    except ValueError as e:
+        print(f"❌ Import failed: {str(e)}")
+        sys.exit(1)
+
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
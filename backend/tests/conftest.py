@@ -0,0 +1,35 @@
+"""
+Shared fixtures
+"""
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.redis import CacheManager
+
+
+@pytest_asyncio.fixture
+async def memory_cache():
+    """A fresh in-memory cache behind CacheManager, restored afterwards"""
+    manager = CacheManager()
+    previous = manager._cache
+    CacheManager.initialize("memory://")
+    cache = manager._cache
+    yield cache
+    await cache.close()
+    manager._cache = previous
+
+
+@pytest_asyncio.fixture
+async def db_session_factory():
+    """Session factory on a fresh in-memory SQLite database with every table"""
+    from app.models.user import Base as UserBase
+    from app.models.ticket import Base as TicketBase
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(UserBase.metadata.create_all)
+            await conn.run_sync(TicketBase.metadata.create_all)
+        yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,101 @@
+"""
+Tests for prefixed API keys, the verification cache and batched last_used
+"""
+import uuid
+import pytest
+from sqlalchemy import select
+
+from app.core import api_key_auth
+from app.core.api_key_auth import (
+    APIKeyVerificationCache,
+    APIKeyUsageTracker,
+    authenticate_api_key,
+    invalidate_api_key,
+)
+from app.core.security import generate_api_key, get_api_key_prefix, hash_api_key, verify_api_key
+from app.models.user import APIKeyDB
+
+
+def test_api_key_prefix_and_hash():
+    api_key = generate_api_key()
+    prefix = get_api_key_prefix(api_key)
+
+    assert prefix is not None and len(prefix) == 12
+    assert api_key.startswith(f"mdf_{prefix}_")
+    assert verify_api_key(api_key, hash_api_key(api_key))
+    assert not verify_api_key(api_key + "x", hash_api_key(api_key))
+    # Legacy format has no lookup prefix
+    assert get_api_key_prefix("mdf_" + "A" * 43) is None
+
+
+@pytest.mark.asyncio
+async def test_authenticate_api_key_uses_prefix_cache_and_batches_usage(monkeypatch, db_session_factory):
+    cache = APIKeyVerificationCache(ttl=30)
+    tracker = APIKeyUsageTracker()
+    monkeypatch.setattr(api_key_auth, "_verification_cache", cache)
+    monkeypatch.setattr(api_key_auth, "_usage_tracker", tracker)
+
+    verifications = []
+    real_verify = api_key_auth.verify_api_key
+    monkeypatch.setattr(
+        api_key_auth, "verify_api_key",
+        lambda key, stored: verifications.append(stored) or real_verify(key, stored)
+    )
+
+    keys = [generate_api_key() for _ in range(20)]
+    async with db_session_factory() as db:
+        for i, key in enumerate(keys):
+            db.add(APIKeyDB(
+                id=str(uuid.uuid4()),
+                name=f"key-{i}",
+                key_prefix=get_api_key_prefix(key),
+                key_hash=hash_api_key(key),
+                user_id=f"user-{i}",
+                is_active=1
+            ))
+        await db.commit()
+
+        # One row verified, not twenty
+        assert await authenticate_api_key(db, keys[7]) == "user-7"
+        assert len(verifications) == 1
+
+        # Served from the positive cache
+        assert await authenticate_api_key(db, keys[7]) == "user-7"
+        assert len(verifications) == 1
+        assert cache.hits == 1
+
+        # Right prefix, wrong secret
+        forged = keys[7][:-4] + "abcd"
+        assert await authenticate_api_key(db, forged) is None
+
+        # Unknown prefix: no bcrypt check against the legacy keys
+        legacy_key = "mdf_" + "A" * 43
+        db.add(APIKeyDB(
+            id=str(uuid.uuid4()),
+            name="legacy",
+            key_hash=hash_api_key(legacy_key),
+            user_id="legacy-user",
+            is_active=1
+        ))
+        await db.commit()
+        verifications.clear()
+        assert await authenticate_api_key(db, generate_api_key()) is None
+        assert verifications == []
+        assert await authenticate_api_key(db, legacy_key) == "legacy-user"
+        assert len(verifications) == 1
+
+        key_id = (await db.execute(
+            select(APIKeyDB.id).where(APIKeyDB.user_id == "user-7")
+        )).scalar_one()
+        invalidate_api_key(key_id)
+        assert cache.get(keys[7]) is None
+
+    # last_used is only written by flush
+    assert tracker.pending_count == 2
+    async with db_session_factory() as db:
+        assert (await db.get(APIKeyDB, key_id)).last_used is None
+
+    assert await tracker.flush(db_session_factory) == 2
+    assert tracker.pending_count == 0
+    async with db_session_factory() as db:
+        assert (await db.get(APIKeyDB, key_id)).last_used is not None
@@ -0,0 +1,83 @@
+"""
+Tests for bulk claim ingestion (CSV streaming + batched inserts)
+"""
+import io
+import pytest
+from sqlalchemy import select, func
+
+from app.models.ticket import TicketDB
+from app.services.bulk_claim_ingestion import BulkClaimIngestor
+
+HEADER = "customer_id,order_number,product_sku,product_name,problem_description,purchase_date,delivery_date,product_value\n"
+
+
+def _row(i: int, purchase_date: str = "2025-06-01", order_number: str = None) -> str:
+    order_number = order_number or f"CMD-2025-{i:05d}"
+    return (
+        f"CUST-{i},{order_number},SKU-{i},Canapé Oslo,"
+        f"Le pied du canapé est cassé à la livraison,{purchase_date},2025-06-05,899\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_ingest_csv_reports_row_errors_and_inserts_in_batches(db_session_factory):
+    lines = [HEADER] + [_row(i) for i in range(1, 6)]
+    lines.append(_row(6, purchase_date="pas-une-date"))
+    lines.append(_row(7, order_number="CMD-2025-00001"))  # même ticket que la ligne 2
+
+    async with db_session_factory() as db:
+        report = await BulkClaimIngestor(batch_size=2).ingest_csv(db, io.StringIO("".join(lines)))
+        count = await db.scalar(select(func.count()).select_from(TicketDB))
+
+
+    assert report.total_rows == 7
+    assert report.inserted == 5
+    assert report.failed == 2
+    assert report.batches == 4
+    assert count == 5
+    assert {e.row_number for e in report.errors} == {7, 8}
+
+
+@pytest.mark.asyncio
+async def test_ingest_csv_dry_run_and_missing_columns(db_session_factory):
+    async with db_session_factory() as db:
+        report = await BulkClaimIngestor(dry_run=True).ingest_csv(
+            db, io.StringIO(HEADER + _row(1) + _row(2))
+        )
+        count = await db.scalar(select(func.count()).select_from(TicketDB))
+
+        with pytest.raises(ValueError):
+            await BulkClaimIngestor().ingest_csv(db, io.StringIO("customer_id,order_number\nA,B\n"))
+
+
+    assert report.analyzed == 2
+    assert report.inserted == 0
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_claims_endpoint_reads_the_upload(db_session_factory):
+    from fastapi import FastAPI
+    from httpx import AsyncClient, ASGITransport
+    from app.api.deps import require_agent
+    from app.api.endpoints import sav
+    from app.db.session import get_db
+
+    async def override_get_db():
+        async with db_session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(sav.router, prefix="/api")
+    app.state.db_available = True
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[require_agent] = lambda: type("Agent", (), {"email": "agent@test.fr"})()
+
+    content = ("\ufeff" + HEADER + "".join(_row(i) for i in range(1, 4))).encode("utf-8")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/sav/bulk-claims", files={"file": ("claims.csv", content, "text/csv")})
+        invalid = await client.post("/api/sav/bulk-claims", files={"file": ("claims.csv", b"\xff\xfe\x00", "text/csv")})
+
+    assert response.status_code == 200
+    assert response.json()["report"]["inserted"] == 3
+    assert invalid.status_code == 400
@@ -0,0 +1,209 @@
+"""
+Tests for the two-tier @cached decorator and its pub/sub L1 invalidation
+"""
+import asyncio
+import time
+import pytest
+
+from app.core import cache_decorators, codec
+from app.core.cache_decorators import (
+    CACHE_INVALIDATION_CHANNEL,
+    cached,
+    delete_cached,
+    get_cache_stats,
+    invalidate_cache,
+    start_cache_invalidation_listener,
+    stop_cache_invalidation_listener,
+)
+from app.core.metrics import cache_requests
+from app.core.pubsub import PubSubManager
+from app.core.redis import CacheManager, get_cache
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_hot_values_and_is_invalidated_everywhere(monkeypatch):
+    monkeypatch.setattr(cache_decorators, "_local_caches", {})
+    cache_requests.clear()
+    CacheManager.initialize("memory://")
+    PubSubManager.initialize("memory://")
+    calls = []
+
+    @cached(prefix="catalog", ttl=300, key_builder=lambda category: category, local_ttl=30)
+    async def load_fragment(category):
+        calls.append(category)
+        return {"category": category, "items": len(calls)}
+
+    @invalidate_cache("catalog", "sof*")
+    async def update_sofas():
+        pass
+
+    reads = []
+    real_get = get_cache().get
+    monkeypatch.setattr(get_cache(), "get", lambda key: reads.append(key) or real_get(key))
+
+    await start_cache_invalidation_listener()
+    try:
+        first = await load_fragment("sofas")
+        assert await load_fragment("sofas") == first
+        assert calls == ["sofas"] and len(reads) == 1
+
+        # Invalidated by pattern: shared entry and L1 copy are both gone
+        await update_sofas()
+        assert (await load_fragment("sofas"))["items"] == 2
+
+        # Another worker rewrites the shared entry: our L1 copy is served until
+        # its broadcast arrives
+        await get_cache().set("cache:catalog:sofas", '{"category": "sofas", "items": 99}')
+        assert (await load_fragment("sofas"))["items"] == 2
+        await PubSubManager.get_broker().publish(CACHE_INVALIDATION_CHANNEL, {
+            "prefix": "catalog", "keys": ["cache:catalog:sofas"], "patterns": [], "worker": "other:1"
+        })
+        await asyncio.sleep(0.01)
+        assert (await load_fragment("sofas"))["items"] == 99
+
+        await delete_cached("catalog", "sofas")
+        assert (await load_fragment("sofas"))["items"] == 3
+
+        stats = get_cache_stats()["catalog"]
+        assert stats["l1"]["hit"] == 2 and stats["l1"]["miss"] == 4
+        assert stats["l1"]["hit_ratio"] == round(2 / 6, 4)
+        assert stats["l2"] == {"hit": 1, "miss": 3, "error": 0, "hit_ratio": 0.25}
+        assert stats["l1"]["entries"] == 1
+    finally:
+        await stop_cache_invalidation_listener()
+        await PubSubManager.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_read_racing_an_invalidation_is_not_kept_in_l1():
+    local = cache_decorators.LocalCache("x", max_entries=2)
+    generation = local.generation
+    local.invalidate(["cache:x:a"])
+    local.put("cache:x:a", 1, ttl=30, generation=generation)
+    assert local.get("cache:x:a") is None
+
+    for key in ("a", "b", "c"):
+        local.put(f"cache:x:{key}", key, ttl=30)
+    assert local.get("cache:x:a") is None and local.get("cache:x:c") == "c"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_call_the_function_once():
+    CacheManager.initialize("memory://")
+    calls = []
+
+    @cached(prefix="herd", ttl=60, key_builder=lambda key: key)
+    async def slow_load(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return {"key": key}
+
+    results = await asyncio.gather(*(slow_load("hot") for _ in range(20)), slow_load("cold"))
+    assert calls == ["hot", "cold"]
+    assert all(result == {"key": "hot"} for result in results[:20])
+    assert cache_decorators._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_shared_lock_makes_other_workers_wait_for_the_value():
+    CacheManager.initialize("memory://")
+    calls = []
+
+    @cached(prefix="locked", ttl=60, key_builder=lambda key: key, lock_timeout=5)
+    async def load(key):
+        calls.append(key)
+        return {"key": key}
+
+    # Another worker holds the lock and stores the value shortly after
+    await get_cache().setnx("lock:cache:locked:k", "other", 5)
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await get_cache().set("cache:locked:k", '{"key": "from other"}', 60)
+
+    result, _ = await asyncio.gather(load("k"), other_worker())
+    assert result == {"key": "from other"} and calls == []
+
+    assert await load("free") == {"key": "free"}
+    assert calls == ["free"] and not await get_cache().exists("lock:cache:locked:free")
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_taken_by_another_worker_is_not_released(monkeypatch):
+    CacheManager.initialize("memory://")
+    cache = get_cache()
+    lock_key = "lock:cache:slow:k"
+    computed = []
+
+    @cached(prefix="slow", ttl=60, key_builder=lambda key: key, lock_timeout=5)
+    async def load(key):
+        computed.append(key)
+        return {"key": key}
+
+    # Our lock expires when the computation ends and another worker takes it,
+    # even between a read of the lock and its deletion
+    async def takeover():
+        if computed and await real_get(lock_key) != "other":
+            await cache.delete(lock_key)
+            await cache.setnx(lock_key, "other", 5)
+
+    real_get, real_delete_if_equals = cache.get, cache.delete_if_equals
+
+    async def get(key):
+        value = await real_get(key)
+        if key == lock_key:
+            await takeover()
+        return value
+
+    async def delete_if_equals(key, value):
+        await takeover()
+        return await real_delete_if_equals(key, value)
+
+    monkeypatch.setattr(cache, "get", get)
+    monkeypatch.setattr(cache, "delete_if_equals", delete_if_equals)
+    assert await load("k") == {"key": "k"}
+    assert await real_get(lock_key) == "other"
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_one_refresh_runs():
+    CacheManager.initialize("memory://")
+    version = [0]
+
+    @cached(prefix="swr", ttl=60, key_builder=lambda key: key, stale_ttl=300)
+    async def load(key):
+        version[0] += 1
+        await asyncio.sleep(0.02)
+        return {"version": version[0]}
+
+    assert await load("k") == {"version": 1}
+    # Make the stored value stale
+    entry = codec.loads(await get_cache().get("cache:swr:k"))
+    entry["__cached__"][0] = time.time() - 1
+    await get_cache().set("cache:swr:k", codec.dumps(entry), 300)
+
+    assert await asyncio.gather(load("k"), load("k"), load("k")) == [{"version": 1}] * 3
+    await asyncio.sleep(0.05)
+    assert version[0] == 2
+    assert await load("k") == {"version": 2}
+
+
+@pytest.mark.asyncio
+async def test_early_expiration_recomputes_before_expiry(monkeypatch):
+    CacheManager.initialize("memory://")
+    version = [0]
+
+    @cached(prefix="xfetch", ttl=60, key_builder=lambda key: key, early_expiration=1.0)
+    async def load(key):
+        version[0] += 1
+        return {"version": version[0]}
+
+    await load("k")
+    assert await load("k") == {"version": 1}
+
+    # Close to expiry with a slow recomputation: recompute now
+    entry = codec.loads(await get_cache().get("cache:xfetch:k"))
+    entry["__cached__"] = [time.time() + 0.5, 2.0]
+    await get_cache().set("cache:xfetch:k", codec.dumps(entry), 60)
+    monkeypatch.setattr(cache_decorators.random, "random", lambda: 0.9)
+    assert await load("k") == {"version": 2}
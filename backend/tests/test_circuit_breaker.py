@@ -0,0 +1,160 @@
+"""
+Tests for the sliding-window circuit breaker
+"""
+import asyncio
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CircuitBreaker, CircuitBreakerError, CircuitState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def ok():
+    return "ok"
+
+
+async def boom():
+    raise ConnectionError("down")
+
+
+def make_breaker(clock: Clock, **options) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test",
+        failure_rate_threshold=0.5,
+        minimum_calls=10,
+        window_seconds=60,
+        recovery_timeout=30,
+        success_threshold=2,
+        half_open_max_calls=2,
+        shared=False,
+        clock=clock,
+        **options
+    )
+
+
+async def call(breaker, func):
+    try:
+        return await breaker.call(func)
+    except (ConnectionError, CircuitBreakerError) as e:
+        return e
+
+
+def test_opens_on_failure_rate_after_minimum_calls():
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    async def run():
+        # 5 failures out of 9 calls: below the minimum volume
+        for func in [boom, ok] * 4 + [boom]:
+            await call(breaker, func)
+        assert breaker.state == CircuitState.CLOSED
+        await call(breaker, ok)  # 10 calls, 50% failed
+        assert breaker.state == CircuitState.CLOSED
+        await call(breaker, boom)
+        assert breaker.state == CircuitState.OPEN
+        assert isinstance(await call(breaker, ok), CircuitBreakerError)
+
+    asyncio.run(run())
+    assert breaker.get_stats()["total_rejected"] == 1
+
+
+def test_old_failures_leave_the_window():
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    async def run():
+        for _ in range(9):
+            await call(breaker, boom)
+        clock.now += 61
+        for _ in range(9):
+            await call(breaker, ok)
+        await call(breaker, boom)
+
+    asyncio.run(run())
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_stats()["window"] == {"calls": 10, "failures": 1, "failure_rate": 0.1}
+
+
+def test_half_open_admits_a_bounded_number_of_probes():
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    async def run():
+        for _ in range(10):
+            await call(breaker, boom)
+        assert breaker.state == CircuitState.OPEN
+        clock.now += 31
+
+        release = asyncio.Event()
+
+        async def slow_ok():
+            await release.wait()
+            return "ok"
+
+        probes = [asyncio.create_task(call(breaker, slow_ok)) for _ in range(5)]
+        await asyncio.sleep(0)
+        rejected = [p.result() for p in probes if p.done()]
+        assert len(rejected) == 3 and all(isinstance(r, CircuitBreakerError) for r in rejected)
+        assert breaker.state == CircuitState.HALF_OPEN
+
+        release.set()
+        results = await asyncio.gather(*probes)
+        assert results.count("ok") == 2
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(run())
+
+
+def test_failed_probe_reopens():
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    async def run():
+        for _ in range(10):
+            await call(breaker, boom)
+        clock.now += 31
+        await call(breaker, boom)
+        assert breaker.state == CircuitState.OPEN
+        assert isinstance(await call(breaker, ok), CircuitBreakerError)
+
+    asyncio.run(run())
+
+
+def test_transitions_are_shared_between_workers(monkeypatch):
+    sent = []
+
+    async def fake_broadcast(breaker):
+        until = 2e10 if breaker.state == CircuitState.OPEN else None
+        sent.append({"name": breaker.name, "state": breaker.state.value, "until": until})
+
+    monkeypatch.setattr(circuit_breaker, "_broadcast", fake_broadcast)
+    clock = Clock()
+    worker_a = make_breaker(clock)
+    worker_a.shared = True
+    worker_a._synced = True
+    worker_b = make_breaker(Clock())
+
+    async def run():
+        for _ in range(10):
+            await call(worker_a, boom)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert [m["state"] for m in sent] == ["open"]
+
+    worker_b.apply_remote(sent[0]["state"], sent[0]["until"])
+    assert worker_b.state == CircuitState.OPEN
+    worker_b.apply_remote("closed", None)
+    assert worker_b.state == CircuitState.CLOSED
+
+
+def test_get_breaker_keeps_first_configuration():
+    first = circuit_breaker.CircuitBreakerManager.get_breaker("test-config", minimum_calls=3, shared=False)
+    again = circuit_breaker.CircuitBreakerManager.get_breaker("test-config", minimum_calls=50)
+    assert first is again and again.minimum_calls == 3
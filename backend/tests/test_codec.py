@@ -0,0 +1,44 @@
+"""
+Tests for the cache payload codec
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core import codec
+from app.core.config import settings
+
+
+def test_payload_formats_round_trip(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_THRESHOLD", 1024)
+    small = {"session_id": "abc", "created_at": datetime(2024, 5, 1, 10, 30), 1: "int key"}
+    large = {"history": [{"role": "user", "content": f"Bonjour, mon canapé n°{i} est abîmé"} for i in range(100)]}
+
+    encoded = codec.dumps(small)
+    assert encoded[0] == codec.JSON_MARKER
+    # Same values as the stdlib encoding used before
+    assert codec.loads(encoded) == json.loads(json.dumps(small, default=str))
+
+    compressed = codec.dumps(large)
+    assert compressed[0] == codec.ZLIB_MARKER
+    assert len(compressed) < len(json.dumps(large)) / 3
+    assert codec.loads(compressed) == large
+
+
+def test_plain_json_is_written_and_read_during_rollout(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_CODEC", "json")
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_THRESHOLD", 1024)
+    value = {"text": "é", "n": 1}
+    large = {"history": [{"role": "user", "content": f"message {i}"} for i in range(200)]}
+
+    assert codec.dumps(value) == json.dumps(value)
+    # Never compressed: workers predating the codec read it with the stdlib
+    assert json.loads(codec.dumps(large)) == large
+    assert codec.loads(json.dumps(value)) == value
+    assert codec.loads('{"score": NaN}')["score"] != 0
+
+    with pytest.raises(codec.CodecError):
+        codec.loads(codec.ZLIB_MARKER + "not base64 ~~~")
+    with pytest.raises(codec.CodecError):
+        codec.loads("{broken")
@@ -0,0 +1,80 @@
+"""
+Tests for the cached client dossier (ETag / If-None-Match / invalidation)
+"""
+import pytest
+from datetime import datetime
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.api.endpoints import sav
+from app.core.cache_decorators import get_cached
+from app.core.redis import CacheManager
+from app.db.session import get_db
+from app.models.ticket import TicketDB
+from app.repositories.ticket_repository import ticket_repository, DOSSIER_CACHE_PREFIX
+
+TICKET_ID = "SAV-20260101-001"
+
+
+@pytest.mark.asyncio
+async def test_dossier_etag_cache_and_invalidation(db_session_factory):
+    CacheManager.initialize("memory://")
+
+    async with db_session_factory() as db:
+        db.add(TicketDB(
+            ticket_id=TICKET_ID,
+            customer_id="CUST-1",
+            status="new",
+            priority="P2",
+            created_at=datetime(2026, 1, 1),
+            updated_at=datetime(2026, 1, 1, 10, 0),
+            actions=[{"action_type": "ticket_created"}]
+        ))
+        await db.commit()
+
+    async def override_get_db():
+        async with db_session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(sav.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+
+    url = f"/api/sav/ticket/{TICKET_ID}/dossier"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get(url)
+        assert first.status_code == 200
+        assert first.json()["dossier"]["historique"] == [{"action_type": "ticket_created"}]
+        etag = first.headers["etag"]
+
+        cached = await get_cached(DOSSIER_CACHE_PREFIX, TICKET_ID)
+        assert cached["version"] == "2026-01-01T10:00:00"
+
+        not_modified = await client.get(url, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+
+        # Served from cache with the same ETag
+        second = await client.get(url)
+        assert second.status_code == 200
+        assert second.headers["etag"] == etag
+        assert second.json() == first.json()
+
+        # Updating the ticket drops the cache entry and changes the ETag
+        async with db_session_factory() as db:
+            db_ticket = await ticket_repository.get_by_id(db, TICKET_ID)
+            db_ticket.status = "resolved"
+            db_ticket.updated_at = datetime(2026, 1, 2, 9, 0)
+            await db.commit()
+        await ticket_repository.invalidate_cached_views(TICKET_ID)
+        assert await get_cached(DOSSIER_CACHE_PREFIX, TICKET_ID) is None
+
+        third = await client.get(url, headers={"If-None-Match": etag})
+        assert third.status_code == 200
+        assert third.headers["etag"] != etag
+        assert third.json()["dossier"]["ticket"]["status"] == "resolved"
+
+        missing = await client.get("/api/sav/ticket/SAV-00000000-000/dossier")
+        assert missing.status_code == 404
+
+    await CacheManager.close()
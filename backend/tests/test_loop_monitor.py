@@ -0,0 +1,38 @@
+"""
+Tests for the event loop lag monitor
+"""
+import asyncio
+import time
+
+from app.core.loop_monitor import LoopMonitor, blocking_site
+
+
+def blocking_password_hash():
+    time.sleep(0.3)
+
+
+def test_blocking_site_prefers_application_frames():
+    stack = "uvicorn/server.py:Server.serve;app/api/endpoints/auth.py:login;passlib/context.py:verify"
+    assert blocking_site(stack) == "app/api/endpoints/auth.py:login"
+    assert blocking_site("asyncio/events.py:Handle._run;json/encoder.py:encode") == "json/encoder.py:encode"
+
+
+def test_monitor_measures_lag_and_names_the_blocking_call():
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_password_hash()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(run())
+    stats = monitor.get_stats()
+
+    assert stats["stalls"] == 1
+    assert stats["max_lag_ms"] >= 200
+    assert stats["lag_ms"]["p50"] < 50
+    site = stats["blocking_sites"][0]
+    assert site["site"].endswith(":blocking_password_hash")
+    assert "test_loop_monitor.py:test_monitor_measures_lag_and_names_the_blocking_call.<locals>.run" in site["stack"]
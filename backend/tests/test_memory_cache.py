@@ -0,0 +1,208 @@
+"""
+Tests for the in-memory cache: lazy/heap expiry and LRU bounds
+"""
+import asyncio
+import pytest
+
+from app.core.redis import MemoryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_keys_expire_on_access_and_by_sweeper():
+    clock = FakeClock()
+    cache = MemoryCache(sweep_interval=0.01, clock=clock)
+    try:
+        await cache.set("short", "1", expire=1)
+        await cache.set("long", "2", expire=60)
+        await cache.set("forever", "3")
+        assert await cache.ttl("forever") == -1
+        assert await cache.ttl("missing") == -2
+        assert await cache.ttl("long") == 60
+
+        clock.now += 2
+        assert await cache.get("short") is None
+        assert await cache.ttl("short") == -2
+
+        await cache.expire("long", 5)
+        clock.now += 10
+        await asyncio.sleep(0.1)
+        assert "long" not in cache._data
+        assert await cache.keys("*") == ["forever"]
+        assert cache.get_stats()["expirations"] == 2
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_overwritten_expiry_is_not_swept_early():
+    clock = FakeClock()
+    cache = MemoryCache(clock=clock)
+    await cache.set("k", "v", expire=1)
+    await cache.set("k", "v")
+    await cache.set("j", "v", expire=1)
+    await cache.set("j", "v", expire=30)
+    clock.now += 5
+
+    assert cache.sweep() == 0
+    assert await cache.get("k") == "v"
+    assert await cache.get("j") == "v"
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_lru_bounds_evict_least_recently_used():
+    cache = MemoryCache(max_entries=3)
+    for key in ("a", "b", "c"):
+        await cache.set(key, "v")
+    await cache.get("a")
+    await cache.set("d", "v")
+
+    assert sorted(await cache.keys("*")) == ["a", "c", "d"]
+    assert cache.evictions == 1
+
+    sized = MemoryCache(max_bytes=100)
+    await sized.set("big", "x" * 60)
+    await sized.set("other", "y" * 30)
+    await sized.set("big", "z" * 20)
+    assert sized.get_stats()["approx_bytes"] == len("big") + 20 + len("other") + 30
+    await sized.set("last", "w" * 50)
+    assert not await sized.exists("other")
+    assert await sized.get("big") == "z" * 20
+    assert sized.get_stats()["approx_bytes"] <= 100
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_and_pipeline():
+    cache = MemoryCache()
+    assert await cache.set_many({"a": "1", "b": "2"}, expire=60)
+    assert await cache.get_many(["a", "missing", "b"]) == ["1", None, "2"]
+    assert await cache.ttl("b") == 60
+
+    async with cache.pipeline() as pipe:
+        pipe.get("a").delete("a").exists("a").set("c", "3", expire=10)
+    assert pipe.results == ["1", True, False, True]
+
+    with pytest.raises(RuntimeError):
+        async with cache.pipeline() as pipe:
+            pipe.delete("b")
+            raise RuntimeError("aborted")
+    assert await cache.exists("b")
+
+    assert not await cache.delete_if_equals("b", "other")
+    assert await cache.delete_if_equals("c", "3")
+    assert await cache.delete_many(["b", "c", "missing"]) == 1
+    assert await cache.keys("*") == []
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_session_cleanup_uses_bulk_calls(monkeypatch, memory_cache):
+    from datetime import datetime, timedelta
+    from app.services.session_manager import SessionManager, ChatSession
+
+    manager = SessionManager()
+    cache = manager._get_cache()
+    old = (datetime.utcnow() - timedelta(days=2)).isoformat()
+    for i in range(5):
+        await manager.save_session(ChatSession(session_id=f"s{i}", last_active=old if i % 2 else datetime.utcnow().isoformat()))
+
+    calls = []
+    monkeypatch.setattr(cache, "get", lambda key: calls.append(key))
+    assert len(await manager.list_sessions()) == 5
+    assert await manager.cleanup_expired_sessions() == 2
+    assert calls == []
+    assert sorted(s["session_id"] for s in await manager.list_sessions()) == ["s0", "s2", "s4"]
+
+
+@pytest.mark.asyncio
+async def test_hashes_and_lists():
+    cache = MemoryCache(max_bytes=1000)
+    assert await cache.hset("h", {"a": "1", "b": "2"}) == 2
+    assert await cache.hset("h", {"a": "3"}) == 0
+    assert await cache.hincrby("h", "n", 2) == 2
+    assert await cache.hgetall("h") == {"a": "3", "b": "2", "n": "2"}
+    assert await cache.hgetall("missing") == {}
+
+    assert await cache.rpush("l", "a", "b", "c", "d") == 4
+    assert await cache.lrange("l", -2, -1) == ["c", "d"]
+    assert await cache.ltrim("l", -3, -1)
+    assert await cache.lrange("l", 0, -1) == ["b", "c", "d"]
+    assert await cache.ltrim("l", 5, -1)
+    assert not await cache.exists("l")
+
+    # Containers are accounted for and not readable as strings
+    assert cache.get_stats()["approx_bytes"] == len("h") + len("a3b2n2")
+    assert await cache.get("h") is None
+    with pytest.raises(TypeError):
+        await cache.rpush("h", "x")
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_session_messages_are_appended_not_rewritten(monkeypatch, memory_cache):
+    from app.services import session_manager
+    from app.services.session_manager import SessionManager
+
+    monkeypatch.setattr(session_manager, "SESSION_MAX_MESSAGES", 3)
+    manager = SessionManager()
+    cache = manager._get_cache()
+    await manager.create_session("s1", user_id="42")
+
+    writes, history_reads = [], []
+    real_hset, real_lrange = cache.hset, cache.lrange
+    monkeypatch.setattr(cache, "hset", lambda key, mapping: writes.append(sorted(mapping)) or real_hset(key, mapping))
+    monkeypatch.setattr(cache, "lrange", lambda *args: history_reads.append(args[0]) or real_lrange(*args))
+    for i in range(4):
+        session = await manager.add_message("s1", "user", f"message {i}")
+    # Neither the history is rewritten nor read back
+    assert writes == [["last_active"]] * 4 and history_reads == []
+    assert session.message_count == 4 and session.user_id == "42"
+    assert session.conversation_history == []
+
+    session = await manager.update_session("s1", order_number="CMD-1", unknown="ignored")
+    assert session.order_number == "CMD-1" and history_reads == []
+
+    session = await manager.get_or_create_session("s1")
+    assert [m["content"] for m in session.conversation_history] == ["message 1", "message 2", "message 3"]
+    assert session.order_number == "CMD-1" and len(history_reads) == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_to_a_vanished_session_leave_no_keys(memory_cache):
+    from app.services.session_manager import SessionManager
+
+    async with memory_cache.pipeline(if_exists="missing") as pipe:
+        pipe.hset("missing", {"a": "1"}).expire("missing", 60)
+    assert pipe.results is None and not await memory_cache.exists("missing")
+
+    manager = SessionManager()
+    await manager.create_session("s1")
+    await manager.delete_session("s1")
+    assert await manager.add_message("s1", "user", "hi") is None
+    assert await manager.update_session("s1", order_number="CMD-1") is None
+    assert await memory_cache.keys("session:*") == []
+
+
+@pytest.mark.asyncio
+async def test_legacy_session_is_migrated_on_read(memory_cache):
+    from app.core.redis import cache_set_json
+    from app.services.session_manager import SessionManager, ChatSession
+
+    manager = SessionManager()
+    legacy = ChatSession(session_id="old", language="en")
+    legacy.add_message("user", "bonjour")
+    await cache_set_json("session:old", legacy.to_dict(), 3600)
+
+    assert (await manager.get_session("old")) == legacy
+    assert not await manager._get_cache().exists("session:old")
+    assert await manager.get_session_count() == 1
+    assert await manager.delete_session("old")
+    assert await manager.get_session("old") is None
@@ -0,0 +1,71 @@
+"""
+Tests for continuous memory profiling (store sizes, growth alerts, tracemalloc diffs)
+"""
+import asyncio
+import tracemalloc
+
+import pytest
+
+from app.core import memory_profiler
+from app.core.memory_profiler import GrowthTracker, MemoryProfiler, measure_store
+
+
+class Session:
+    def __init__(self, size: int):
+        self.history = [f"{i:0100d}" for i in range(size)]
+
+
+def test_measure_store_extrapolates_from_a_sample():
+    small = measure_store({f"s{i}": Session(10) for i in range(10)})
+    large = measure_store({f"s{i}": Session(10) for i in range(1000)})
+
+    assert small["items"] == 10 and not small["extrapolated"]
+    assert large["extrapolated"]
+    # 10 strings of ~150 bytes per session
+    assert 1000 * 1500 < large["approx_bytes"] < 1000 * 4000
+    assert 60 < large["approx_bytes"] / small["approx_bytes"] < 150
+
+
+def test_growth_tracker_alerts_once_per_streak():
+    tracker = GrowthTracker("store", window=3)
+    started = [tracker.add(value) for value in (10, 20, 30, 40, 35, 36, 37)]
+
+    assert started == [False, False, True, False, False, False, True]
+    assert tracker.growing
+
+
+def test_sampler_flags_growing_store_and_attributes_allocations(monkeypatch):
+    store = {}
+    monkeypatch.setattr(memory_profiler, "_stores", {"sessions": lambda: store})
+    monkeypatch.setattr(memory_profiler.settings, "MEMORY_GROWTH_ALERT_SAMPLES", 3)
+    profiler = MemoryProfiler()
+    leak = []
+
+    async def run():
+        for step in range(3):
+            store[step] = Session(50)
+            leak.append(bytearray(512 * 1024))
+            await profiler.sample()
+
+    tracemalloc.start()
+    try:
+        asyncio.run(run())
+        report = profiler.report()
+    finally:
+        tracemalloc.stop()
+
+    assert report["stores"]["sessions"]["items"] == 3
+    assert report["stores"]["sessions"]["growing"] is True
+    assert "sessions" in report["growing"]
+    top = report["tracemalloc"]["growth_since_start"][0]
+    assert "test_memory_profiler.py:" in top["location"]
+    assert top["size_diff_kb"] >= 1024
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_store_is_measured(memory_cache):
+    await memory_cache.set("session:abc", "x" * 100)
+
+    stores = MemoryProfiler().measure_stores()
+    assert stores["memory_cache"]["items"] == 1
+    assert MemoryProfiler().report()["memory_cache"]["keys"] == 1
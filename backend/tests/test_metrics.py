@@ -0,0 +1,139 @@
+"""
+Tests for the OpenMetrics registry, cross-worker merge and instrumentation
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.circuit_breaker import CircuitBreakerError
+from app.core.metrics import (
+    MetricsMiddleware,
+    MetricsRegistry,
+    merge_snapshots,
+    render_openmetrics,
+    track_openai,
+)
+
+
+def worker_snapshot(requests: int, latency: float, breaker_state: int) -> dict:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("req_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    counter = registry.counter("calls", "Calls", ("route",))
+    state = registry.gauge("breaker_state", "State", ("breaker",), aggregate="max")
+    sessions = registry.gauge("sessions", "Sessions")
+    for _ in range(requests):
+        histogram.observe(latency, route="/api/chat/")
+        counter.inc(route="/api/chat/")
+    state.set(breaker_state, breaker="openai")
+    sessions.set(requests)
+    return registry.snapshot()
+
+
+def test_snapshots_merge_across_workers():
+    merged = merge_snapshots([worker_snapshot(3, 0.05, 0), worker_snapshot(2, 0.5, 2)])
+    text = render_openmetrics(merged)
+
+    assert 'req_seconds_bucket{route="/api/chat/",le="0.1"} 3' in text
+    assert 'req_seconds_bucket{route="/api/chat/",le="1.0"} 5' in text
+    assert 'req_seconds_bucket{route="/api/chat/",le="+Inf"} 5' in text
+    assert 'req_seconds_count{route="/api/chat/"} 5' in text
+    assert 'calls_total{route="/api/chat/"} 5' in text
+    # Breaker state is the worst worker's, session counts add up
+    assert 'breaker_state{breaker="openai"} 2' in text
+    assert "sessions 5" in text
+    assert "# TYPE calls counter" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_middleware_labels_route_templates(monkeypatch):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("http_request_duration_seconds", "Latency", ("method", "route", "status"))
+    monkeypatch.setattr(metrics, "http_request_duration", histogram)
+
+    app = FastAPI()
+
+    router = APIRouter()
+
+    @router.get("/{ticket_id}/events/{index}")
+    async def ticket_event(ticket_id: str, index: int):
+        return {"id": ticket_id}
+
+    @router.get("/{ticket_id}/events")
+    async def ticket_events(ticket_id: str):
+        return {"id": ticket_id}
+
+    mounted = FastAPI()
+
+    @mounted.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.include_router(router, prefix="/api/tickets")
+    app.mount("/v2", mounted)
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    client.get("/api/tickets/SAV-1/events/1")
+    client.get("/api/tickets/SAV-2/events/2")
+    # Parameter values equal to literal segments
+    client.get("/api/tickets/events/events")
+    client.get("/v2/items/items")
+    client.get("/nowhere")
+
+    text = render_openmetrics(registry.snapshot())
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/tickets/{ticket_id}/events/{index}",status="200"} 2'
+    ) in text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/tickets/{ticket_id}/events",status="200"} 1'
+    ) in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/v2/items/{item_id}",status="200"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"} 1' in text
+
+
+def test_track_openai_counts_tokens_and_outcomes(monkeypatch):
+    registry = MetricsRegistry()
+    duration = registry.histogram("openai_request_duration_seconds", "Latency", ("operation", "outcome"))
+    tokens = registry.counter("openai_tokens", "Tokens", ("operation", "kind"))
+    monkeypatch.setattr(metrics, "openai_request_duration", duration)
+    monkeypatch.setattr(metrics, "openai_tokens", tokens)
+
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+    with track_openai("chat") as call:
+        call.record_usage(response)
+    with pytest.raises(CircuitBreakerError):
+        with track_openai("chat"):
+            raise CircuitBreakerError("open")
+
+    text = render_openmetrics(registry.snapshot())
+    assert 'openai_tokens_total{operation="chat",kind="prompt"} 120' in text
+    assert 'openai_tokens_total{operation="chat",kind="completion"} 30' in text
+    assert 'openai_request_duration_seconds_count{operation="chat",outcome="success"} 1' in text
+    assert 'openai_request_duration_seconds_count{operation="chat",outcome="circuit_open"} 1' in text
+
+
+def test_registry_collects_breakers_and_in_memory_state():
+    from app.core.circuit_breaker import CircuitBreakerManager
+
+    CircuitBreakerManager.get_breaker(name="test-metrics")
+    text = render_openmetrics(metrics.registry.snapshot())
+
+    assert 'circuit_breaker_state{breaker="test-metrics"} 0' in text
+    assert "chat_sessions_active " in text
+    assert "sav_tickets_active " in text
+
+
+def test_metrics_endpoint_rejects_non_ascii_token(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main.settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(main.settings, "METRICS_TOKEN", "secret")
+    client = TestClient(main.app)
+
+    # Starlette decodes headers as latin-1, so this must be a 401, not a TypeError
+    response = client.get("/metrics", headers={"Authorization": "Bearer sécret".encode("latin-1")})
+    assert response.status_code == 401
@@ -0,0 +1,90 @@
+"""
+Tests for the pure ASGI middleware stack
+"""
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware
+from app.core.request_limits import RequestSizeLimitMiddleware, RequestTimeoutMiddleware
+
+
+def make_app(timeout: float = 5) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"size": len(body), "request_id": request.state.request_id}
+
+    @app.post("/api/upload/file")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(1)
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                await asyncio.sleep(0.1)
+                yield f"{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(RequestSizeLimitMiddleware, max_size=100, path_limits={"/api/upload": 1000})
+    app.add_middleware(RequestTimeoutMiddleware, timeout=timeout)
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+def test_headers_and_request_id():
+    client = TestClient(make_app())
+
+    response = client.post("/echo", content=b"x" * 10)
+
+    assert response.status_code == 200
+    assert response.json()["size"] == 10
+    assert response.headers["X-Request-ID"] == response.json()["request_id"]
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.headers["X-Response-Time"].endswith("ms")
+
+
+def test_size_limit_on_declared_and_streamed_bodies():
+    client = TestClient(make_app())
+
+    declared = client.post("/echo", content=b"x" * 101)
+    assert declared.status_code == 413
+    assert declared.json()["error"] == "payload_too_large"
+    assert declared.json()["max_size_bytes"] == 100
+
+    # Chunked body without Content-Length: counted while it is received
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    streamed = client.post("/echo", content=chunks())
+    assert streamed.status_code == 413
+    assert streamed.headers["X-Request-ID"]
+
+    # Uploads get their own limit
+    assert client.post("/api/upload/file", content=b"x" * 500).json() == {"size": 500}
+
+
+def test_timeout_before_response_but_not_during_stream():
+    client = TestClient(make_app(timeout=0.2))
+
+    response = client.get("/slow")
+    assert response.status_code == 504
+    assert response.json()["error"] == "gateway_timeout"
+
+    # Streams longer than the timeout once the response has started
+    streamed = client.get("/stream")
+    assert streamed.status_code == 200
+    assert streamed.text == "0\n1\n2\n"
@@ -0,0 +1,54 @@
+"""
+Tests for connection pool telemetry
+"""
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import pool_monitor
+from app.core.pool_monitor import InstrumentedAsyncAdaptedQueuePool, setup_pool_monitoring, get_pool_stats
+
+
+@pytest.mark.asyncio
+async def test_pool_monitor_records_checkouts_and_waits(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_monitor, "_pool_monitor", None)
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5
+    )
+    setup_pool_monitoring(engine, wait_warning_ms=20)
+
+    async def hold_connection():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(0.1)
+
+    async def wait_for_connection():
+        await asyncio.sleep(0.02)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            return get_pool_stats()["checked_out"]
+
+    _, checked_out_during = await asyncio.gather(hold_connection(), wait_for_connection())
+
+    stats = get_pool_stats()
+    await engine.dispose()
+
+    assert checked_out_during == 1
+    assert stats["pool_size"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["checkins"] == 2
+    assert stats["connects"] == 1
+    assert stats["peak_checked_out"] == 1
+    assert stats["checked_out"] == 0
+    # Only the second checkout queued; the first one's connect time is not a wait
+    assert stats["checkout_wait"]["count"] == 1
+    assert stats["checkout_wait"]["max_ms"] >= 50
+    assert stats["checkout_wait"]["slow_waits"] == 1
+    assert stats["checkout_wait"]["histogram_ms"]["le_+Inf"] == 1
+    assert stats["connection_age_seconds"]["live_connections"] == 1
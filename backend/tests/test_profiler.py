@@ -0,0 +1,98 @@
+"""
+Tests for the on-demand sampling profiler
+"""
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import profiler
+from app.core.profiler import (
+    ProfilerMiddleware,
+    arm_request_capture,
+    compile_route_pattern,
+    profile_for,
+)
+
+
+def busy_loop(seconds: float) -> int:
+    total = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def test_route_patterns():
+    assert compile_route_pattern("/api/tickets/{ticket_id}").fullmatch("/api/tickets/SAV-1")
+    assert not compile_route_pattern("/api/tickets/{ticket_id}").fullmatch("/api/tickets/SAV-1/events")
+    assert compile_route_pattern("/api/chat/*").fullmatch("/api/chat/stream")
+    assert not compile_route_pattern("/api/chat/").fullmatch("/api/chat/stream")
+
+
+def test_profile_for_samples_the_event_loop():
+    async def run():
+        task = asyncio.create_task(profile_for(0.3, interval_ms=5))
+        await asyncio.sleep(0.02)
+        busy_loop(0.2)
+        return await task
+
+    profile = asyncio.run(run())
+
+    assert profile.samples > 5
+    assert "test_profiler.py:busy_loop" in profile.to_collapsed()
+    line = profile.to_collapsed().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+
+def test_only_one_session_per_worker():
+    async def run():
+        task = asyncio.create_task(profile_for(0.2))
+        await asyncio.sleep(0.01)
+        try:
+            await profile_for(0.1)
+        except profiler.ProfilerBusyError:
+            busy = True
+        else:
+            busy = False
+        await task
+        return busy
+
+    assert asyncio.run(run()) is True
+
+
+def test_request_capture_profiles_only_matching_requests(monkeypatch):
+    monkeypatch.setattr(profiler, "_capture", None)
+    app = FastAPI()
+
+    @app.get("/api/tickets/{ticket_id}")
+    async def ticket(ticket_id: str):
+        busy_loop(0.1)
+        return {"id": ticket_id}
+
+    @app.get("/api/other")
+    async def other():
+        busy_loop(0.1)
+        return {}
+
+    @app.post("/arm")
+    async def arm():
+        arm_request_capture("/api/tickets/{ticket_id}", count=2, interval_ms=5)
+
+    app.add_middleware(ProfilerMiddleware)
+
+    # One event loop for all requests, as in a server worker
+    with TestClient(app) as client:
+        client.post("/arm")
+        client.get("/api/other")
+        client.get("/api/tickets/SAV-1")
+        client.get("/api/tickets/SAV-2")
+
+    capture = profiler.get_request_capture()
+    assert capture.status == "done"
+    assert len(capture.request_times_ms) == 2
+    collapsed = capture.profile.to_collapsed()
+    assert "<locals>.ticket;" in collapsed
+    assert "<locals>.other;" not in collapsed
@@ -0,0 +1,69 @@
+"""
+Tests for statement fingerprints and latency sketches in SlowQueryLogger
+"""
+import random
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import slow_query_logger
+from app.core.quantile_sketch import QuantileSketch
+from app.core.slow_query_logger import (
+    fingerprint_statement,
+    setup_slow_query_logging,
+    get_top_query_fingerprints,
+)
+
+
+def test_fingerprint_strips_literals_and_params():
+    assert fingerprint_statement(
+        "SELECT * FROM t WHERE id = $1 AND name = 'bob' AND n > 42 AND x IN ($2, $3)"
+    ) == "SELECT * FROM t WHERE id = ? AND name = ? AND n > ? AND x IN (?...)"
+    assert fingerprint_statement(
+        "INSERT INTO t (a, b) VALUES (?, ?), (?, ?)"
+    ) == "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    # Casts and identifiers containing digits are preserved
+    assert fingerprint_statement("SELECT t1.a::TEXT FROM t1") == "SELECT t1.a::TEXT FROM t1"
+
+
+def test_quantile_sketch_relative_error():
+    rng = random.Random(42)
+    values = [rng.expovariate(1 / 20) for _ in range(5000)]
+    sketch = QuantileSketch(relative_accuracy=0.02)
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.021 * exact
+
+    assert sketch.count == 5000
+    assert QuantileSketch().quantile(0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logger_aggregates_fingerprints(monkeypatch):
+    monkeypatch.setattr(slow_query_logger, "_slow_query_logger", None)
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    setup_slow_query_logging(engine, threshold_ms=10_000)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        await conn.execute(
+            text("INSERT INTO items (id, name) VALUES (:id, :name)"),
+            [{"id": i, "name": f"item-{i}"} for i in range(20)]
+        )
+        for i in range(5):
+            await conn.execute(text("SELECT * FROM items WHERE id < :n"), {"n": 10 + i})
+
+    await engine.dispose()
+
+    top = get_top_query_fingerprints(top_n=10, order_by="count")
+    select_stats = next(e for e in top if e["fingerprint"] == "SELECT * FROM items WHERE id < ?")
+
+    assert select_stats["count"] == 5
+    assert select_stats["rows"] == 10 + 11 + 12 + 13 + 14
+    assert select_stats["p50_ms"] is not None
+    assert select_stats["p99_ms"] >= select_stats["p50_ms"]
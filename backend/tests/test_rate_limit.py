@@ -0,0 +1,122 @@
+"""
+Tests for the GCRA rate limiter
+"""
+import time
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import RateLimiter, RateLimits, setup_rate_limiter
+from app.core import rate_limit
+from app.core.rate_limit_storage import (
+    MemoryGCRAStore,
+    RedisGCRAStore,
+    RateLimitItem,
+    parse_limits,
+    _gcra,
+)
+
+
+def test_parse_limits_and_presets():
+    assert parse_limits("5/minute") == [RateLimitItem(5, 60)]
+    assert parse_limits("100 per hour; 10/30 seconds") == [RateLimitItem(100, 3600), RateLimitItem(10, 30)]
+    for name in ("AUTH_LOGIN", "CHAT_MESSAGE", "UPLOAD_BULK", "PUBLIC_READ"):
+        assert parse_limits(getattr(RateLimits, name))
+    with pytest.raises(ValueError):
+        parse_limits("lots")
+
+
+@pytest.mark.asyncio
+async def test_memory_gcra_allows_burst_then_spaces_requests():
+    store = MemoryGCRAStore()
+    item = RateLimitItem(5, 60)
+
+    results = [await store.hit("k", item) for _ in range(6)]
+
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    # One request is earned back every 12 seconds, not a whole new window
+    assert 11 < results[5].retry_after <= 12
+
+
+class FakeRedisScript:
+    """Stands in for the Lua script: shared TATs, same GCRA step"""
+
+    def __init__(self):
+        self.tat = {}
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        interval, period, cost = args
+        now = time.monotonic() * 1000
+        item = RateLimitItem(period // interval, period // 1000)
+        result, new_tat = _gcra(self.tat.get(keys[0]), now, item, cost)
+        if new_tat is not None:
+            self.tat[keys[0]] = new_tat
+        return [int(result.allowed), result.remaining, int(result.retry_after * 1000), int(result.reset_after * 1000)]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_shares_state_and_prechecks_locally():
+    script = FakeRedisScript()
+    workers = [RedisGCRAStore("redis://unused"), RedisGCRAStore("redis://unused")]
+    for store in workers:
+        store._script = script
+    item = RateLimitItem(4, 60)
+
+    allowed = [(await workers[i % 2].hit("k", item)).allowed for i in range(5)]
+    assert allowed == [True, True, True, True, False]
+    assert script.calls == 5
+
+    # Both workers now know the key is exhausted: rejected without Redis
+    for store in workers:
+        assert not (await store.hit("k", item)).allowed
+    assert script.calls == 5
+    assert sum(store.local_rejections for store in workers) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_store_falls_back_to_local_limits():
+    store = RedisGCRAStore("redis://unused")
+
+    async def broken(keys, args):
+        raise ConnectionError("down")
+
+    store._script = broken
+    item = RateLimitItem(2, 60)
+    assert [(await store.hit("k", item)).allowed for _ in range(3)] == [True, True, False]
+    assert store.fallbacks == 3
+
+
+def test_decorator_default_limits_and_headers(monkeypatch):
+    test_limiter = RateLimiter(key_func=lambda request: "client", default_limits=["3/minute"])
+    monkeypatch.setattr(rate_limit, "limiter", test_limiter)
+
+    app = FastAPI()
+    setup_rate_limiter(app)
+
+    @app.get("/limited")
+    @test_limiter.limit("2/minute")
+    async def limited(request: Request):
+        return {"ok": True}
+
+    @app.get("/default")
+    async def default():
+        return {"ok": True}
+
+    client = TestClient(app)
+
+    first = client.get("/limited")
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert client.get("/limited").status_code == 200
+
+    rejected = client.get("/limited")
+    assert rejected.status_code == 429
+    assert rejected.json() == {"error": "Rate limit exceeded: 2 per 1 minute"}
+    assert int(rejected.headers["Retry-After"]) == 30
+
+    # Undecorated routes get the default limit, counted separately
+    assert [client.get("/default").status_code for _ in range(4)] == [200, 200, 200, 429]
@@ -3,7 +3,8 @@
 Test suite for sensitive data filtering in logs
 """
 import logging
-from app.core.logging import SensitiveDataFilter
+import queue
+from app.core.logging import DeferredQueueHandler, RedactingQueueListener, SensitiveDataFilter
 
 
 def test_sensitive_data_filter():
@@ -105,6 +106,67 @@ def test_sensitive_data_filter():
     return failed == 0
 
 
+def test_single_pass_matches_pattern_by_pattern():
+    """The combined pattern redacts like the patterns applied one by one"""
+    filter_instance = SensitiveDataFilter()
+
+    def one_by_one(text):
+        for pattern_info in SensitiveDataFilter.SENSITIVE_PATTERNS:
+            text = pattern_info["pattern"].sub(pattern_info["replacement"], text)
+        return text
+
+    samples = [
+        "secret=abc password: x, api_key='ABCDEFGHIJKLMNOPQRSTUVWX'",
+        "mail a.b@x.fr, card 4111 1111 1111 1111, postgres://u:p@h/db",
+        "{'password': 'hunter2', 'email': 'x@y.com'}",
+        "sk-ABCDEFGHIJKLMNOPQRSTUVWXYZ eyJa.eyJb.cc",
+        "nothing to hide 12345",
+    ]
+    for text in samples:
+        assert filter_instance.redact_sensitive_data(text) == one_by_one(text)
+
+    # The authorization scheme is kept, the credentials are not
+    assert filter_instance.redact_sensitive_data("Authorization: Basic dXNlcjpwYXNz") == \
+        "Authorization: Basic ***REDACTED***"
+
+
+def test_queue_listener_redacts_emitted_records_once():
+    class Capture(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+
+        def emit(self, record):
+            self.messages.append(self.format(record))
+
+    redactor = SensitiveDataFilter()
+    calls = []
+    original = redactor.redact_sensitive_data
+    redactor.redact_sensitive_data = lambda text: calls.append(text) or original(text)
+
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.setLevel(logging.INFO)
+    first, second = Capture(), Capture()
+    listener = RedactingQueueListener(log_queue, first, second, redactor=redactor)
+
+    logger = logging.getLogger("test_queue_redaction")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        logger.debug("dropped password=%s", "nope")
+        logger.info("login with password=%s", "hunter2")
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    assert first.messages == second.messages == ["login with password=***REDACTED***"]
+    # Arguments merged on the caller side, one redaction pass, none for DEBUG
+    assert calls == ["login with password=hunter2"]
+
+
 if __name__ == "__main__":
     success = test_sensitive_data_filter()
     exit(0 if success else 1)
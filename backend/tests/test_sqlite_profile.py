@@ -0,0 +1,75 @@
+"""
+Tests for the SQLite production profile (WAL, reader pool, single writer)
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from app.db.sqlite import create_sqlite_engines, SQLiteRoutingSession
+from app.models.ticket import Base, TicketDB
+
+
+def _ticket(i: int) -> TicketDB:
+    return TicketDB(
+        ticket_id=f"SAV-20260101-{i:04d}",
+        customer_id=f"CUST-{i}",
+        status="new",
+        priority="P2",
+        created_at=datetime(2026, 1, 1)
+    )
+
+
+@pytest.mark.asyncio
+async def test_production_profile_routes_reads_and_serializes_writes(tmp_path):
+    writer, reader = create_sqlite_engines(
+        f"sqlite:///{tmp_path / 'kiosk.db'}", profile="production", read_pool_size=2
+    )
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(
+        writer,
+        class_=AsyncSession,
+        sync_session_class=SQLiteRoutingSession,
+        reader_engine=reader,
+        writer_engine=writer,
+        expire_on_commit=False
+    )
+
+    async with writer.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+    async with reader.connect() as conn:
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+
+    async def write(start: int):
+        async with session_factory() as db:
+            for i in range(start, start + 10):
+                db.add(_ticket(i))
+                # Reads inside a writing transaction see its own changes
+                await db.flush()
+                assert await db.get(TicketDB, f"SAV-20260101-{i:04d}") is not None
+            await db.commit()
+
+    async def read():
+        async with session_factory() as db:
+            return await db.scalar(select(func.count()).select_from(TicketDB))
+
+    results = await asyncio.gather(write(0), write(100), *[read() for _ in range(10)])
+
+    async with session_factory() as db:
+        total = await db.scalar(select(func.count()).select_from(TicketDB))
+
+    await reader.dispose()
+    await writer.dispose()
+
+    assert total == 20
+    assert all(0 <= count <= 20 for count in results[2:])
+
+
+def test_memory_database_falls_back_to_development_profile():
+    writer, reader = create_sqlite_engines("sqlite:///:memory:", profile="production")
+    assert reader is None
+    assert type(writer.sync_engine.pool).__name__ == "StaticPool"
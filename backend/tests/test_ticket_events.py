@@ -0,0 +1,152 @@
+"""
+Tests for ticket change events (in-process pub/sub fallback)
+"""
+import asyncio
+import pytest
+from datetime import datetime
+
+from app.core.pubsub import PubSubBroker, PubSubManager
+from app.repositories.ticket_repository import ticket_repository
+from app.services import ticket_events
+from app.services.sav_workflow_engine import SAVTicket, SAVWorkflowEngine
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_fan_out_and_overflow():
+    broker = PubSubBroker()
+    first = await broker.subscribe("chan", maxsize=2)
+    second = await broker.subscribe("chan")
+
+    for i in range(3):
+        assert await broker.publish("chan", {"n": i}) == 2
+
+    # Bounded queue keeps the most recent messages
+    assert [await first.get(timeout=0.1) for _ in range(2)] == [{"n": 1}, {"n": 2}]
+    assert first.dropped == 1
+    assert (await second.get(timeout=0.1)) == {"n": 0}
+
+    await first.close()
+    await second.close()
+    assert broker.subscriber_count("chan") == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_publishes_ticket_deltas(db_session_factory):
+    PubSubManager.initialize("memory://")
+    broker = PubSubManager.get_broker()
+    subscription = await broker.subscribe(ticket_events.TICKET_EVENTS_CHANNEL)
+
+    ticket = SAVTicket(
+        ticket_id="SAV-20260101-001",
+        customer_id="CUST-1",
+        order_number="CMD-2026-00001",
+        product_sku="SKU-1",
+        product_name="Canapé",
+        problem_description="Pied cassé",
+        created_at=datetime(2026, 1, 1),
+    )
+
+    async with db_session_factory() as db:
+        await ticket_repository.create(db, ticket)
+        created = await asyncio.wait_for(subscription.get(), 1.0)
+
+        ticket.priority = "P1"
+        await ticket_repository.update(db, ticket)
+        updated = await asyncio.wait_for(subscription.get(), 1.0)
+
+        await ticket_repository.delete(db, ticket.ticket_id)
+        deleted = await asyncio.wait_for(subscription.get(), 1.0)
+
+    await subscription.close()
+    await PubSubManager.close()
+
+    assert created["type"] == ticket_events.TICKET_CREATED
+    assert created["ticket_id"] == "SAV-20260101-001"
+    assert created["status"] == "new"
+    assert "problem_description" not in created
+
+    assert updated["type"] == ticket_events.TICKET_UPDATED
+    assert updated["priority"] == "P1"
+
+    assert deleted == {"type": ticket_events.TICKET_DELETED, "ts": deleted["ts"], "ticket_id": "SAV-20260101-001"}
+
+
+@pytest.mark.asyncio
+async def test_validation_publishes_one_event_once_persisted(monkeypatch, db_session_factory):
+    PubSubManager.initialize("memory://")
+    subscription = await PubSubManager.get_broker().subscribe(ticket_events.TICKET_EVENTS_CHANNEL)
+
+    def make_ticket(ticket_id):
+        return SAVTicket(
+            ticket_id=ticket_id,
+            customer_id="CUST-1",
+            order_number="CMD-2026-00001",
+            product_sku="SKU-1",
+            product_name="Canapé",
+            problem_description="Pied cassé",
+            created_at=datetime(2026, 1, 1),
+        )
+
+    async def drain():
+        events = []
+        while (event := await subscription.get(timeout=0.1)) is not None:
+            events.append(event["type"])
+        return events
+
+    async with db_session_factory() as db:
+        workflow = SAVWorkflowEngine(db_session=db)
+        for ticket_id in ("SAV-20260101-001", "SAV-20260101-002"):
+            workflow.active_tickets[ticket_id] = make_ticket(ticket_id)
+            await ticket_repository.create(db, workflow.active_tickets[ticket_id])
+        await drain()
+
+        assert (await workflow.validate_ticket("SAV-20260101-001"))["success"]
+        assert await drain() == [ticket_events.TICKET_VALIDATED]
+
+        async def failing_update(*args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(ticket_repository, "update", failing_update)
+        await workflow.validate_ticket("SAV-20260101-002")
+        assert await drain() == []
+
+    await subscription.close()
+    await PubSubManager.close()
+
+
+@pytest.mark.asyncio
+async def test_ticket_stream_is_routed_before_ticket_ids():
+    from app.main import app
+
+    PubSubManager.initialize("memory://")
+    broker = PubSubManager.get_broker()
+    started = asyncio.get_running_loop().create_future()
+    chunks = asyncio.Queue()
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.set_result(message)
+        elif message.get("body"):
+            await chunks.put(message["body"].decode())
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/tickets/stream", "raw_path": b"/api/tickets/stream",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    request = asyncio.create_task(app(scope, receive, send))
+    try:
+        assert (await asyncio.wait_for(started, 5.0))["status"] == 200
+        assert await asyncio.wait_for(chunks.get(), 1.0) == "retry: 3000\n\n"
+
+        await broker.publish(ticket_events.TICKET_EVENTS_CHANNEL, {"type": "ticket.updated", "ticket_id": "SAV-1"})
+        event = await asyncio.wait_for(chunks.get(), 1.0)
+        assert event.startswith("event: ticket.updated\ndata: ") and '"SAV-1"' in event
+    finally:
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        await PubSubManager.close()
@@ -0,0 +1,72 @@
+"""
+Tests for the streaming ticket export (server-side cursor + encoders)
+"""
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+
+from app.models.ticket import TicketDB
+from app.repositories.ticket_repository import ticket_repository
+from app.api.endpoints.tickets import _encode_ndjson, _encode_csv, _parse_export_date
+
+
+@pytest.mark.asyncio
+async def test_stream_for_export_filters_and_columns(db_session_factory):
+    async with db_session_factory() as db:
+        for i in range(25):
+            db.add(TicketDB(
+                ticket_id=f"SAV-20260101-{i:03d}",
+                customer_id=f"CUST-{i}",
+                status="resolved" if i % 2 else "new",
+                priority="P2",
+                created_at=datetime(2026, 1, 1 + i),
+                priority_factors=["a", "b"]
+            ))
+        await db.commit()
+
+        rows = [
+            row async for row in ticket_repository.stream_for_export(
+                db,
+                columns=["ticket_id", "status", "created_at"],
+                created_from=datetime(2026, 1, 5),
+                created_to=datetime(2026, 1, 15),
+                statuses=["resolved"],
+                batch_size=3
+            )
+        ]
+
+
+    assert [r["ticket_id"] for r in rows] == [
+        "SAV-20260101-005", "SAV-20260101-007", "SAV-20260101-009",
+        "SAV-20260101-011", "SAV-20260101-013"
+    ]
+    assert set(rows[0].keys()) == {"ticket_id", "status", "created_at"}
+
+
+def test_export_encoders():
+    row = {
+        "ticket_id": "SAV-20260101-001",
+        "created_at": datetime(2026, 1, 1, 10, 30),
+        "priority_factors": ["délai", "valeur"],
+        "resolved_at": None
+    }
+    columns = list(row.keys())
+
+    line = _encode_ndjson(row)
+    assert line.endswith("\n")
+    decoded = json.loads(line)
+    assert decoded["created_at"] == "2026-01-01T10:30:00"
+    assert decoded["priority_factors"] == ["délai", "valeur"]
+
+    parsed = next(csv.reader(io.StringIO(_encode_csv(row, columns))))
+    assert parsed[0] == "SAV-20260101-001"
+    assert json.loads(parsed[2]) == ["délai", "valeur"]
+    assert parsed[3] == ""
+
+
+def test_export_dates_with_offsets_are_converted_to_utc():
+    assert _parse_export_date("2026-01-05T10:00:00+02:00", "created_from") == datetime(2026, 1, 5, 8, 0)
+    assert _parse_export_date("2026-01-05T10:00:00Z", "created_from") == datetime(2026, 1, 5, 10, 0)
+    assert _parse_export_date("2026-01-05", "created_from") == datetime(2026, 1, 5)
@@ -0,0 +1,72 @@
+"""
+Tests for per-stage request timing (spans, Server-Timing, histograms)
+"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import timing
+from app.core.timing import ServerTimingMiddleware, StageRegistry, span, timed
+
+
+@timed("test.helper")
+async def helper():
+    await asyncio.sleep(0.01)
+
+
+def make_app(sample_rate: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/turn")
+    async def turn():
+        with span("test.detect"):
+            pass
+        with span("test.openai"):
+            await asyncio.sleep(0.02)
+        await helper()
+        await helper()
+        return {"ok": True}
+
+    app.add_middleware(ServerTimingMiddleware, sample_rate=sample_rate)
+    return app
+
+
+def test_span_is_noop_outside_traced_request():
+    assert span("anything") is span("other")
+    with span("anything"):
+        pass
+
+
+def test_server_timing_header_and_histograms(monkeypatch):
+    registry = StageRegistry()
+    monkeypatch.setattr(timing, "_registry", registry)
+    client = TestClient(make_app(sample_rate=1.0))
+
+    response = client.get("/turn")
+
+    entries = dict(
+        part.strip().split(";dur=") for part in response.headers["Server-Timing"].split(",")
+    )
+    assert list(entries) == ["test.detect", "test.openai", "test.helper", "total"]
+    assert float(entries["test.openai"]) >= 20
+    # Repeated stages are summed in the header
+    assert float(entries["test.helper"]) >= 20
+
+    client.get("/turn")
+    stats = {entry["stage"]: entry for entry in registry.get_stats()}
+    assert registry.traced_requests == 2
+    assert stats["test.openai"]["count"] == 2
+    assert stats["test.openai"]["p50_ms"] >= 20
+
+
+def test_unsampled_requests_are_not_traced(monkeypatch):
+    registry = StageRegistry()
+    monkeypatch.setattr(timing, "_registry", registry)
+    client = TestClient(make_app(sample_rate=0.0))
+
+    response = client.get("/turn")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert registry.traced_requests == 0
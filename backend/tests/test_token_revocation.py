@@ -0,0 +1,83 @@
+"""
+Tests for single-decode JWT verification and the local revocation filter
+"""
+import asyncio
+import pytest
+
+from app.core import security, token_revocation
+from app.core.bloom_filter import BloomFilter
+from app.core.pubsub import PubSubManager
+from app.core.redis import CacheManager, get_cache
+from app.core.security import create_access_token, blacklist_token, verify_token_with_blacklist
+from app.core.token_revocation import (
+    TokenRevocationFilter,
+    REVOCATION_CHANNEL,
+    start_revocation_filter,
+    stop_revocation_filter,
+)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    assert all(f"jti-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert not bloom.saturated
+
+
+@pytest.mark.asyncio
+async def test_verify_skips_cache_for_unrevoked_tokens(monkeypatch):
+    monkeypatch.setattr(token_revocation, "_revocation_filter", TokenRevocationFilter(capacity=1000))
+    CacheManager.initialize("memory://")
+    PubSubManager.initialize("memory://")
+
+    decodes = []
+    real_decode = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    cache = get_cache()
+    exists_calls = []
+    real_exists = cache.exists
+
+    async def counting_exists(key):
+        exists_calls.append(key)
+        return await real_exists(key)
+
+    monkeypatch.setattr(cache, "exists", counting_exists)
+
+    try:
+        token = create_access_token("u1")
+
+        # Filter not loaded yet: the cache is consulted
+        assert (await verify_token_with_blacklist(token)).user_id == "u1"
+        assert len(exists_calls) == 1
+        assert len(decodes) == 1
+
+        await start_revocation_filter()
+        assert token_revocation.get_revocation_filter().ready
+
+        # Not revoked: answered locally, one decode
+        decodes.clear()
+        assert (await verify_token_with_blacklist(token)).user_id == "u1"
+        assert len(exists_calls) == 1
+        assert len(decodes) == 1
+
+        # Revoked here: local filter hit, confirmed in the cache
+        assert await blacklist_token(token)
+        assert await verify_token_with_blacklist(token) is None
+        assert len(exists_calls) == 2
+
+        # Revoked by another worker: arrives over pub/sub
+        other = create_access_token("u2")
+        other_jti = real_decode(other, security.settings.SECRET_KEY, algorithms=[security.ALGORITHM])["jti"]
+        await cache.set(f"blacklist:token:{other_jti}", "revoked", expire=60)
+        await PubSubManager.get_broker().publish(REVOCATION_CHANNEL, {"jti": other_jti})
+        await asyncio.sleep(0.01)
+        assert await verify_token_with_blacklist(other) is None
+    finally:
+        await stop_revocation_filter()
+        await PubSubManager.close()
+        await CacheManager.close()
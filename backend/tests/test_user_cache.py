@@ -0,0 +1,69 @@
+"""
+Tests for the authenticated-user snapshot cache and its pub/sub invalidation
+"""
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import user_cache
+from app.core.pubsub import PubSubManager
+from app.core.user_cache import (
+    UserSnapshotCache,
+    load_user_snapshot,
+    invalidate_user,
+    start_invalidation_listener,
+    stop_invalidation_listener,
+    USER_INVALIDATION_CHANNEL,
+)
+from app.models.user import UserDB, UserRole, UserStatus
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cached_until_invalidated(monkeypatch, db_session_factory):
+    cache = UserSnapshotCache(ttl=60)
+    monkeypatch.setattr(user_cache, "_user_cache", cache)
+    PubSubManager.initialize("memory://")
+
+    queries = []
+    real_execute = AsyncSession.execute
+
+    async def counting_execute(self, statement, *args, **kwargs):
+        queries.append(statement)
+        return await real_execute(self, statement, *args, **kwargs)
+
+    try:
+        async with db_session_factory() as db:
+            db.add(UserDB(id="u1", email="a@b.fr", username="agent1", hashed_password="x", role=UserRole.AGENT))
+            await db.commit()
+
+        monkeypatch.setattr(AsyncSession, "execute", counting_execute)
+
+        async with db_session_factory() as db:
+            first = await load_user_snapshot(db, "u1")
+            second = await load_user_snapshot(db, "u1")
+        assert first.role == UserRole.AGENT and first.status == UserStatus.ACTIVE
+        assert second is first
+        assert len(queries) == 1
+
+        # Another worker suspends the user: the broadcast reaches our listener
+        await start_invalidation_listener()
+        async with db_session_factory() as db:
+            user = (await db.execute(select(UserDB).where(UserDB.id == "u1"))).scalar_one()
+            user.status = UserStatus.SUSPENDED
+            await db.commit()
+        await PubSubManager.get_broker().publish(USER_INVALIDATION_CHANNEL, {"user_id": "u1"})
+        await asyncio.sleep(0.01)
+
+        async with db_session_factory() as db:
+            assert (await load_user_snapshot(db, "u1")).status == UserStatus.SUSPENDED
+
+        # Local invalidation, and a stale load racing an invalidation is not stored
+        await invalidate_user("u1")
+        generation = cache.generation
+        cache.invalidate("u1")
+        cache.put(first, generation)
+        assert cache.get("u1") is None
+    finally:
+        await stop_invalidation_listener()
+        await PubSubManager.close()